@@ -0,0 +1,211 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 19:58:31
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 19:58:31
+# @ Description: 读缓存
+"""
+
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import TYPE_CHECKING, Awaitable, Callable, NamedTuple
+
+if TYPE_CHECKING:
+  # 同步客户端不需要 asyncio，只在类型检查时导入
+  import asyncio
+
+
+class _Entry(NamedTuple):
+  # 过期时间（单调时钟）
+  expires: float
+  # 覆盖的地址范围 [start, end)
+  start: int
+  end: int
+  value: object
+
+
+def _copy(value):
+  # 列表和 numpy 数组可变，返回副本，避免调用方修改缓存中的值
+  copy = getattr(value, "copy", None)
+  return value if copy is None else copy()
+
+
+class RegisterCache:
+  def __init__(self, ttl: float = 0.5, max_entries: int = 1024):
+    """读缓存：有效期内相同的读请求直接返回缓存的值，同时进行的相同读请求共用一次请求
+
+    传给客户端的 cache 参数后生效，键为 (设备, unit_id, 功能码, 起始地址, 数量)；
+    经过该客户端的写入会使重叠地址的缓存失效。
+
+    Args:
+        ttl (float, optional): 默认有效期（秒），为 0 时只合并同时进行的请求。Defaults to 0.5.
+        max_entries (int, optional): 缓存条目上限，超过时淘汰最久未使用的条目。Defaults to 1024.
+    """
+    self.ttl = ttl
+    self.max_entries = max_entries
+    # [(功能码, 起始地址, 结束地址, 有效期), ...]
+    self.__rules: list[tuple] = []
+    self.__entries: OrderedDict[tuple, _Entry] = OrderedDict()
+    self.__inflight: dict[tuple, Future] = {}
+    self.__inflight_async: dict[tuple, "asyncio.Future"] = {}
+    # 每次失效加一，读取期间发生过失效的结果不写入缓存
+    self.__generation = 0
+    self.__lock = Lock()
+    # 统计
+    self.hits = 0
+    self.misses = 0
+    self.coalesced = 0
+    self.evictions = 0
+
+  def set_ttl(self, start_address, count: int, ttl: float, function_code: int = None):
+    """设置地址范围的有效期，与多个范围重叠的读取取其中最短的有效期
+
+    Args:
+        start_address : 起始地址
+        count (int): 寄存器（线圈）数量
+        ttl (float): 有效期（秒）
+        function_code (int, optional): 只对该读功能码生效，None 表示全部。Defaults to None.
+    """
+    self.__rules.append((function_code, start_address, start_address + count, ttl))
+
+  def __ttl(self, function_code, start, end) -> float:
+    ttl = None
+    for rule_function_code, rule_start, rule_end, rule_ttl in self.__rules:
+      if rule_function_code not in (None, function_code) or rule_end <= start or rule_start >= end:
+        continue
+      ttl = rule_ttl if ttl is None else min(ttl, rule_ttl)
+    return self.ttl if ttl is None else ttl
+
+  def __lookup(self, key, now):
+    entry = self.__entries.get(key)
+    if entry is None:
+      return None
+    if entry.expires <= now:
+      del self.__entries[key]
+      return None
+    self.__entries.move_to_end(key)
+    self.hits += 1
+    return entry
+
+  def __store(self, key, start, end, value, generation):
+    ttl = self.__ttl(key[2], start, end)
+    if ttl <= 0 or generation != self.__generation:
+      return
+    self.__entries[key] = _Entry(time.monotonic() + ttl, start, end, value)
+    self.__entries.move_to_end(key)
+    while len(self.__entries) > self.max_entries:
+      self.__entries.popitem(last=False)
+      self.evictions += 1
+
+  def get(self, key: tuple, start: int, end: int, load: Callable):
+    """读取缓存，未命中时调用 load，同时进行的相同读取等待同一次 load
+
+    Args:
+        key (tuple): (设备, unit_id, 功能码, 起始地址, 数量, ...)
+        start (int): 覆盖的起始地址
+        end (int): 覆盖的结束地址（不含）
+        load (Callable): 读取设备的函数
+    """
+    with self.__lock:
+      entry = self.__lookup(key, time.monotonic())
+      if entry is not None:
+        return _copy(entry.value)
+      future = self.__inflight.get(key)
+      owner = future is None
+      if owner:
+        future = self.__inflight[key] = Future()
+        generation = self.__generation
+        self.misses += 1
+      else:
+        self.coalesced += 1
+    if not owner:
+      return _copy(future.result())
+
+    try:
+      value = load()
+    except Exception as e:
+      with self.__lock:
+        self.__inflight.pop(key, None)
+      future.set_exception(e)
+      raise e
+    with self.__lock:
+      self.__inflight.pop(key, None)
+      self.__store(key, start, end, value, generation)
+    future.set_result(value)
+    return _copy(value)
+
+  async def get_async(self, key: tuple, start: int, end: int, load: Callable[[], Awaitable]):
+    """同 get，load 为协程函数"""
+    # 同步客户端不需要 asyncio，导入较慢，在这里按需导入
+    import asyncio
+
+    with self.__lock:
+      entry = self.__lookup(key, time.monotonic())
+      if entry is not None:
+        return _copy(entry.value)
+      future = self.__inflight_async.get(key)
+      owner = future is None
+      if owner:
+        future = self.__inflight_async[key] = asyncio.get_running_loop().create_future()
+        generation = self.__generation
+        self.misses += 1
+      else:
+        self.coalesced += 1
+    if not owner:
+      # shield：等待方被取消时不影响发起方
+      return _copy(await asyncio.shield(future))
+
+    try:
+      value = await load()
+    except BaseException as e:
+      with self.__lock:
+        self.__inflight_async.pop(key, None)
+      if isinstance(e, asyncio.CancelledError):
+        future.cancel()
+      else:
+        future.set_exception(e)
+        # 没有等待方时避免 "exception was never retrieved" 警告
+        future.exception()
+      raise e
+    with self.__lock:
+      self.__inflight_async.pop(key, None)
+      self.__store(key, start, end, value, generation)
+    future.set_result(value)
+    return _copy(value)
+
+  def invalidate(self, device: str = None, unit_id: int = None, function_code: int = None, start: int = 0, end=None):
+    """使重叠的缓存失效，参数为 None 时匹配全部
+
+    Args:
+        device (str, optional): 设备名
+        unit_id (int, optional): 设备地址（slave_id）
+        function_code (int, optional): 读功能码
+        start (int, optional): 起始地址。Defaults to 0.
+        end (int, optional): 结束地址（不含），None 表示到最后
+    """
+    with self.__lock:
+      self.__generation += 1
+      for key in [
+        key
+        for key, entry in self.__entries.items()
+        if (device is None or key[0] == device)
+        and (unit_id is None or key[1] == unit_id)
+        and (function_code is None or key[2] == function_code)
+        and entry.end > start
+        and (end is None or entry.start < end)
+      ]:
+        del self.__entries[key]
+
+  def clear(self):
+    self.invalidate()
+
+  def stats(self) -> dict:
+    return {
+      "entries": len(self.__entries),
+      "hits": self.hits,
+      "misses": self.misses,
+      "coalesced": self.coalesced,
+      "evictions": self.evictions,
+    }
@@ -0,0 +1,166 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 15:52:40
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 15:52:40
+# @ Description: 变化上报（report by exception）
+"""
+
+import asyncio
+import inspect
+
+from ModbusTcp.Codec import get_codec
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.Planner import MAX_READ_COILS, MAX_READ_REGISTERS, split_range
+
+
+class ChangeDetector:
+  def __init__(self, client, deadband: float = 0.0, percent: bool = False, deadbands: dict = None):
+    """在读接口之上只返回发生变化的值
+
+    先比较整帧原始字节，未变化的帧不做解码；帧内再逐个比较每个值的原始字节，只解码变化的值，
+    数值类型按死区判断是否上报。读方法与客户端一致，超过 125 个寄存器或 2000 个线圈时拆分为多帧读取。
+
+    Args:
+        client: ModbusTcpClient 或 AsyncModbusTcpClient
+        deadband (float, optional): 死区，变化量不超过死区时不上报。Defaults to 0.0.
+        percent (bool, optional): 死区按上次上报值的百分比计算。Defaults to False.
+        deadbands (dict, optional): {地址: 死区}，覆盖指定地址的死区。Defaults to None.
+    """
+    self.__client = client
+    self.__deadband = deadband
+    self.__percent = percent
+    self.__deadbands = deadbands or {}
+    # (unit_id, 功能码, 起始地址, 数量) -> 上次读到的原始字节
+    self.__last_raw: dict[tuple, bytes] = {}
+    # (unit_id, 功能码, 地址) -> 上次上报的值
+    self.__reported: dict[tuple, object] = {}
+
+  def __exceeds(self, address, old, new) -> bool:
+    deadband = self.__deadbands.get(address, self.__deadband)
+    if not deadband:
+      return old != new
+    if self.__percent:
+      return abs(new - old) > abs(old) * deadband / 100 if old else new != old
+    return abs(new - old) > deadband
+
+  def feed(self, start_address, payload, unit_id=1, function_code=3, data_format: DataFormat = None) -> dict:
+    """比较一帧原始数据，返回发生变化的值
+
+    Args:
+        start_address : 起始地址
+        payload (bytes): 响应中的数据部分
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        function_code (int, optional): 读功能码 1/2/3/4 = 3
+        data_format (DataFormat, optional): 数据格式，默认使用客户端的数据格式
+
+    Returns:
+        dict: {地址: 新值}
+    """
+    payload = bytes(payload)
+    key = (unit_id, function_code, start_address, len(payload))
+    last = self.__last_raw.get(key)
+    if last == payload:
+      return {}
+    self.__last_raw[key] = payload
+    if function_code <= 2:
+      return self.__feed_bits(start_address, payload, last, unit_id, function_code)
+
+    codec = get_codec(data_format or self.__client.data_format, 1)
+    size = codec.byte_count
+    changes = {}
+    for offset in range(0, len(payload) - size + 1, size):
+      raw = payload[offset : offset + size]
+      if last is not None and last[offset : offset + size] == raw:
+        continue
+      address = start_address + offset // 2
+      value = codec.decode(raw)[0]
+      reported_key = (unit_id, function_code, address)
+      if reported_key in self.__reported and not self.__exceeds(address, self.__reported[reported_key], value):
+        continue
+      self.__reported[reported_key] = value
+      changes[address] = value
+    return changes
+
+  def __feed_bits(self, start_address, payload, last, unit_id, function_code) -> dict:
+    changes = {}
+    for index, byte in enumerate(payload):
+      diff = 0xFF if last is None else byte ^ last[index]
+      bit = 0
+      while diff:
+        if diff & 1:
+          address = start_address + index * 8 + bit
+          value = (byte >> bit) & 1
+          if self.__reported.get((unit_id, function_code, address)) != value:
+            self.__reported[(unit_id, function_code, address)] = value
+            changes[address] = value
+        diff >>= 1
+        bit += 1
+    return changes
+
+  def __read(self, start_address, quantity, unit_id, function_code):
+    """与客户端的读方法一样，超过单帧上限时拆分为多帧读取，各帧按各自的起始地址比较"""
+    if function_code <= 2:
+      frames = [(address, count, count) for address, count in split_range(start_address, quantity, 1, MAX_READ_COILS)]
+    else:
+      words = get_codec(self.__client.data_format, 1).registers
+      frames = [
+        (address, count * words, count)
+        for address, count in split_range(start_address, quantity, words, MAX_READ_REGISTERS)
+      ]
+    raws = [self.__client.read_raw(address, count, unit_id, function_code) for address, count, _ in frames]
+    if raws and inspect.isawaitable(raws[0]):
+      return self.__read_async(raws, frames, unit_id, function_code)
+    return self.__collect(raws, frames, unit_id, function_code)
+
+  async def __read_async(self, raws, frames, unit_id, function_code):
+    return self.__collect(await asyncio.gather(*raws), frames, unit_id, function_code)
+
+  def __collect(self, raws, frames, unit_id, function_code) -> dict:
+    changes = {}
+    for raw, (address, _, quantity) in zip(raws, frames, strict=True):
+      changes.update(self.__trim(self.feed(address, raw, unit_id, function_code), address, function_code, quantity))
+    return changes
+
+  def __trim(self, changes, start_address, function_code, quantity):
+    # 线圈按字节返回，去掉最后一个字节中超出请求数量的位
+    if function_code <= 2:
+      return {address: value for address, value in changes.items() if address < start_address + quantity}
+    return changes
+
+  def read_holding_registers(self, start_address, quantity: int, unit_id=1) -> dict:
+    """读保持寄存器，只返回变化的值；使用异步客户端时返回协程
+
+    Returns:
+        dict: {地址: 新值}
+    """
+    return self.__read(start_address, quantity, unit_id, 3)
+
+  def read_input_registers(self, start_address, quantity: int, unit_id=1) -> dict:
+    """读输入寄存器，只返回变化的值；使用异步客户端时返回协程
+
+    Returns:
+        dict: {地址: 新值}
+    """
+    return self.__read(start_address, quantity, unit_id, 4)
+
+  def read_coils(self, start_address, quantity: int, unit_id=1) -> dict:
+    """读线圈，只返回变化的值；使用异步客户端时返回协程
+
+    Returns:
+        dict: {地址: 新值}
+    """
+    return self.__read(start_address, quantity, unit_id, 1)
+
+  def read_input_coils(self, start_address, quantity: int, unit_id=1) -> dict:
+    """读离散输入，只返回变化的值；使用异步客户端时返回协程
+
+    Returns:
+        dict: {地址: 新值}
+    """
+    return self.__read(start_address, quantity, unit_id, 2)
+
+  def reset(self):
+    """清空历史，下次读取时全部上报"""
+    self.__last_raw.clear()
+    self.__reported.clear()
@@ -0,0 +1,200 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 13:02:47
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 13:02:47
+# @ Description: 寄存器数据编解码
+"""
+
+import struct
+import sys
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, NamedTuple
+
+from ModbusTcp.DataFormat import DataFormat
+
+
+def load_numpy():
+  """按需导入 numpy：numpy 为可选依赖，仅数组解码需要，导入较慢，不在导入本模块时进行"""
+  try:
+    import numpy
+  except ImportError:
+    raise ImportError("numpy is required for array decoding, install it with `pip install numpy`") from None
+  return numpy
+
+
+def swap_bytes(datas) -> bytes:
+  """交换每个寄存器（16 位）内的高低字节"""
+  data = bytearray(datas)
+  data[0::2], data[1::2] = data[1::2], data[0::2]
+  return bytes(data)
+
+
+def no_swap(datas) -> bytes:
+  return datas
+
+
+class FormatSpec(NamedTuple):
+  # struct 字节序
+  order: str
+  # struct 格式字符
+  char: str
+  # 每个值占用的寄存器数
+  words: int
+  # 寄存器内字节交换策略
+  swap: Callable
+
+
+def _build_spec(data_format: DataFormat) -> FormatSpec:
+  name = data_format.name
+  order = "<" if "LITTLE" in name else ">"
+  swap = swap_bytes if "BYTE_SWAP" in name else no_swap
+  if name.startswith("FLOAT"):
+    return FormatSpec(order, "f", 2, swap)
+  if name.startswith("DOUBLE"):
+    return FormatSpec(order, "d", 4, swap)
+  char, words = {"16": ("h", 1), "32": ("i", 2), "64": ("q", 4)}[name.split("_")[1]]
+  return FormatSpec(order, char.upper() if name.startswith("UNSIGNED") else char, words, swap)
+
+
+# 每种数据格式的解析结果在导入时计算一次
+FORMAT_SPECS: dict[DataFormat, FormatSpec] = {data_format: _build_spec(data_format) for data_format in DataFormat}
+
+
+class RegisterCodec:
+  """某种数据格式、固定数量的值与寄存器字节之间的转换"""
+
+  __slots__ = ("data_format", "quantity", "registers", "byte_count", "struct", "swap")
+
+  def __init__(self, data_format: DataFormat, quantity: int):
+    spec = FORMAT_SPECS[data_format]
+    self.data_format = data_format
+    self.quantity = quantity
+    self.registers = quantity * spec.words
+    self.byte_count = self.registers * 2
+    self.struct = struct.Struct(f"{spec.order}{quantity}{spec.char}")
+    self.swap = spec.swap
+
+  def encode(self, values) -> bytes:
+    return self.swap(self.struct.pack(*values))
+
+  def decode(self, data) -> tuple:
+    return self.struct.unpack(self.swap(data))
+
+  def decode_array(self, data):
+    if len(data) != self.byte_count:
+      raise ValueError(f"Expected {self.byte_count} bytes, got {len(data)}")
+    return decode_array(self.data_format, data)
+
+
+@lru_cache(maxsize=512)
+def get_codec(data_format: DataFormat, quantity: int) -> RegisterCodec:
+  """获取（并缓存）数据格式与数量对应的编解码器
+
+  Args:
+      data_format (DataFormat): 数据格式
+      quantity (int): 值的数量
+
+  Returns:
+      RegisterCodec: 编解码器
+  """
+  return RegisterCodec(data_format, quantity)
+
+
+_NUMPY_TYPES = {"h": "i2", "H": "u2", "i": "i4", "I": "u4", "q": "i8", "Q": "u8", "f": "f4", "d": "f8"}
+
+
+@lru_cache(maxsize=None)
+def numpy_dtype(data_format: DataFormat):
+  """数据格式对应的 numpy dtype（带字节序）"""
+  spec = FORMAT_SPECS[data_format]
+  return load_numpy().dtype(spec.order + _NUMPY_TYPES[spec.char])
+
+
+def decode_array(data_format: DataFormat, data):
+  """将寄存器字节解码为 numpy 数组
+
+  不需要字节交换的格式直接在原缓冲区上建立视图（零拷贝），
+  需要字节交换的格式先按 16 位字整体交换一次，再以目标 dtype 查看。
+
+  Args:
+      data_format (DataFormat): 数据格式
+      data (bytes | bytearray | memoryview): 寄存器字节
+
+  Returns:
+      numpy.ndarray: 解码结果
+  """
+  dtype = numpy_dtype(data_format)
+  np = load_numpy()
+  if FORMAT_SPECS[data_format].swap is no_swap:
+    return np.frombuffer(data, dtype=dtype)
+  return np.frombuffer(data, dtype=">u2").astype("<u2").view(dtype)
+
+
+def decode_frames(data_format: DataFormat, frames):
+  """将多帧寄存器字节拼接后一次性解码为一个数组
+
+  Args:
+      data_format (DataFormat): 数据格式
+      frames (Iterable[bytes]): 各帧的寄存器字节
+
+  Returns:
+      numpy.ndarray: 按帧顺序拼接的解码结果
+  """
+  return decode_array(data_format, b"".join(frames))
+
+
+# 每个字节对应的 8 个位（低位在前，与线圈的排列顺序一致）
+BYTE_TO_BITS = tuple(tuple((byte >> bit) & 1 for bit in range(8)) for byte in range(256))
+BITS_TO_BYTE = {bits: byte for byte, bits in enumerate(BYTE_TO_BITS)}
+_PADDING = (0,) * 8
+
+
+def unpack_bits(data, quantity: int) -> list:
+  """将线圈（离散输入）的字节解包为 0/1 列表
+
+  Args:
+      data (bytes | memoryview): 响应中的线圈字节
+      quantity (int): 线圈数量
+
+  Returns:
+      list: 长度为 quantity 的 0/1 列表
+  """
+  count = (quantity + 7) // 8
+  if len(data) < count:
+    raise ValueError(f"Expected {count} bytes for {quantity} coils, got {len(data)}")
+  bits = list(chain.from_iterable(map(BYTE_TO_BITS.__getitem__, data[:count])))
+  del bits[quantity:]
+  return bits
+
+
+def copy_bits(data, quantity: int) -> bytes:
+  """拷贝出 quantity 个线圈对应的打包字节"""
+  return bytes(data[: (quantity + 7) // 8])
+
+
+def unpack_bits_array(data, quantity: int):
+  """将线圈字节解包为 numpy uint8 数组"""
+  np = load_numpy()
+  return np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=quantity, bitorder="little")
+
+
+def pack_bits(values) -> bytes:
+  """将线圈值打包为字节，低位在前，不足 8 位的部分补 0
+
+  Args:
+      values (Sequence | numpy.ndarray): 线圈值，按真值判断
+
+  Returns:
+      bytes: 打包后的字节
+  """
+  # 没有导入过 numpy 时 values 不可能是数组，不必为此导入
+  np = sys.modules.get("numpy")
+  if np is not None and isinstance(values, np.ndarray):
+    return np.packbits(values.astype(bool), bitorder="little").tobytes()
+  res = bytearray()
+  for i in range(0, len(values), 8):
+    bits = tuple(map(bool, values[i : i + 8]))
+    res.append(BITS_TO_BYTE[bits + _PADDING[len(bits) :]])
+  return bytes(res)
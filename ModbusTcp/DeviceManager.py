@@ -0,0 +1,180 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 16:40:18
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 16:40:18
+# @ Description: 多设备管理
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, NamedTuple
+
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.Metrics import Metrics
+from ModbusTcp.ModbusAsyncio import AsyncModbusTcpClient
+from ModbusTcp.ulitis import LOGGER
+
+
+class Device(NamedTuple):
+  name: str
+  host: str
+  port: int
+  unit_id: int
+  client: AsyncModbusTcpClient
+
+
+class DeviceResult(NamedTuple):
+  # 设备名
+  device: str
+  # 调用结果，出错时为 None
+  value: Any
+  # 调用异常
+  error: Exception | None
+
+
+class DeviceManager:
+  def __init__(
+    self,
+    connections: int = 1,
+    pipeline: int = 0,
+    timeout: float = 10,
+    max_concurrency: int = None,
+    metrics: Metrics = None,
+  ):
+    """在同一个事件循环上管理多个设备
+
+    同一 host:port（例如带多个 unit_id 的网关）且数据格式相同的设备共用一个客户端及其连接。
+
+    Args:
+        connections (int, optional): 每个 host:port 的默认连接数。Defaults to 1.
+        pipeline (int, optional): 每个连接的默认流水线深度，见 AsyncModbusTcpClient。Defaults to 0.
+        timeout (float, optional): 单次请求超时时间（秒）。Defaults to 10.
+        max_concurrency (int, optional): 批量调用时全局同时进行的请求数上限。Defaults to None.
+        metrics (Metrics, optional): 所有设备共用的请求耗时统计，按 host:port 和 unit_id 区分。Defaults to None.
+    """
+    self.devices: dict[str, Device] = {}
+    self.__clients: dict[tuple, AsyncModbusTcpClient] = {}
+    # 各客户端的 (连接数, 流水线深度)
+    self.__settings: dict[tuple, tuple] = {}
+    self.__connections = connections
+    self.__pipeline = pipeline
+    self.__timeout = timeout
+    self.__limit = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    self.__metrics = metrics
+
+  async def __aenter__(self):
+    await self.connect()
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    await self.disconnect()
+    return False
+
+  def __getitem__(self, name: str) -> AsyncModbusTcpClient:
+    return self.devices[name].client
+
+  def add_device(
+    self,
+    name: str,
+    host: str,
+    port: int = 502,
+    unit_id: int = 1,
+    data_format: DataFormat = DataFormat.SIGNED_16_INT_BIG,
+    connections: int = None,
+    pipeline: int = None,
+  ) -> AsyncModbusTcpClient:
+    """添加设备
+
+    Args:
+        name (str): 设备名
+        host (str): 服务器地址
+        port (int, optional): 服务器端口号。Defaults to 502.
+        unit_id (int, optional): 设备地址（slave_id）。Defaults to 1.
+        data_format (DataFormat, optional): 数据格式。Defaults to DataFormat.SIGNED_16_INT_BIG.
+        connections (int, optional): 该 host:port 的连接数，默认使用管理器的设置
+        pipeline (int, optional): 该 host:port 的流水线深度，默认使用管理器的设置
+
+    Returns:
+        AsyncModbusTcpClient: 设备使用的客户端
+
+    Raises:
+        ValueError: 设备名重复，或与共用同一客户端的设备指定了不同的 connections / pipeline
+    """
+    if name in self.devices:
+      raise ValueError(f"Device {name} already exists")
+    key = (host, port, data_format)
+    client = self.__clients.get(key)
+    if client is None:
+      sockts = connections or self.__connections
+      pipeline = self.__pipeline if pipeline is None else pipeline
+      client = AsyncModbusTcpClient(
+        host,
+        port,
+        data_format,
+        sockts=sockts,
+        pipeline=pipeline,
+        timeout=self.__timeout,
+        metrics=self.__metrics,
+      )
+      self.__clients[key] = client
+      self.__settings[key] = (sockts, pipeline)
+    else:
+      sockts, depth = self.__settings[key]
+      if (connections is not None and connections != sockts) or (pipeline is not None and pipeline != depth):
+        raise ValueError(
+          f"Device {name} shares the client of {host}:{port} created with connections={sockts}, pipeline={depth}"
+        )
+    self.devices[name] = Device(name, host, port, unit_id, client)
+    return client
+
+  async def connect(self):
+    """并发连接所有设备，连接失败的设备在第一次请求时重试"""
+    keys = list(self.__clients)
+    results = await asyncio.gather(*[self.__clients[key].connect() for key in keys], return_exceptions=True)
+    for (host, port, _), result in zip(keys, results, strict=True):
+      if isinstance(result, Exception):
+        LOGGER.error(f"Connect to {host}:{port} failed: {result}")
+
+  async def disconnect(self):
+    await asyncio.gather(*[client.disconnect() for client in self.__clients.values()], return_exceptions=True)
+
+  async def __call(self, device: Device, method: str, args, kwargs) -> DeviceResult:
+    kwargs.setdefault("unit_id", device.unit_id)
+    try:
+      if self.__limit is None:
+        value = await getattr(device.client, method)(*args, **kwargs)
+      else:
+        async with self.__limit:
+          value = await getattr(device.client, method)(*args, **kwargs)
+    except Exception as e:
+      return DeviceResult(device.name, None, e)
+    return DeviceResult(device.name, value, None)
+
+  async def fan_out(self, method: str, *args, devices: list = None, **kwargs) -> AsyncIterator[DeviceResult]:
+    """在多个设备上调用同一个客户端方法，按完成顺序返回结果
+
+    Args:
+        method (str): 客户端方法名，例如 "read_holding_registers"
+        devices (list, optional): 设备名列表，默认所有设备
+
+    Yields:
+        DeviceResult: 每个设备的结果
+
+    Example:
+        >>> async for result in manager.fan_out(
+        ...   "read_holding_registers", 0, 10
+        ... ):
+        ...   print(result.device, result.value)
+    """
+    names = self.devices if devices is None else devices
+    tasks = [asyncio.ensure_future(self.__call(self.devices[name], method, args, dict(kwargs))) for name in names]
+    try:
+      for task in asyncio.as_completed(tasks):
+        yield await task
+    finally:
+      for task in tasks:
+        task.cancel()
+
+  async def gather(self, method: str, *args, devices: list = None, **kwargs) -> dict[str, DeviceResult]:
+    """同 fan_out，等待全部完成后返回 {设备名: DeviceResult}"""
+    return {result.device: result async for result in self.fan_out(method, *args, devices=devices, **kwargs)}
@@ -94,6 +94,34 @@ class GatewayTargetDeviceFailedToRespond(ModbusException):
     super().__init__(ModbusError.GATEWAY_TARGET_DEVICE_FAILED_TO_RESPOND, "Gateway target device failed to respond")
 
 
+def raise_modbus_exception(exception_code: int, func: str = "") -> None:
+  """根据响应中的异常码抛出对应的异常
+
+  Args:
+      exception_code (int): 响应 PDU 中的异常码
+      func (str, optional): 触发异常的方法名
+  """
+  match exception_code:
+    case 1:
+      raise IllegalFunction(func)
+    case 2:
+      raise IllegalDataAddress()
+    case 3:
+      raise IllegalDataValue()
+    case 4:
+      raise SlaveDeviceFailure()
+    case 5:
+      raise Acknowledge(func)
+    case 6:
+      raise SlaveDeviceBusy()
+    case 8:
+      raise MemoryParityError()
+    case 10:
+      raise GatewayPathUnavailable()
+    case 11:
+      raise GatewayTargetDeviceFailedToRespond()
+
+
 # 示例使用
 if __name__ == "__main__":
   try:
@@ -0,0 +1,312 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 21:48:10
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 21:48:10
+# @ Description: 帧格式：MBAP、RTU（透明串口网关、串口）
+"""
+
+import socket
+import struct
+import time
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from ModbusTcp import Exceptions
+from ModbusTcp.Codec import get_codec
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.ulitis import LOGGER, MAX_ADU_SIZE, recv_exactly
+
+if TYPE_CHECKING:
+  # 同步客户端不需要 asyncio，只在类型检查时导入
+  import asyncio
+
+# RTU 帧最大长度：1 字节地址 + 253 字节 PDU + 2 字节 CRC
+MAX_RTU_SIZE = 256
+
+
+def _crc16_table() -> tuple:
+  table = []
+  for byte in range(256):
+    crc = byte
+    for _ in range(8):
+      crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    table.append(crc)
+  return tuple(table)
+
+
+CRC16_TABLE = _crc16_table()
+
+
+def crc16(data) -> int:
+  """Modbus RTU 的 CRC16（多项式 0xA001，初值 0xFFFF），查表计算，帧中低字节在前"""
+  crc = 0xFFFF
+  table = CRC16_TABLE
+  for byte in data:
+    crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+  return crc
+
+
+class Framer:
+  """帧格式基类：组帧、按长度字段识别帧边界、校验响应
+
+  按 head_size 先读取帧头，再由 frame_length 得到整帧长度，同步（socket）和异步（StreamReader）共用。
+  """
+
+  name = ""
+  # 帧中有事务号，同一连接上可以同时有多个未完成的请求
+  pipelined = False
+  # 请求帧中设备地址和 PDU 的偏移
+  unit_offset = 0
+  pdu_offset = 0
+  # 计算响应长度需要先读取的字节数
+  head_size = 0
+
+  def build(self, transaction_id: int, unit_id: int, pdu: bytes) -> bytes:
+    raise NotImplementedError
+
+  def frame_length(self, head) -> int:
+    """由响应的前 head_size 个字节计算整帧长度"""
+    raise NotImplementedError
+
+  def decode(self, request: bytes, frame) -> memoryview:
+    """校验响应与请求是否对应，返回响应的 PDU
+
+    Raises:
+        ConnectionError: 事务号、设备地址或 CRC 不符，连接上的数据已不可信
+    """
+    raise NotImplementedError
+
+  async def read_request(self, reader: "asyncio.StreamReader") -> bytes:
+    """服务端读取一帧请求"""
+    raise NotImplementedError
+
+  def parse_request(self, frame: bytes) -> tuple:
+    """服务端解析请求，返回 (事务号, 设备地址, PDU)"""
+    raise NotImplementedError
+
+  def recv_frame(self, sock: socket.socket, view: memoryview) -> memoryview:
+    """读取一帧完整的响应到 view
+
+    Returns:
+        memoryview: 指向 view 的视图，仅在连接归还之前有效
+    """
+    recv_exactly(sock, view[: self.head_size])
+    length = self.frame_length(view[: self.head_size])
+    recv_exactly(sock, view[self.head_size : length])
+    return view[:length]
+
+  async def read_frame(self, reader: "asyncio.StreamReader") -> bytes:
+    head = await reader.readexactly(self.head_size)
+    return head + await reader.readexactly(self.frame_length(head) - self.head_size)
+
+  def __repr__(self):
+    return f"{type(self).__name__}()"
+
+
+class MbapFramer(Framer):
+  """Modbus TCP 的 MBAP 帧：事务号 + 协议号 + 长度 + 设备地址 + PDU"""
+
+  name = "mbap"
+  pipelined = True
+  unit_offset = 6
+  pdu_offset = 7
+  head_size = 7
+
+  def build(self, transaction_id, unit_id, pdu):
+    return struct.pack(">HHHB", transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+
+  def frame_length(self, head):
+    length = (head[4] << 8) | head[5]
+    if not 2 <= length <= MAX_ADU_SIZE - 6:
+      raise ConnectionError(f"Invalid MBAP length {length}")
+    return 6 + length
+
+  def decode(self, request, frame):
+    if frame[0:2] != request[0:2]:
+      raise ConnectionError("Transaction id mismatch")
+    return frame[7:]
+
+  async def read_request(self, reader):
+    return await self.read_frame(reader)
+
+  def parse_request(self, frame):
+    transaction_id, _, _, unit_id = struct.unpack_from(">HHHB", frame)
+    return transaction_id, unit_id, frame[7:]
+
+
+class RtuFramer(Framer):
+  """RTU 帧：设备地址 + PDU + CRC16，没有长度字段和事务号，按功能码推算长度
+
+  用于透明串口网关（RTU over TCP）和串口；同一连接上同一时间只能有一个请求。
+  """
+
+  name = "rtu"
+  unit_offset = 0
+  pdu_offset = 1
+  # 设备地址 + 功能码 + 字节数（异常响应为异常码）
+  head_size = 3
+
+  def build(self, transaction_id, unit_id, pdu):
+    frame = bytes((unit_id,)) + pdu
+    return frame + crc16(frame).to_bytes(2, "little")
+
+  def frame_length(self, head):
+    function_code = head[1]
+    if function_code & 0x80:
+      length = 5
+    elif function_code in (1, 2, 3, 4, 23):
+      length = 5 + head[2]
+    elif function_code in (5, 6, 15, 16):
+      length = 8
+    elif function_code == 22:
+      length = 10
+    else:
+      raise ConnectionError(f"Cannot frame RTU response of function code {function_code}")
+    if length > MAX_RTU_SIZE:
+      raise ConnectionError(f"Invalid RTU length {length}")
+    return length
+
+  def decode(self, request, frame):
+    if crc16(frame[:-2]) != frame[-2] | (frame[-1] << 8):
+      raise ConnectionError("RTU CRC mismatch")
+    if frame[0] != request[0] or frame[1] & 0x7F != request[1]:
+      raise ConnectionError(f"Unexpected RTU response from unit {frame[0]} function code {frame[1]}")
+    return frame[1:-2]
+
+  async def read_request(self, reader):
+    frame = await reader.readexactly(2)
+    function_code = frame[1]
+    if function_code in (1, 2, 3, 4, 5, 6):
+      return frame + await reader.readexactly(6)
+    if function_code in (15, 16):
+      frame += await reader.readexactly(5)
+      return frame + await reader.readexactly(frame[6] + 2)
+    if function_code == 22:
+      return frame + await reader.readexactly(8)
+    if function_code == 23:
+      frame += await reader.readexactly(9)
+      return frame + await reader.readexactly(frame[10] + 2)
+    # 长度未知，无法继续分帧
+    raise ConnectionError(f"Cannot frame RTU request of function code {function_code}")
+
+  def parse_request(self, frame):
+    if crc16(frame[:-2]) != frame[-2] | (frame[-1] << 8):
+      raise ConnectionError("RTU CRC mismatch")
+    return 0, frame[0], frame[1:-2]
+
+
+FRAMERS = {MbapFramer.name: MbapFramer, RtuFramer.name: RtuFramer}
+
+
+def get_framer(framer) -> Framer:
+  """按名称（"mbap" / "rtu"）或实例取得帧格式"""
+  if isinstance(framer, Framer):
+    return framer
+  try:
+    return FRAMERS[framer]()
+  except KeyError:
+    raise ValueError(f"Unknown framer {framer!r}, expected one of {sorted(FRAMERS)}") from None
+
+
+def inter_frame_delay(baudrate: int, bits_per_char: int = 11) -> float:
+  """RTU 帧间隔 t3.5（秒）：3.5 个字符时间，波特率高于 19200 时固定为 1.75ms"""
+  if baudrate > 19200:
+    return 0.00175
+  return 3.5 * bits_per_char / baudrate
+
+
+class SerialTransport:
+  def __init__(self, port: str, baudrate: int = 9600, data_format: DataFormat = DataFormat.SIGNED_16_INT_BIG, **kwargs):
+    """RTU 串口主站：一条串口线上同一时间只有一个请求，请求之间保持 t3.5 的静默间隔
+
+    Args:
+        port (str): 串口，例如 "/dev/ttyUSB0"、"COM3"
+        baudrate (int, optional): 波特率。Defaults to 9600.
+        data_format (DataFormat, optional): 数据格式。Defaults to DataFormat.SIGNED_16_INT_BIG.
+        timeout (float, optional): 等待响应的超时时间（秒）。Defaults to 1.
+        parity (str, optional): 校验位 "N" / "E" / "O"。Defaults to "N".
+        stopbits (int, optional): 停止位。Defaults to 1.
+        bytesize (int, optional): 数据位。Defaults to 8.
+    """
+    try:
+      # pyserial 为可选依赖，仅串口需要
+      import serial
+    except ImportError:
+      raise ImportError("pyserial is required for serial ports, install it with `pip install pyserial`") from None
+    self.data_format = data_format
+    self.timeout = kwargs.get("timeout", 1)
+    parity = kwargs.get("parity", "N")
+    stopbits = kwargs.get("stopbits", 1)
+    # 起始位 + 数据位 + 校验位 + 停止位
+    bits_per_char = 1 + kwargs.get("bytesize", 8) + (parity != "N") + stopbits
+    self.delay = inter_frame_delay(baudrate, bits_per_char)
+    self.framer = RtuFramer()
+    self.port = serial.Serial(
+      port,
+      baudrate,
+      bytesize=kwargs.get("bytesize", 8),
+      parity=parity,
+      stopbits=stopbits,
+      timeout=self.timeout,
+    )
+    self.__lock = Lock()
+    self.__last_frame = 0.0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def __read(self, size: int) -> bytes:
+    data = self.port.read(size)
+    if len(data) < size:
+      raise TimeoutError(f"RTU response timed out after {self.timeout}s")
+    return data
+
+  def execute(self, unit_id: int, pdu: bytes, func: str = "execute") -> bytes:
+    """发送一个请求 PDU 并返回响应 PDU，设备地址为 0（广播）时不等待响应
+
+    Raises:
+        ModbusException: 设备返回异常响应
+    """
+    request = self.framer.build(0, unit_id, pdu)
+    with self.__lock:
+      silence = self.__last_frame + self.delay - time.perf_counter()
+      if silence > 0:
+        time.sleep(silence)
+      # 丢弃上一个请求超时后迟到的数据
+      self.port.reset_input_buffer()
+      try:
+        self.port.write(request)
+        self.port.flush()
+        if unit_id == 0:
+          return b""
+        head = self.__read(self.framer.head_size)
+        frame = head + self.__read(self.framer.frame_length(head) - len(head))
+      finally:
+        self.__last_frame = time.perf_counter()
+    response = self.framer.decode(request, frame)
+    if response[0] & 0x80:
+      LOGGER.debug(f"exception_code = {response[1]}")
+      Exceptions.raise_modbus_exception(response[1], func)
+    return bytes(response)
+
+  def read_registers(self, start_address, quantity: int, unit_id=1, function_code=3) -> tuple:
+    """读保持寄存器（功能码 3）或输入寄存器（功能码 4），按数据格式解码"""
+    codec = get_codec(self.data_format, quantity)
+    pdu = struct.pack(">BHH", function_code, start_address, codec.registers)
+    response = self.execute(unit_id, pdu, "read_registers")
+    return codec.decode(response[2:])
+
+  def write_registers(self, start_address, values: list, unit_id=1) -> str:
+    """写多个寄存器（功能码 16），按数据格式编码"""
+    codec = get_codec(self.data_format, len(values))
+    pdu = struct.pack(">BHHB", 16, start_address, codec.registers, codec.byte_count) + codec.encode(values)
+    self.execute(unit_id, pdu, "write_registers")
+    return "write_registers successed"
+
+  def close(self):
+    self.port.close()
@@ -0,0 +1,204 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 18:42:27
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 18:42:27
+# @ Description: 请求耗时统计与指标导出
+"""
+
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable
+
+from ModbusTcp.ulitis import LOGGER
+
+# 延迟直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 请求的各个阶段：线程池排队、获取连接、发送、等待响应、解码
+PHASES = ("queue", "acquire", "send", "wait", "decode")
+
+
+class RequestTiming:
+  """单个请求的各阶段耗时，请求结束后传给各个钩子"""
+
+  __slots__ = ("device", "unit_id", "function_code", "started", "last", "phases", "duration", "error")
+
+  def __init__(self, device: str, unit_id: int, function_code: int, queued: float = 0.0):
+    self.device = device
+    self.unit_id = unit_id
+    self.function_code = function_code
+    self.started = self.last = time.perf_counter()
+    self.phases = {"queue": queued} if queued else {}
+    self.duration = 0.0
+    self.error: Exception = None
+
+  def mark(self, phase: str):
+    """记录从上一个阶段结束到现在的耗时"""
+    now = time.perf_counter()
+    self.phases[phase] = now - self.last
+    self.last = now
+
+
+class Histogram:
+  __slots__ = ("buckets", "counts", "sum", "count")
+
+  def __init__(self, buckets: tuple):
+    self.buckets = buckets
+    # 最后一个桶为 +Inf
+    self.counts = [0] * (len(buckets) + 1)
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value: float):
+    self.counts[bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+
+def _labels(**labels) -> str:
+  items = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+  return f"{{{items}}}"
+
+
+def _escape(value) -> str:
+  return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+  def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+    """客户端请求指标：请求数、按异常码统计的异常数、连接错误、各阶段耗时和按设备、功能码统计的延迟直方图
+
+    传给客户端的 metrics 参数后生效，多个客户端可以共用同一个实例；不传时客户端不做任何统计。
+
+    Args:
+        buckets (tuple, optional): 延迟直方图的桶上限（秒）。Defaults to DEFAULT_BUCKETS.
+    """
+    self.buckets = tuple(sorted(buckets))
+    # (device, unit_id, function_code) -> 请求数
+    self.requests: dict[tuple, int] = {}
+    # (device, unit_id, function_code, ModbusError 名称) -> 异常响应数
+    self.exceptions: dict[tuple, int] = {}
+    # (device, unit_id, function_code, 异常类型) -> 连接、超时等错误数
+    self.errors: dict[tuple, int] = {}
+    # (device, unit_id, function_code) -> 请求总耗时
+    self.latency: dict[tuple, Histogram] = {}
+    # (device, phase) -> 阶段耗时
+    self.phases: dict[tuple, Histogram] = {}
+    self.__hooks: list[Callable[[RequestTiming], None]] = []
+    self.__pools: dict[str, Callable[[], dict]] = {}
+    self.__lock = Lock()
+
+  def add_hook(self, hook: Callable[[RequestTiming], None]):
+    """添加钩子，每个请求结束后以 RequestTiming 调用（在发出请求的线程或事件循环中执行，应尽量轻量）"""
+    self.__hooks.append(hook)
+
+  def remove_hook(self, hook: Callable[[RequestTiming], None]):
+    self.__hooks.remove(hook)
+
+  def add_pool(self, device: str, stats: Callable[[], dict]):
+    """登记连接池，导出时调用 stats 读取重连、连接池耗尽等计数"""
+    self.__pools[device] = stats
+
+  def start(self, device: str, unit_id: int, function_code: int, queued: float = 0.0) -> RequestTiming:
+    return RequestTiming(device, unit_id, function_code, queued)
+
+  def finish(self, timing: RequestTiming, error: Exception = None):
+    """请求结束，更新各项统计并调用钩子"""
+    timing.duration = time.perf_counter() - timing.started + timing.phases.get("queue", 0.0)
+    timing.error = error
+    key = (timing.device, timing.unit_id, timing.function_code)
+    with self.__lock:
+      self.requests[key] = self.requests.get(key, 0) + 1
+      if error is not None:
+        code = getattr(error, "error_code", None)
+        if code is not None:
+          key_error = (*key, code.name)
+          self.exceptions[key_error] = self.exceptions.get(key_error, 0) + 1
+        else:
+          key_error = (*key, type(error).__name__)
+          self.errors[key_error] = self.errors.get(key_error, 0) + 1
+      histogram = self.latency.get(key)
+      if histogram is None:
+        histogram = self.latency[key] = Histogram(self.buckets)
+      histogram.observe(timing.duration)
+      for phase, value in timing.phases.items():
+        histogram = self.phases.get((timing.device, phase))
+        if histogram is None:
+          histogram = self.phases[(timing.device, phase)] = Histogram(self.buckets)
+        histogram.observe(value)
+    for hook in self.__hooks:
+      try:
+        hook(timing)
+      except Exception as e:
+        LOGGER.error(f"Metrics hook {hook!r} failed: {e}")
+
+  def reset(self):
+    with self.__lock:
+      self.requests.clear()
+      self.exceptions.clear()
+      self.errors.clear()
+      self.latency.clear()
+      self.phases.clear()
+
+  def render(self, openmetrics: bool = False) -> str:
+    """导出 Prometheus 文本格式（openmetrics=True 时为 OpenMetrics 格式）的快照"""
+    lines = []
+
+    def family(name, kind, help_text):
+      # OpenMetrics 中计数器的名字不带 _total 后缀
+      family_name = name[: -len("_total")] if openmetrics and kind == "counter" else name
+      lines.append(f"# HELP {family_name} {help_text}")
+      lines.append(f"# TYPE {family_name} {kind}")
+
+    def counter(name, help_text, values, label_names):
+      family(name, "counter", help_text)
+      for key, value in sorted(values.items()):
+        lines.append(f"{name}{_labels(**dict(zip(label_names, key, strict=True)))} {value}")
+
+    def histogram(name, help_text, values, label_names):
+      family(name, "histogram", help_text)
+      for key, hist in sorted(values.items()):
+        labels = dict(zip(label_names, key, strict=True))
+        cumulative = 0
+        for bound, count in zip((*hist.buckets, "+Inf"), hist.counts, strict=True):
+          cumulative += count
+          lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**labels)} {hist.sum}")
+        lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+
+    request_labels = ("device", "unit", "function")
+    with self.__lock:
+      counter("modbus_requests_total", "Modbus requests sent.", self.requests, request_labels)
+      counter(
+        "modbus_exceptions_total", "Modbus exception responses by code.", self.exceptions, (*request_labels, "code")
+      )
+      counter("modbus_errors_total", "Transport errors and timeouts.", self.errors, (*request_labels, "type"))
+      histogram("modbus_request_duration_seconds", "Request latency.", self.latency, request_labels)
+      histogram("modbus_phase_duration_seconds", "Request latency by phase.", self.phases, ("device", "phase"))
+
+    pools = {}
+    for device, stats in list(self.__pools.items()):
+      try:
+        pools[device] = stats()
+      except Exception as e:
+        LOGGER.error(f"Read pool stats of {device} failed: {e}")
+    if pools:
+      for name, field, help_text in (
+        ("modbus_pool_reconnects_total", "reconnects", "Connections re-established."),
+        ("modbus_pool_failures_total", "failures", "Failed connection attempts."),
+        ("modbus_pool_exhausted_total", "exhausted", "Requests that waited for a free connection."),
+      ):
+        counter(name, help_text, {(device,): stats[field] for device, stats in pools.items()}, ("device",))
+      for name, field, help_text in (
+        ("modbus_pool_connections", "size", "Open connections."),
+        ("modbus_pool_in_use", "in_use", "Connections in use."),
+      ):
+        family(name, "gauge", help_text)
+        for device, stats in sorted(pools.items()):
+          lines.append(f"{name}{_labels(device=device)} {stats[field]}")
+
+    if openmetrics:
+      lines.append("# EOF")
+    return "\n".join(lines) + "\n"
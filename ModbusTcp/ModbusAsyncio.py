@@ -0,0 +1,760 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 12:10:21
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 12:10:21
+# @ Description: 基于 asyncio 的 ModbusTcp 客户端
+"""
+
+import asyncio
+import struct
+import time
+from functools import partial
+
+from ModbusTcp import Exceptions
+from ModbusTcp.Cache import RegisterCache
+from ModbusTcp.Codec import copy_bits, get_codec, pack_bits, unpack_bits, unpack_bits_array
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.Framer import Framer, get_framer
+from ModbusTcp.Metrics import Metrics, RequestTiming
+from ModbusTcp.Planner import (
+  MAX_READ_COILS,
+  MAX_READ_REGISTERS,
+  MAX_READ_WRITE_REGISTERS,
+  coalesce,
+  join_chunks,
+  split_range,
+)
+from ModbusTcp.Rtt import RttEstimator
+from ModbusTcp.ulitis import LOGGER
+
+
+class _PipelinedConnection:
+  """流水线连接：同一连接上连续发送多个请求，由读取任务按事务号把响应分发给对应的调用者"""
+
+  def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_pending: int):
+    self.reader = reader
+    self.writer = writer
+    self.pending: dict[int, asyncio.Future] = {}
+    self.slots = asyncio.Semaphore(max_pending)
+    self.closed = False
+    self.reader_task = asyncio.get_running_loop().create_task(self.__read_loop())
+
+  async def request(
+    self,
+    transaction_id: int,
+    frame: bytes,
+    timeout: float,
+    timing: RequestTiming = None,
+    rtt: RttEstimator = None,
+    sent_event: asyncio.Event = None,
+  ) -> bytes:
+    async with self.slots:
+      if timing is not None:
+        timing.mark("acquire")
+      if self.closed:
+        raise ConnectionError("Pipelined connection is closed")
+      future = asyncio.get_running_loop().create_future()
+      self.pending[transaction_id] = future
+      try:
+        sent = time.perf_counter()
+        self.writer.write(frame)
+        await self.writer.drain()
+        if timing is not None:
+          timing.mark("send")
+        if sent_event is not None:
+          sent_event.set()
+        try:
+          response = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+          if rtt is not None:
+            rtt.backoff()
+          raise
+        if rtt is not None:
+          rtt.observe(time.perf_counter() - sent)
+        if timing is not None:
+          timing.mark("wait")
+        return response
+      finally:
+        # 超时后迟到的响应会因为找不到事务号而被丢弃
+        self.pending.pop(transaction_id, None)
+
+  async def __read_loop(self):
+    try:
+      while True:
+        header = await self.reader.readexactly(7)
+        transaction_id, _, length, _ = struct.unpack(">HHHB", header)
+        response = await self.reader.readexactly(length - 1)
+        future = self.pending.get(transaction_id)
+        if future is None or future.done():
+          LOGGER.debug(f"Drop response of unknown transaction {transaction_id}")
+          continue
+        future.set_result(response)
+    except asyncio.CancelledError:
+      self.__fail(ConnectionError("Pipelined connection is closed"))
+    except Exception as e:
+      self.__fail(ConnectionError(f"Pipelined connection lost: {e!r}"))
+
+  def __fail(self, exc: Exception):
+    self.closed = True
+    for future in self.pending.values():
+      if not future.done():
+        future.set_exception(exc)
+
+  async def close(self):
+    self.closed = True
+    self.reader_task.cancel()
+    self.writer.close()
+    try:
+      await self.writer.wait_closed()
+    except Exception:
+      pass
+
+
+class AsyncModbusTcpClient:
+  def __init__(
+    self, host: str = "127.0.0.1", port: int = 502, data_format: DataFormat = DataFormat.SIGNED_16_INT_BIG, **kwargs
+  ):
+    """基于 asyncio 的客户端，读写方法均为协程，不占用线程
+
+    Args:
+        host (str, optional): 服务器地址。Defaults to "127.0.0.1".
+        port (int, optional): 服务器端口号。Defaults to 502.
+        data_format (DataFormat, optional): 数据格式。Defaults to DataFormat.SIGNED_16_INT_BIG.
+        sockts (int, optional): 连接数量。Defaults to 10.
+        timeout (float, optional): 单次请求超时时间（秒）。Defaults to 10.
+        pipeline (int, optional): 每个连接允许同时未完成的事务数，大于 1 时启用流水线模式。Defaults to 0.
+        numpy (bool, optional): 读寄存器时返回 numpy 数组。Defaults to False.
+        metrics (Metrics, optional): 请求耗时统计，None 时不做统计。Defaults to None.
+        cache (RegisterCache, optional): 读缓存，None 时不缓存。Defaults to None.
+        adaptive_timeout (bool, optional): 按设备的往返时间估计每个请求的超时时间，timeout 作为上限。Defaults to False.
+        min_timeout (float, optional): 自适应超时的下限（秒）。Defaults to 0.2.
+        hedge (float, optional): 读请求等待超过往返时间的该分位数（例如 0.95）时，在另一个连接上重发，先到的响应有效。Defaults to None.
+        device (str, optional): 统计中使用的设备名。Defaults to "host:port".
+        framer (str | Framer, optional): 帧格式，"mbap" 或 "rtu"（透明串口网关的 RTU over TCP，不支持流水线）。Defaults to "mbap".
+        lazy (bool, optional): connect 时不建立连接，第一次请求时才建立，按并发需要增加到 sockts 个。Defaults to False.
+    """
+    self.__host = host
+    self.__port = port
+    self.__transaction_id = 0
+    self.__is_connected = False
+    self.__data_format = data_format
+    self.__max_connections = kwargs.get("sockts", 10)
+    self.__timeout = kwargs.get("timeout", 10)
+    self.__pipeline = kwargs.get("pipeline", 0)
+    self.__framer: Framer = get_framer(kwargs.get("framer", "mbap"))
+    if self.__pipeline > 1 and not self.__framer.pipelined:
+      raise ValueError(f"Framer {self.__framer.name} has no transaction id and cannot be pipelined")
+    self.__numpy = kwargs.get("numpy", False)
+    self.__lazy = kwargs.get("lazy", False)
+    self.__connections: asyncio.Queue = None
+    self.__pipelines: list[_PipelinedConnection] = []
+    self.__next_pipeline = 0
+    # lazy 时连接池中尚未建立的连接数
+    self.__unopened = 0
+    self.__grow_lock: asyncio.Lock = None
+    # 同时发起的第一批请求都会触发 connect，加锁保证只建立一个连接池
+    self.__connect_lock = asyncio.Lock()
+    self.__metrics: Metrics = kwargs.get("metrics")
+    self.__device = kwargs.get("device", f"{host}:{port}")
+    self.__cache: RegisterCache = kwargs.get("cache")
+    self.__adaptive = kwargs.get("adaptive_timeout", False)
+    self.__hedge = kwargs.get("hedge")
+    self.__rtt = None
+    if self.__adaptive or self.__hedge:
+      self.__rtt = RttEstimator(min_timeout=kwargs.get("min_timeout", 0.2), max_timeout=self.__timeout)
+    # 连接统计
+    self.__broken = 0
+    self.__reconnects = 0
+    self.__failures = 0
+    self.__exhausted = 0
+    if self.__metrics is not None:
+      self.__metrics.add_pool(self.__device, self.pool_stats)
+
+  async def __aenter__(self):
+    if not self.__is_connected:
+      await self.connect()
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    await self.disconnect()
+    return False
+
+  async def __open(self):
+    try:
+      return await asyncio.wait_for(asyncio.open_connection(self.__host, self.__port), self.__timeout)
+    except Exception:
+      self.__failures += 1
+      raise
+
+  async def __close(self, conn):
+    if conn is None:
+      return
+    _, writer = conn
+    writer.close()
+    try:
+      await writer.wait_closed()
+    except Exception:
+      pass
+
+  def __next_transaction_id(self):
+    self.__transaction_id = (self.__transaction_id + 1) & 0xFFFF
+    return self.__transaction_id
+
+  def __build_frame(self, unit_id, pdu):
+    transaction_id = self.__next_transaction_id()
+    return transaction_id, self.__framer.build(transaction_id, unit_id, pdu)
+
+  async def __open_pipeline(self):
+    reader, writer = await self.__open()
+    return _PipelinedConnection(reader, writer, self.__pipeline)
+
+  async def __execute(self, unit_id, pdu, func, handler=None):
+    """发送一个 PDU，返回响应 PDU（功能码 + 数据），或以响应 PDU 调用 handler 的结果"""
+    if not self.__is_connected:
+      await self.connect()
+    if self.__metrics is None:
+      return await self.__transact(unit_id, pdu, func, handler)
+    timing = self.__metrics.start(self.__device, unit_id, pdu[0])
+    try:
+      result = await self.__transact(unit_id, pdu, func, handler, timing)
+    except Exception as e:
+      self.__metrics.finish(timing, e)
+      raise e
+    self.__metrics.finish(timing)
+    return result
+
+  async def __transact(self, unit_id, pdu, func, handler=None, timing=None):
+    if self.__hedge is not None and pdu[0] <= 4:
+      response = await self.__execute_hedged(unit_id, pdu, func, timing)
+    elif self.__pipeline > 1:
+      response = await self.__execute_pipelined(unit_id, pdu, func, timing)
+    else:
+      response = await self.__execute_pooled(unit_id, pdu, func, timing)
+    self.__handle_error(response, pdu[0], func)
+    if handler is None:
+      return response
+    result = handler(response)
+    if timing is not None:
+      timing.mark("decode")
+    return result
+
+  def __request_timeout(self):
+    return self.__rtt.timeout if self.__adaptive else self.__timeout
+
+  def __send(self, unit_id, pdu, func, timing, sent_event=None):
+    if self.__pipeline > 1:
+      return self.__execute_pipelined(unit_id, pdu, func, timing, sent_event)
+    return self.__execute_pooled(unit_id, pdu, func, timing, sent_event)
+
+  async def __execute_hedged(self, unit_id, pdu, func, timing):
+    """读请求超过往返时间的高分位仍未响应时，在另一个连接上重发，返回先到的响应"""
+    delay = self.__rtt.hedge_delay(self.__hedge)
+    if delay is None:
+      return await self.__send(unit_id, pdu, func, timing)
+    sent_event = asyncio.Event()
+    first = asyncio.ensure_future(self.__send(unit_id, pdu, func, timing, sent_event))
+    second = None
+    try:
+      # 从请求发出开始计时，等待连接的时间不计入
+      sent = asyncio.ensure_future(sent_event.wait())
+      await asyncio.wait({first, sent}, return_when=asyncio.FIRST_COMPLETED)
+      sent.cancel()
+      done, _ = await asyncio.wait({first}, timeout=delay)
+      # 没有空闲连接时不重发，避免对冲请求排队
+      idle = len(self.__pipelines) > 1 if self.__pipeline > 1 else not self.__connections.empty()
+      if done or not idle:
+        return await first
+      self.__rtt.hedges += 1
+      second = asyncio.ensure_future(self.__send(unit_id, pdu, func, None))
+      tasks = {first, second}
+      while tasks:
+        done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+          if task.exception() is None:
+            if task is second:
+              self.__rtt.hedge_wins += 1
+            return task.result()
+      return first.result()
+    finally:
+      # 取消落后的请求：流水线连接丢弃迟到的响应，连接池中的连接关闭后在下次使用时重建
+      for task in (first, second):
+        if task is not None:
+          task.cancel()
+
+  async def __execute_pooled(self, unit_id, pdu, func, timing, sent_event=None):
+    # 队列中的 None 表示连接已失效，使用时重新建立
+    if self.__connections.empty():
+      self.__exhausted += 1
+    conn = await self.__connections.get()
+    try:
+      if conn is None:
+        conn = await self.__open()
+        self.__broken -= 1
+        if self.__unopened:
+          self.__unopened -= 1
+        else:
+          self.__reconnects += 1
+      if timing is not None:
+        timing.mark("acquire")
+      if sent_event is not None:
+        sent_event.set()
+      sent = time.perf_counter()
+      response = await asyncio.wait_for(self.__exchange(conn, unit_id, pdu, timing), self.__request_timeout())
+      if self.__rtt is not None:
+        self.__rtt.observe(time.perf_counter() - sent)
+    except BaseException as e:
+      # 包括被取消的请求：连接上可能还有未读取的响应，不能再使用
+      if self.__rtt is not None and isinstance(e, asyncio.TimeoutError):
+        self.__rtt.backoff()
+      await self.__close(conn)
+      if conn is not None:
+        self.__broken += 1
+      self.__connections.put_nowait(None)
+      if not isinstance(e, asyncio.CancelledError):
+        LOGGER.error(f"Error in {func}: {e}")
+      raise e
+    self.__connections.put_nowait(conn)
+    return response
+
+  async def __execute_pipelined(self, unit_id, pdu, func, timing, sent_event=None):
+    # 轮流使用各个流水线连接，失效的连接在使用时重新建立
+    try:
+      if self.__lazy and self.__pipelines_busy():
+        # 同一时间只新建一个连接，等待期间其它连接可能已经空闲
+        async with self.__grow_lock:
+          if self.__pipelines_busy():
+            self.__pipelines.append(await self.__open_pipeline())
+      index = self.__next_pipeline % len(self.__pipelines)
+      self.__next_pipeline = index + 1
+      conn = self.__pipelines[index]
+      if conn.closed:
+        conn = self.__pipelines[index] = await self.__open_pipeline()
+        self.__reconnects += 1
+      if conn.slots.locked():
+        self.__exhausted += 1
+      return await conn.request(
+        *self.__build_frame(unit_id, pdu), self.__request_timeout(), timing, self.__rtt, sent_event
+      )
+    except Exception as e:
+      LOGGER.error(f"Error in {func}: {e}")
+      raise e
+
+  def __pipelines_busy(self) -> bool:
+    """lazy 时是否需要新建流水线连接：还没有连接，或现有连接的事务数都已占满"""
+    if len(self.__pipelines) >= self.__max_connections:
+      return False
+    return all(conn.slots.locked() for conn in self.__pipelines)
+
+  async def __exchange(self, conn, unit_id, pdu, timing=None):
+    reader, writer = conn
+    _, request = self.__build_frame(unit_id, pdu)
+    writer.write(request)
+    await writer.drain()
+    if timing is not None:
+      timing.mark("send")
+    frame = await self.__framer.read_frame(reader)
+    if timing is not None:
+      timing.mark("wait")
+    return bytes(self.__framer.decode(request, frame))
+
+  def __handle_error(self, response, function_code, func):
+    if not response:
+      raise ConnectionError("Empty response")
+    if response[0] == function_code | 0x80:
+      LOGGER.debug(f"exception_code = {response[1]}")
+      Exceptions.raise_modbus_exception(response[1], func)
+
+  def __payload(self, handler, response):
+    data = response[2 : 2 + response[1]]
+    return data if handler is None else handler(data)
+
+  async def __read_raw(self, start_address, count, unit_id, function_code, func, handler=None):
+    pdu = struct.pack(">BHH", function_code, start_address, count)
+    return await self.__execute(unit_id, pdu, func, partial(self.__payload, handler))
+
+  def __decode(self, codec, data):
+    return codec.decode_array(data) if self.__numpy else codec.decode(data)
+
+  async def __read_registers(self, start_address, quantity, unit_id, function_code, func):
+    codec = get_codec(self.__data_format, quantity)
+    return await self.__read_raw(
+      start_address, codec.registers, unit_id, function_code, func, partial(self.__decode, codec)
+    )
+
+  async def __read_coils(self, start_address, quantity, unit_id, function_code, func, packed=False):
+    if packed:
+      handler = partial(copy_bits, quantity=quantity)
+    elif self.__numpy:
+      handler = partial(unpack_bits_array, quantity=quantity)
+    else:
+      handler = partial(unpack_bits, quantity=quantity)
+    return await self.__read_raw(start_address, quantity, unit_id, function_code, func, handler)
+
+  async def __read_split(self, read, start_address, quantity, unit_id, function_code, func, words, limit, packed=False):
+    """超过单帧上限的读请求拆分后并发读取，并按顺序拼接结果；启用缓存时先查缓存"""
+    if self.__cache is None:
+      return await self.__load_split(read, start_address, quantity, unit_id, function_code, func, words, limit)
+    key = (self.__device, unit_id, function_code, start_address, quantity, self.__data_format, self.__numpy, packed)
+    load = partial(self.__load_split, read, start_address, quantity, unit_id, function_code, func, words, limit)
+    return await self.__cache.get_async(key, start_address, start_address + quantity * words, load)
+
+  async def __load_split(self, read, start_address, quantity, unit_id, function_code, func, words, limit):
+    chunks = split_range(start_address, quantity, words, limit)
+    parts = await asyncio.gather(*[read(address, count, unit_id, function_code, func) for address, count in chunks])
+    return join_chunks(parts)
+
+  async def __read_batch(self, requests, unit_id, function_code, func, max_gap):
+    """合并相邻的读请求，以尽量少的帧读取后再按原请求拆分解码"""
+    codecs = [get_codec(self.__data_format, quantity) for _, quantity in requests]
+    blocks = coalesce(
+      [(address, codec.registers) for (address, _), codec in zip(requests, codecs, strict=True)], max_gap
+    )
+    blocks_values = await asyncio.gather(
+      *[
+        self.__read_raw(
+          block.start, block.count, unit_id, function_code, func, partial(self.__decode_block, requests, codecs, block)
+        )
+        for block in blocks
+      ]
+    )
+
+    results = [None] * len(requests)
+    for values in blocks_values:
+      for index, value in values:
+        results[index] = value
+    return results
+
+  def __decode_block(self, requests, codecs, block, payload):
+    values = []
+    for index in block.members:
+      offset = (requests[index][0] - block.start) * 2
+      codec = codecs[index]
+      values.append((index, self.__decode(codec, payload[offset : offset + codec.byte_count])))
+    return values
+
+  def __invalidate(self, unit_id, function_code, address, count):
+    """写入后（包括失败，设备状态未知）使重叠地址的缓存失效"""
+    if self.__cache is not None:
+      self.__cache.invalidate(self.__device, unit_id, function_code, address, address + count)
+
+  async def __write_registers(self, start_address, values, unit_id, func):
+    codec = get_codec(self.__data_format, len(values))
+    pdu = struct.pack(">BHHB", 16, start_address, codec.registers, codec.byte_count) + codec.encode(values)
+    try:
+      await self.__execute(unit_id, pdu, func)
+    finally:
+      self.__invalidate(unit_id, 3, start_address, codec.registers)
+    return f"{func} successed"
+
+  async def __write_coils(self, start_address, values, unit_id, func):
+    msg = pack_bits(values)
+    pdu = struct.pack(">BHHB", 15, start_address, len(values), len(msg)) + msg
+    try:
+      await self.__execute(unit_id, pdu, func)
+    finally:
+      self.__invalidate(unit_id, 1, start_address, len(values))
+    return f"{func} successed"
+
+  async def connect(self):
+    """建立连接池，已连接时直接返回；并发调用时只有第一个调用建立连接，其余等待其完成"""
+    async with self.__connect_lock:
+      if self.__is_connected:
+        return
+      await self.__connect()
+
+  async def __connect(self):
+    try:
+      if self.__pipeline > 1:
+        self.__grow_lock = asyncio.Lock()
+        if not self.__lazy:
+          self.__pipelines = [await self.__open_pipeline() for _ in range(self.__max_connections)]
+      elif self.__lazy:
+        # 队列中放入尚未建立的连接（None），后进先出，只有并发请求用到时才建立新的连接
+        self.__connections = asyncio.LifoQueue()
+        self.__broken = self.__unopened = self.__max_connections
+        for _ in range(self.__max_connections):
+          self.__connections.put_nowait(None)
+      else:
+        self.__connections = asyncio.Queue()
+        self.__broken = 0
+        for _ in range(self.__max_connections):
+          self.__connections.put_nowait(await self.__open())
+      LOGGER.info(f"Connected to {self.__host}:{self.__port}")
+      self.__is_connected = True
+    except asyncio.TimeoutError as e:
+      await self.disconnect(force=True)
+      raise TimeoutError(f"Connection to {self.__host}:{self.__port} timed out.") from e
+    except OSError as e:
+      await self.disconnect(force=True)
+      raise e
+
+  async def disconnect(self, force=False):
+    if not self.__is_connected and not force:
+      return None
+    self.__is_connected = False
+    while self.__connections is not None and not self.__connections.empty():
+      await self.__close(self.__connections.get_nowait())
+    for conn in self.__pipelines:
+      await conn.close()
+    self.__pipelines = []
+    LOGGER.info(f"Disconnected from {self.__host}:{self.__port}")
+
+  async def read_holding_registers(self, start_address, quantity: int, unit_id=1) -> tuple:
+    """读保持寄存器
+
+    Args:
+        start_address : 要读取起始地址
+        quantity (int): 要读取的数量
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        tuple: 读取到的对应的寄存器的值
+    """
+    words = get_codec(self.__data_format, 1).registers
+    return await self.__read_split(
+      self.__read_registers, start_address, quantity, unit_id, 3, "read_holding_registers", words, MAX_READ_REGISTERS
+    )
+
+  async def read_input_registers(self, start_address, quantity: int, unit_id=1) -> tuple:
+    """读输入寄存器
+
+    Args:
+        start_address : 要读取的起始地址
+        quantity (int): 要读取的数量
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        tuple: 读取到的对应的寄存器的值
+    """
+    words = get_codec(self.__data_format, 1).registers
+    return await self.__read_split(
+      self.__read_registers, start_address, quantity, unit_id, 4, "read_input_registers", words, MAX_READ_REGISTERS
+    )
+
+  async def read_coils(self, start_address, quantity: int, unit_id=1, packed=False) -> list:
+    """读线圈
+
+    Args:
+        start_address : 要读取的起始地址
+        quantity (int): 要读取的数量
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        packed (bool, optional): 返回打包的字节（低位在前）而不是列表 = False
+
+    Returns:
+        list: 读取到的对应的线圈的值
+    """
+    read = partial(self.__read_coils, packed=packed)
+    return await self.__read_split(read, start_address, quantity, unit_id, 1, "read_coils", 1, MAX_READ_COILS, packed)
+
+  async def read_input_coils(self, start_address, quantity: int, unit_id=1, packed=False) -> list:
+    """读离散输入
+
+    Args:
+        start_address : 要读取的起始地址
+        quantity (int): 要读取的数量
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        packed (bool, optional): 返回打包的字节（低位在前）而不是列表 = False
+
+    Returns:
+        list: 读取到的对应的离散输入的值
+    """
+    read = partial(self.__read_coils, packed=packed)
+    return await self.__read_split(
+      read, start_address, quantity, unit_id, 2, "read_input_coils", 1, MAX_READ_COILS, packed
+    )
+
+  async def read_raw(self, start_address, count: int, unit_id=1, function_code=3) -> bytes:
+    """读取原始数据，不做解码
+
+    Args:
+        start_address : 要读取的起始地址
+        count (int): 寄存器（线圈）数量
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        function_code (int, optional): 读功能码 1/2/3/4 = 3
+
+    Returns:
+        bytes: 响应中的数据部分
+    """
+    return await self.__read_raw(start_address, count, unit_id, function_code, "read_raw")
+
+  async def read_holding_registers_batch(self, requests: list, unit_id=1, max_gap=0) -> list:
+    """批量读保持寄存器，相邻的请求合并为尽量少的帧
+
+    Args:
+        requests (list): [(起始地址, 数量), ...]
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        max_gap (int, optional): 合并时允许多读的空隙寄存器数 = 0
+
+    Returns:
+        list: 与 requests 一一对应的读取结果
+    """
+    return await self.__read_batch(requests, unit_id, 3, "read_holding_registers", max_gap)
+
+  async def read_input_registers_batch(self, requests: list, unit_id=1, max_gap=0) -> list:
+    """批量读输入寄存器，相邻的请求合并为尽量少的帧
+
+    Args:
+        requests (list): [(起始地址, 数量), ...]
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        max_gap (int, optional): 合并时允许多读的空隙寄存器数 = 0
+
+    Returns:
+        list: 与 requests 一一对应的读取结果
+    """
+    return await self.__read_batch(requests, unit_id, 4, "read_input_registers", max_gap)
+
+  async def write_multiple_registers(self, start_address, value: list, unit_id=1) -> str:
+    """写多个寄存器
+
+    Args:
+        start_address : 要写入的起始地址
+        value (list): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    return await self.__write_registers(start_address, value, unit_id, "write_multiple_registers")
+
+  async def write_single_registers(self, address, value: int, unit_id=1) -> str:
+    """写单个寄存器
+
+    Args:
+        address : 要写入的地址
+        value (int): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    return await self.__write_registers(address, (value,), unit_id, "write_single_registers")
+
+  async def write_multiple_coils(self, start_address, value: list, unit_id=1) -> str:
+    """写多个线圈
+
+    Args:
+        start_address : 要写入的起始地址
+        value (list): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    return await self.__write_coils(start_address, value, unit_id, "write_multiple_coils")
+
+  async def write_single_coils(self, address, value: int, unit_id=1) -> str:
+    """写单个线圈
+
+    Args:
+        address : 要写入的地址
+        value (bool): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    return await self.__write_coils(address, (value,), unit_id, "write_single_coils")
+
+  async def read_write_registers(self, read_address, read_quantity: int, write_address, value: list, unit_id=1):
+    """读写多个寄存器（功能码 23），在一次往返中先写入再读取
+
+    Args:
+        read_address : 要读取的起始地址
+        read_quantity (int): 要读取的数量
+        write_address : 要写入的起始地址
+        value (list): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        tuple: 读取到的对应的寄存器的值
+    """
+    read_codec = get_codec(self.__data_format, read_quantity)
+    write_codec = get_codec(self.__data_format, len(value))
+    if read_codec.registers > MAX_READ_REGISTERS or write_codec.registers > MAX_READ_WRITE_REGISTERS:
+      raise ValueError(
+        f"Read/write of {read_codec.registers}/{write_codec.registers} registers exceeds "
+        f"the frame limit {MAX_READ_REGISTERS}/{MAX_READ_WRITE_REGISTERS}"
+      )
+    pdu = struct.pack(
+      ">BHHHHB",
+      23,
+      read_address,
+      read_codec.registers,
+      write_address,
+      write_codec.registers,
+      write_codec.byte_count,
+    )
+    pdu += write_codec.encode(value)
+    handler = partial(self.__payload, partial(self.__decode, read_codec))
+    try:
+      return await self.__execute(unit_id, pdu, "read_write_registers", handler)
+    finally:
+      self.__invalidate(unit_id, 3, write_address, write_codec.registers)
+
+  async def mask_write_register(self, address, and_mask: int, or_mask: int, unit_id=1) -> str:
+    """屏蔽写寄存器（功能码 22），由设备完成读-改-写：结果 = (当前值 & and_mask) | (or_mask & ~and_mask)
+
+    Args:
+        address : 要写入的地址
+        and_mask (int): 与掩码，为 1 的位保持不变
+        or_mask (int): 或掩码
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    pdu = struct.pack(">BHHH", 22, address, and_mask & 0xFFFF, or_mask & 0xFFFF)
+    try:
+      await self.__execute(unit_id, pdu, "mask_write_register")
+    finally:
+      self.__invalidate(unit_id, 3, address, 1)
+    return "mask_write_register successed"
+
+  async def write_register_bit(self, address, bit: int, value: bool, unit_id=1) -> str:
+    """通过屏蔽写寄存器（功能码 22）设置寄存器中的单个位，不影响其它位
+
+    Args:
+        address : 寄存器地址
+        bit (int): 位序号 0-15，0 为最低位
+        value (bool): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    if not 0 <= bit <= 15:
+      raise ValueError("bit must be in 0-15")
+    return await self.mask_write_register(address, ~(1 << bit), (1 << bit) if value else 0, unit_id)
+
+  async def write_raw(self, start_address, data: bytes, unit_id=1) -> str:
+    """以功能码 16 写入原始数据（大端寄存器字节），不做编码
+
+    Args:
+        start_address : 要写入的起始地址
+        data (bytes): 要写入的字节，长度为偶数
+        unit_id (int, optional): 设备地址（slave_id）= 1
+    """
+    if len(data) % 2:
+      raise ValueError("Register data must have an even length")
+    pdu = struct.pack(">BHHB", 16, start_address, len(data) // 2, len(data)) + bytes(data)
+    try:
+      await self.__execute(unit_id, pdu, "write_raw")
+    finally:
+      self.__invalidate(unit_id, 3, start_address, len(data) // 2)
+    return "write_raw successed"
+
+  @property
+  def data_format(self):
+    return self.__data_format
+
+  @property
+  def metrics(self) -> Metrics:
+    return self.__metrics
+
+  @property
+  def cache(self) -> RegisterCache:
+    return self.__cache
+
+  @property
+  def rtt(self) -> RttEstimator:
+    """往返时间估计，未启用自适应超时和对冲请求时为 None"""
+    return self.__rtt
+
+  def pool_stats(self) -> dict:
+    """连接统计信息"""
+    if self.__pipeline > 1:
+      size = sum(not conn.closed for conn in self.__pipelines)
+      in_use = sum(len(conn.pending) for conn in self.__pipelines)
+    else:
+      size = self.__max_connections - self.__broken if self.__is_connected else 0
+      in_use = self.__max_connections - self.__connections.qsize() if self.__is_connected else 0
+    return {
+      "size": size,
+      "in_use": in_use,
+      "reconnects": self.__reconnects,
+      "failures": self.__failures,
+      "exhausted": self.__exhausted,
+    }
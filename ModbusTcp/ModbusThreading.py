@@ -6,11 +6,28 @@
 # @ Description:
 """
 
+import select
 import socket
 import struct
+import threading
+import time
+from functools import partial
 
 from ModbusTcp import Exceptions
+from ModbusTcp.Cache import RegisterCache
+from ModbusTcp.Codec import copy_bits, get_codec, pack_bits, unpack_bits, unpack_bits_array
 from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.Framer import Framer, get_framer
+from ModbusTcp.Metrics import Metrics
+from ModbusTcp.Planner import (
+  MAX_READ_COILS,
+  MAX_READ_REGISTERS,
+  MAX_READ_WRITE_REGISTERS,
+  coalesce,
+  join_chunks,
+  split_range,
+)
+from ModbusTcp.Rtt import RttEstimator
 from ModbusTcp.ulitis import LOGGER, SocketManager, execute
 
 
@@ -24,15 +41,58 @@ class ModbusTcpClient:
         host (str, optional): 服务器地址。Defaults to "1270.0.1".
         port (int, optional): 服务器端口号 . Defaults to 502.
         data_format (DataFormat, optional): 数据格式。Defaults to DataFormat.SIGNED_16_INT_BIG.
+        numpy (bool, optional): 读寄存器时返回 numpy 数组。Defaults to False.
+        sockts (int, optional): 连接数上限。Defaults to 10.
+        threads (int, optional): 线程池大小。Defaults to 10.
+        acquire_timeout (float, optional): 连接全部占用时获取连接的最长等待时间。Defaults to None.
+        idle_timeout (float, optional): 空闲超过该时间的连接在使用前检查是否半开。Defaults to 60.
+        max_pending_writes (int, optional): wait_writed 为 False 时未完成的写入数上限，达到上限时写入阻塞。Defaults to 1024.
+        metrics (Metrics, optional): 请求耗时统计，None 时不做统计。Defaults to None.
+        cache (RegisterCache, optional): 读缓存，None 时不缓存。Defaults to None.
+        adaptive_timeout (bool, optional): 按设备的往返时间估计每个请求的超时时间。Defaults to False.
+        min_timeout (float, optional): 自适应超时的下限（秒）。Defaults to 0.2.
+        max_timeout (float, optional): 自适应超时的上限（秒）。Defaults to 10.
+        hedge (float, optional): 读请求等待超过往返时间的该分位数（例如 0.95）时，在另一个空闲连接上重发，先到的响应有效。Defaults to None.
+        device (str, optional): 统计中使用的设备名。Defaults to "host:port".
+        framer (str | Framer, optional): 帧格式，"mbap" 或 "rtu"（透明串口网关的 RTU over TCP）。Defaults to "mbap".
+        lazy (bool, optional): 适合短时运行的命令行：第一次请求时才建立连接并按需增加到上限，单个请求在调用线程中执行，
+            线程池在第一次并发请求时才创建。Defaults to False.
     """
     self.__host = host
     self.__port = port
     self.__transaction_id = 0
+    # 多个线程同时发起请求，事务号的分配需要加锁
+    self.__transaction_lock = threading.Lock()
     self.__is_connected = False
     self.__data_format = data_format
-    self.__threads = execute(kwargs.get("threads", 10))
-    self.__sockets = SocketManager(kwargs.get("sockts", 10))
+    self.__framer: Framer = get_framer(kwargs.get("framer", "mbap"))
+    self.__metrics: Metrics = kwargs.get("metrics")
+    self.__device = kwargs.get("device", f"{host}:{port}")
+    self.__cache: RegisterCache = kwargs.get("cache")
+    self.__adaptive = kwargs.get("adaptive_timeout", False)
+    self.__hedge = kwargs.get("hedge")
+    self.__rtt = None
+    if self.__adaptive or self.__hedge:
+      self.__rtt = RttEstimator(min_timeout=kwargs.get("min_timeout", 0.2), max_timeout=kwargs.get("max_timeout", 10))
+    # 工作线程中记录当前任务的排队时间
+    self.__local = threading.local()
+    lazy = kwargs.get("lazy", False)
+    self.__threads = execute(
+      kwargs.get("threads", 10),
+      self.__queued if self.__metrics is not None else None,
+      max_pending=kwargs.get("max_pending_writes", 1024),
+      inline=lazy,
+    )
+    self.__sockets = SocketManager(
+      kwargs.get("sockts", 10),
+      acquire_timeout=kwargs.get("acquire_timeout"),
+      idle_timeout=kwargs.get("idle_timeout", 60),
+      lazy=lazy,
+    )
+    if self.__metrics is not None:
+      self.__metrics.add_pool(self.__device, self.__sockets.stats)
     self.__wait_writed = True
+    self.__numpy = kwargs.get("numpy", False)
     self.connect()
 
   def __enter__(self):
@@ -48,261 +108,255 @@ class ModbusTcpClient:
     self.__threads.shutdown()
     self.__sockets.shutdown()
 
-  def __build_request(self, unit_id, function_code, start_address, dates):
-    quantity = dates if "read" in self.__func else len(dates)
-    if self.__data_format in {
-      DataFormat.UNSIGNED_16_INT_LITTLE,
-      DataFormat.SIGNED_16_INT_LITTLE,
-    }:
-      self.__format_str = "<" + ("H" * quantity) if "UNSIGNED" in self.__data_format.name else "<" + ("h" * quantity)
-    elif self.__data_format in {
-      DataFormat.UNSIGNED_16_INT_BIG,
-      DataFormat.SIGNED_16_INT_BIG,
-    }:
-      self.__format_str = ">" + ("H" * quantity) if "UNSIGNED" in self.__data_format.name else ">" + ("h" * quantity)
-
-    elif self.__data_format in {
-      DataFormat.UNSIGNED_32_INT_LITTLE,
-      DataFormat.SIGNED_32_INT_LITTLE,
-      DataFormat.UNSIGNED_32_INT_LITTLE_BYTE_SWAP,
-      DataFormat.SIGNED_32_INT_LITTLE_BYTE_SWAP,
-    }:
-      self.__format_str = "<" + ("I" * quantity) if "UNSIGNED" in self.__data_format.name else "<" + ("i" * quantity)
-
-    elif self.__data_format in {
-      DataFormat.UNSIGNED_32_INT_BIG,
-      DataFormat.SIGNED_32_INT_BIG,
-      DataFormat.UNSIGNED_32_INT_BIG_BYTE_SWAP,
-      DataFormat.SIGNED_32_INT_BIG_BYTE_SWAP,
-    }:
-      self.__format_str = ">" + ("I" * quantity) if "UNSIGNED" in self.__data_format.name else ">" + ("i" * quantity)
-
-    elif self.__data_format in {
-      DataFormat.UNSIGNED_64_INT_LITTLE,
-      DataFormat.SIGNED_64_INT_LITTLE,
-      DataFormat.UNSIGNED_64_INT_LITTLE_BYTE_SWAP,
-      DataFormat.SIGNED_64_INT_LITTLE_BYTE_SWAP,
-    }:
-      self.__format_str = "<" + ("Q" * quantity) if "UNSIGNED" in self.__data_format.name else "<" + ("q" * quantity)
-
-    elif self.__data_format in {
-      DataFormat.UNSIGNED_64_INT_BIG,
-      DataFormat.SIGNED_64_INT_BIG,
-      DataFormat.UNSIGNED_64_INT_BIG_BYTE_SWAP,
-      DataFormat.SIGNED_64_INT_BIG_BYTE_SWAP,
-    }:
-      self.__format_str = ">" + ("Q" * quantity) if "UNSIGNED" in self.__data_format.name else ">" + ("q" * quantity)
-
-    elif self.__data_format in {DataFormat.FLOAT_32_LITTLE, DataFormat.FLOAT_32_LITTLE_BYTE_SWAP}:
-      self.__format_str = "<" + ("f" * quantity)
-
-    elif self.__data_format in {DataFormat.FLOAT_32_BIG, DataFormat.FLOAT_32_BIG_BYTE_SWAP}:
-      self.__format_str = ">" + ("f" * quantity)
-
-    elif self.__data_format in {DataFormat.DOUBLE_64_LITTLE, DataFormat.DOUBLE_64_LITTLE_BYTE_SWAP}:
-      self.__format_str = "<" + ("d" * quantity)
-
-    elif self.__data_format in {DataFormat.DOUBLE_64_BIG, DataFormat.DOUBLE_64_BIG_BYTE_SWAP}:
-      self.__format_str = ">" + ("d" * quantity)
-
-    if "16" in self.__data_format.name:
-      des_quantity = quantity
-
-    elif "32" in self.__data_format.name:
-      des_quantity = quantity * 2
-
-    elif "64" in self.__data_format.name:
-      des_quantity = quantity * 4
+  def __next_transaction_id(self):
+    with self.__transaction_lock:
+      self.__transaction_id = (self.__transaction_id + 1) & 0xFFFF
+      return self.__transaction_id
 
-    else:
-      LOGGER.error(f"format_str = {self.__format_str}")
-      raise ValueError(f"Unsupported data format: {self.__data_format}")
-
-    self.__transaction_id += 1
-
-    if "read" in self.__func:
-      mbap_header = struct.pack(">H H H B", self.__transaction_id, 0, 6, unit_id)
-      pdu = struct.pack(">B H H", function_code, start_address, des_quantity)
-    elif "write" in self.__func:
-      mbap_header = struct.pack(">H H H B", self.__transaction_id, 0, 7 + 2 * des_quantity, unit_id)
-      pdu = struct.pack(
-        ">B H H B",
-        function_code,
-        start_address,
-        des_quantity,
-        2 * des_quantity,
-      )
-      datas = struct.pack(self.__format_str, *dates)
-      datas = self.__byte_swap(datas)
-      pdu += datas
-
-    request = mbap_header + pdu
-    return request
-
-  def __build_request_msg(self, values):
-    res = bytearray()
-    length = len(values)
-    padded_length = length + (8 - length % 8) if length % 8 != 0 else length
-    for i in range(0, padded_length, 8):
-      byte = 0
-      for bit_index in range(8):
-        if i + bit_index < length and values[i + bit_index]:
-          byte |= 1 << bit_index
-      res.append(byte)
-    return res
-
-  def __read_registers(self, sock, address, quantity, unit_id=1, function_code=3):
-    request = self.__build_request(unit_id, function_code, address, quantity)
-    sock.sendall(request)
+  def __build_frame(self, unit_id, pdu):
+    return self.__framer.build(self.__next_transaction_id(), unit_id, pdu)
+
+  def __queued(self, delay):
+    self.__local.queued = delay
+
+  def __exchange(self, request, func, handler=None):
+    """取出一个连接发送请求并读取响应，连接出错时只丢弃该连接
 
+    请求的状态（功能名、解码器）都通过参数传递，多个线程可以同时使用同一个客户端。
+
+    Args:
+        request (bytes): 请求报文
+        func (str): 发起请求的方法名，用于日志和异常信息
+        handler (Callable, optional): 以响应数据部分的 memoryview 调用，在连接归还前完成解码
+
+    Returns:
+        handler 的返回值
+    """
+    if self.__metrics is None:
+      return self.__transact(request, func, handler)
+    queued = getattr(self.__local, "queued", 0.0)
+    self.__local.queued = 0.0
+    framer = self.__framer
+    timing = self.__metrics.start(self.__device, request[framer.unit_offset], request[framer.pdu_offset], queued)
     try:
-      response = sock.recv(6)
-      response += sock.recv(response[-1])
-      self.__sockets.release_socket(sock)
-    except Exceptions.ModbusException as e:
-      raise e
+      result = self.__transact(request, func, handler, timing)
     except Exception as e:
-      self.disconnect()
-      LOGGER.error(f"Error reading register: {e}")
+      self.__metrics.finish(timing, e)
       raise e
+    self.__metrics.finish(timing)
+    return result
 
-    return self.__parse_response(response)
-
-  def __read_coil(self, sock, start_address, quantity, unit_id=1, function_code=1):
-    self.__transaction_id += 1
-    mbap_header = struct.pack(">H H H B", self.__transaction_id, 0, 6, unit_id)
-    pdu = struct.pack(">B H H", function_code, start_address, quantity)
-    request = mbap_header + pdu
-
+  def __transact(self, request, func, handler=None, timing=None):
+    sock = self.__sockets.get_socket()
+    if timing is not None:
+      timing.mark("acquire")
+    rtt = self.__rtt
     try:
+      if self.__adaptive:
+        sock.settimeout(rtt.timeout)
+      sent = time.perf_counter() if rtt is not None else 0.0
       sock.sendall(request)
-      response = sock.recv(6)
-      response += sock.recv(response[-1])
-      self.__sockets.release_socket(sock)
-      self.__handle_error(response[0:9])
-      res = self.__res2bit(quantity, response[9:])
-      return res
-    except Exceptions.ModbusException as e:
-      raise e
+      if timing is not None:
+        timing.mark("send")
+      if self.__hedge is not None and request[self.__framer.pdu_offset] <= 4:
+        sock, sent = self.__hedged(sock, request, sent)
+      response = self.__framer.decode(request, self.__sockets.recv_frame(sock, self.__framer))
+      if rtt is not None:
+        rtt.observe(time.perf_counter() - sent)
+      if timing is not None:
+        timing.mark("wait")
     except Exception as e:
-      self.disconnect()
-      LOGGER.error(f"Error reading coils: {e}")
+      self.__sockets.discard_socket(sock)
+      if rtt is not None and isinstance(e, socket.timeout):
+        rtt.backoff()
+      LOGGER.error(f"Error in {func}: {e}")
       raise e
 
-  def __write_register(self, sock, address, value, unit_id=1, function_code=6):
-    request = self.__build_request(unit_id, function_code, address, value)
-    sock.sendall(request)
-
     try:
-      response = sock.recv(6)
-      response += sock.recv(response[-1])
+      if len(response) < 2:
+        raise ValueError("Response is too short")
+      self.__handle_error(response[0:2], func)
+      result = handler(response[2:]) if handler is not None else None
+      if timing is not None:
+        timing.mark("decode")
+      return result
+    finally:
       self.__sockets.release_socket(sock)
-      LOGGER.debug(f"response = {response}")
-      self.__handle_error(response[0:9])
-      return f"{self.__func} successed"
-    except Exceptions.ModbusException as e:
-      raise e
-    except Exception as e:
-      if self.__is_connected:
-        self.disconnect()
-        LOGGER.error(f"Error writing register: {e}")
-      raise e
 
-  def __write_coils(self, sock, address, values, unit_id=1):
-    length = (colis := len(values)) // 8
-    length += 1 if colis % 8 > 0 else 0
-    self.__transaction_id += 1
+  def __hedged(self, sock, request, sent):
+    """读请求超过往返时间的高分位仍未响应时，在另一个空闲连接上重发
+
+    Returns:
+        tuple: (先收到响应的连接, 该连接的发送时间)，落后的连接直接丢弃
+    """
+    delay = self.__rtt.hedge_delay(self.__hedge)
+    if delay is None or select.select([sock], [], [], delay)[0]:
+      return sock, sent
+    other = self.__sockets.try_get_socket()
+    if other is None:
+      return sock, sent
+    try:
+      other.settimeout(sock.gettimeout())
+      other_sent = time.perf_counter()
+      other.sendall(request)
+    except OSError:
+      self.__sockets.discard_socket(other)
+      return sock, sent
+    self.__rtt.hedges += 1
+    remaining = sock.gettimeout()
+    if remaining is not None:
+      remaining = max(0.0, remaining - (other_sent - sent))
+    ready = select.select([sock, other], [], [], remaining)[0]
+    if not ready:
+      self.__sockets.discard_socket(other)
+      raise socket.timeout("timed out")
+    if sock in ready:
+      self.__sockets.discard_socket(other)
+      return sock, sent
+    self.__rtt.hedge_wins += 1
+    self.__sockets.discard_socket(sock)
+    return other, other_sent
+
+  def __read_raw(self, address, registers, unit_id, function_code, func, handler=bytes):
+    pdu = struct.pack(">BHH", function_code, address, registers)
+    return self.__exchange(self.__build_frame(unit_id, pdu), func, handler)
+
+  def __read_registers(self, address, quantity, unit_id, function_code, func):
+    codec = get_codec(self.__data_format, quantity)
+    handler = partial(self.__parse_response, codec=codec)
+    return self.__read_raw(address, codec.registers, unit_id, function_code, func, handler)
+
+  def __read_split(self, read, start_address, quantity, unit_id, function_code, func, words, limit, packed=False):
+    """超过单帧上限的读请求拆分后并发读取，并按顺序拼接结果；启用缓存时先查缓存"""
+    if self.__cache is None:
+      return self.__load_split(read, start_address, quantity, unit_id, function_code, func, words, limit)
+    key = (self.__device, unit_id, function_code, start_address, quantity, self.__data_format, self.__numpy, packed)
+    load = partial(self.__load_split, read, start_address, quantity, unit_id, function_code, func, words, limit)
+    return self.__cache.get(key, start_address, start_address + quantity * words, load)
+
+  def __load_split(self, read, start_address, quantity, unit_id, function_code, func, words, limit):
+    chunks = split_range(start_address, quantity, words, limit)
+    if len(chunks) == 1:
+      return self.__threads.run(read, start_address, quantity, unit_id, function_code, func)
+    calls = [(address, count, unit_id, function_code, func) for address, count in chunks]
+    return join_chunks(self.__threads.run_all(read, calls))
+
+  def __read_batch(self, requests, unit_id, function_code, func, max_gap):
+    """合并相邻的读请求，以尽量少的帧读取后再按原请求拆分解码"""
+    codecs = [get_codec(self.__data_format, quantity) for _, quantity in requests]
+    blocks = coalesce(
+      [(address, codec.registers) for (address, _), codec in zip(requests, codecs, strict=True)], max_gap
+    )
+    calls = [
+      (block.start, block.count, unit_id, function_code, func, partial(self.__decode_block, requests, codecs, block))
+      for block in blocks
+    ]
+
+    results = [None] * len(requests)
+    for values in self.__threads.run_all(self.__read_raw, calls):
+      for index, value in values:
+        results[index] = value
+    return results
+
+  def __decode_block(self, requests, codecs, block, payload):
+    values = []
+    for index in block.members:
+      offset = (requests[index][0] - block.start) * 2
+      codec = codecs[index]
+      values.append((index, self.__parse_response(payload[offset : offset + codec.byte_count], codec)))
+    return values
+
+  def __read_coil(self, start_address, quantity, unit_id, function_code, func, packed=False):
+    if packed:
+      handler = partial(copy_bits, quantity=quantity)
+    elif self.__numpy:
+      handler = partial(unpack_bits_array, quantity=quantity)
+    else:
+      handler = partial(unpack_bits, quantity=quantity)
+    return self.__read_raw(start_address, quantity, unit_id, function_code, func, handler)
 
-    pdu = struct.pack(">B H H B", 15, address, colis, length)
-    msg = self.__build_request_msg(values)
-    mbap_header = struct.pack(">HHHB", self.__transaction_id, 0, 7 + length, unit_id)
-    request = mbap_header + pdu + msg
-    sock.sendall(request)
+  def __invalidate(self, unit_id, function_code, address, count):
+    """写入后（包括失败，设备状态未知）使重叠地址的缓存失效"""
+    if self.__cache is not None:
+      self.__cache.invalidate(self.__device, unit_id, function_code, address, address + count)
 
+  def __write_register(self, address, values, unit_id, func):
+    codec = get_codec(self.__data_format, len(values))
+    pdu = struct.pack(">BHHB", 16, address, codec.registers, codec.byte_count) + codec.encode(values)
     try:
-      response = sock.recv(6)
-      response += sock.recv(response[-1])
-      self.__sockets.release_socket(sock)
-      LOGGER.debug(f"response = {response}")
-      self.__handle_error(response[0:9])
-      return f"{self.__func} successed"
-    except Exceptions.ModbusException as e:
-      raise e
-    except Exception as e:
-      # LOGGER.error(f"Error writing coils: {e}")
-      raise e
+      self.__exchange(self.__build_frame(unit_id, pdu), func)
+    finally:
+      self.__invalidate(unit_id, 3, address, codec.registers)
+    return f"{func} successed"
 
-  def __res2bit(self, quantity, response):
-    nums_coils = quantity // 8 + 1
-    delet_head = quantity % 8
-    datas = struct.unpack_from("<" + "B" * nums_coils, response)
-
-    res = []
-    length = len(datas)
-    for i in range(length):
-      if i != length - 1:
-        for n in format(datas[i], "08b")[::-1]:
-          res.append(int(n))
-      else:
-        for n in format(datas[i], "08b")[-delet_head:][::-1]:
-          res.append(int(n))
-    return res
-
-  def __handle_error(self, pdu):
+  def __write_raw(self, address, data, unit_id, func):
+    pdu = struct.pack(">BHHB", 16, address, len(data) // 2, len(data)) + data
+    try:
+      self.__exchange(self.__build_frame(unit_id, pdu), func)
+    finally:
+      self.__invalidate(unit_id, 3, address, len(data) // 2)
+    return f"{func} successed"
+
+  def __read_write(self, read_address, read_quantity, write_address, values, unit_id, func):
+    read_codec = get_codec(self.__data_format, read_quantity)
+    write_codec = get_codec(self.__data_format, len(values))
+    if read_codec.registers > MAX_READ_REGISTERS or write_codec.registers > MAX_READ_WRITE_REGISTERS:
+      raise ValueError(
+        f"Read/write of {read_codec.registers}/{write_codec.registers} registers exceeds "
+        f"the frame limit {MAX_READ_REGISTERS}/{MAX_READ_WRITE_REGISTERS}"
+      )
+    pdu = struct.pack(
+      ">BHHHHB",
+      23,
+      read_address,
+      read_codec.registers,
+      write_address,
+      write_codec.registers,
+      write_codec.byte_count,
+    )
+    pdu += write_codec.encode(values)
+    try:
+      return self.__exchange(self.__build_frame(unit_id, pdu), func, partial(self.__parse_response, codec=read_codec))
+    finally:
+      self.__invalidate(unit_id, 3, write_address, write_codec.registers)
+
+  def __mask_write(self, address, and_mask, or_mask, unit_id, func):
+    pdu = struct.pack(">BHHH", 22, address, and_mask, or_mask)
+    try:
+      self.__exchange(self.__build_frame(unit_id, pdu), func)
+    finally:
+      self.__invalidate(unit_id, 3, address, 1)
+    return f"{func} successed"
+
+  def __write_coils(self, address, values, unit_id, func):
+    msg = pack_bits(values)
+    pdu = struct.pack(">BHHB", 15, address, len(values), len(msg)) + msg
+    try:
+      self.__exchange(self.__build_frame(unit_id, pdu), func)
+    finally:
+      self.__invalidate(unit_id, 1, address, len(values))
+    return f"{func} successed"
+
+  def __write(self, write, *args):
+    """wait_writed 为 True 时等待写入完成，否则返回 Future"""
+    if self.__wait_writed:
+      return self.__threads.run(write, *args)
+    return self.__threads.submit(write, *args)
+
+  def __handle_error(self, pdu, func):
     if not pdu:
-      self.disconnect()
-      raise Exception("Connect Error")
+      raise ConnectionError("Connect Error")
     error_code = pdu[-2]
     if error_code < 80:
       return True
     exception_code = pdu[-1]
     LOGGER.debug(f"exception_code = {exception_code}")
-    match exception_code:
-      case 1:
-        raise Exceptions.IllegalFunction(self.__func)
-      case 2:
-        raise Exceptions.IllegalDataAddress()
-      case 3:
-        raise Exceptions.IllegalDataValue()
-      case 4:
-        raise Exceptions.SlaveDeviceFailure()
-      case 5:
-        raise Exceptions.Acknowledge()
-      case 6:
-        raise Exceptions.SlaveDeviceBusy()
-      case 8:
-        raise Exceptions.MemoryParityError()
-      case 11:
-        raise Exceptions.GatewayPathUnavailable()
-      case 12:
-        raise Exceptions.GatewayTargetDeviceFailedToRespond()
-
-  def __byte_swap(self, datas):
-    if "BYTE_SWAP" in self.__data_format.name:
-      res = bytearray()
-      data = bytearray(datas)
-      for i in range(0, len(datas), 4):
-        if i + 4 <= len(data):
-          swapped_data = data[i : i + 4]
-          swapped_data.reverse()
-
-        for i in range(0, len(swapped_data), 4):
-          if i + 4 <= len(swapped_data):
-            swapped_data[i : i + 4] = swapped_data[i + 2 : i + 4] + swapped_data[i : i + 2]
-            res.extend(swapped_data)
-      return bytes(res)
-
-    return datas
-
-  def __parse_response(self, response):
-    if len(response) < 9:
-      raise ValueError("Response is too short")
-    self.__handle_error(response[0:9])
-    data = response[9:]
-    data = self.__byte_swap(data)
-    LOGGER.debug(f"Data = {data}")
+    Exceptions.raise_modbus_exception(exception_code, func)
+
+  def __parse_response(self, data, codec):
     try:
-      parsed_data = struct.unpack(self.__format_str, data)
+      # data 指向连接的接收缓冲区，numpy 数组需要拷贝出独立的内存
+      parsed_data = codec.decode_array(bytes(data)) if self.__numpy else codec.decode(data)
     except Exception as e:
       LOGGER.error(f"Error : {e}")
       raise e
@@ -344,9 +398,10 @@ class ModbusTcpClient:
     Returns:
         list: 读取到的对应的寄存器的值
     """
-    self.__func = "read_holding_registers"
-    sock = self.__sockets.get_socket()
-    return self.__threads.run(self.__read_registers, sock, start_address, quantity, unit_id, 3)
+    words = get_codec(self.__data_format, 1).registers
+    return self.__read_split(
+      self.__read_registers, start_address, quantity, unit_id, 3, "read_holding_registers", words, MAX_READ_REGISTERS
+    )
 
   def read_input_registers(self, start_address, quantity: int, unit_id=1) -> list:
     """读输入寄存器
@@ -360,41 +415,85 @@ class ModbusTcpClient:
         list: 读取到的对应的寄存器的值
     """
 
-    self.__func = "read_input_registers"
-    sock = self.__sockets.get_socket()
-    return self.__threads.run(self.__read_registers, sock, start_address, quantity, unit_id, function_code=4)
+    words = get_codec(self.__data_format, 1).registers
+    return self.__read_split(
+      self.__read_registers, start_address, quantity, unit_id, 4, "read_input_registers", words, MAX_READ_REGISTERS
+    )
 
-  def read_coils(self, start_address, quantity: int, unit_id=1) -> list:
+  def read_coils(self, start_address, quantity: int, unit_id=1, packed=False) -> list:
     """读线圈
 
     Args:
         start_address : 要读取的起始地址
         quantity (int): 要读取的数量
         unit_id (int, optional): 设备地址（slave_id）= 1
+        packed (bool, optional): 返回打包的字节（低位在前）而不是列表 = False
 
     Returns:
         list: 读取到的对应的线圈的值
     """
 
-    self.__func = "read_coils"
-    sock = self.__sockets.get_socket()
-    return self.__threads.run(self.__read_coil, sock, start_address, quantity, unit_id)
+    read = partial(self.__read_coil, packed=packed)
+    return self.__read_split(read, start_address, quantity, unit_id, 1, "read_coils", 1, MAX_READ_COILS, packed)
 
-  def read_input_coils(self, start_address, quantity: int, unit_id=1) -> list:
+  def read_input_coils(self, start_address, quantity: int, unit_id=1, packed=False) -> list:
     """读线圈
 
     Args:
         start_address : 要读取的起始地址
         quantity (int): 要读取的数量
         unit_id (int, optional): 设备地址（slave_id）= 1
+        packed (bool, optional): 返回打包的字节（低位在前）而不是列表 = False
 
     Returns:
         list: 读取到的对应的线圈的值
     """
 
-    self.__func = "read_input_coils"
-    sock = self.__sockets.get_socket()
-    return self.__threads.run(self.__read_coil, sock, start_address, quantity, unit_id, 2)
+    read = partial(self.__read_coil, packed=packed)
+    return self.__read_split(read, start_address, quantity, unit_id, 2, "read_input_coils", 1, MAX_READ_COILS, packed)
+
+  def read_raw(self, start_address, count: int, unit_id=1, function_code=3) -> bytes:
+    """读取原始数据，不做解码
+
+    Args:
+        start_address : 要读取的起始地址
+        count (int): 寄存器（线圈）数量
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        function_code (int, optional): 读功能码 1/2/3/4 = 3
+
+    Returns:
+        bytes: 响应中的数据部分
+    """
+
+    return self.__threads.run(self.__read_raw, start_address, count, unit_id, function_code, "read_raw")
+
+  def read_holding_registers_batch(self, requests: list, unit_id=1, max_gap=0) -> list:
+    """批量读保持寄存器，相邻的请求合并为尽量少的帧
+
+    Args:
+        requests (list): [(起始地址, 数量), ...]
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        max_gap (int, optional): 合并时允许多读的空隙寄存器数 = 0
+
+    Returns:
+        list: 与 requests 一一对应的读取结果
+    """
+
+    return self.__read_batch(requests, unit_id, 3, "read_holding_registers", max_gap)
+
+  def read_input_registers_batch(self, requests: list, unit_id=1, max_gap=0) -> list:
+    """批量读输入寄存器，相邻的请求合并为尽量少的帧
+
+    Args:
+        requests (list): [(起始地址, 数量), ...]
+        unit_id (int, optional): 设备地址（slave_id）= 1
+        max_gap (int, optional): 合并时允许多读的空隙寄存器数 = 0
+
+    Returns:
+        list: 与 requests 一一对应的读取结果
+    """
+
+    return self.__read_batch(requests, unit_id, 4, "read_input_registers", max_gap)
 
   def write_multiple_registers(self, start_address, value: list, unit_id=1) -> None:
     """写多个寄存器
@@ -405,14 +504,10 @@ class ModbusTcpClient:
         unit_id (int, optional): 设备地址（slave_id）= 1
 
     Returns:
-        bool: True
+        str: 写入结果；wait_writed 为 False 时返回 Future
     """
 
-    self.__func = "write_multiple_registers"
-    sock = self.__sockets.get_socket()
-    if self.__wait_writed:
-      return self.__threads.run(self.__write_register, sock, start_address, value, unit_id, function_code=16)
-    return self.__threads.submit(self.__write_register, sock, start_address, value, unit_id, function_code=16)
+    return self.__write(self.__write_register, start_address, value, unit_id, "write_multiple_registers")
 
   def write_single_registers(self, address, value: int, unit_id=1) -> None:
     """写单个寄存器
@@ -423,14 +518,10 @@ class ModbusTcpClient:
         unit_id (int, optional): 设备地址（slave_id）= 1
 
     Returns:
-        bool: True
+        str: 写入结果；wait_writed 为 False 时返回 Future
     """
 
-    self.__func = "write_single_registers"
-    sock = self.__sockets.get_socket()
-    if self.__wait_writed:
-      return self.__threads.run(self.__write_register, sock, address, (value,), unit_id, function_code=16)
-    return self.__threads.submit(self.__write_register, sock, address, (value,), unit_id, function_code=16)
+    return self.__write(self.__write_register, address, (value,), unit_id, "write_single_registers")
 
   def write_multiple_coils(self, start_address, value: list, unit_id=1) -> None:
     """写多个线圈
@@ -441,14 +532,10 @@ class ModbusTcpClient:
         unit_id (int, optional): 设备地址（slave_id）= 1
 
     Returns:
-        bool: True
+        str: 写入结果；wait_writed 为 False 时返回 Future
     """
 
-    self.__func = "write_multiple_coils"
-    sock = self.__sockets.get_socket()
-    if self.__wait_writed:
-      return self.__threads.run(self.__write_coils, sock, start_address, value, unit_id)
-    return self.__threads.submit(self.__write_coils, sock, start_address, value, unit_id)
+    return self.__write(self.__write_coils, start_address, value, unit_id, "write_multiple_coils")
 
   def write_single_coils(self, address, value: int, unit_id=1) -> None:
     """写单个线圈
@@ -459,14 +546,84 @@ class ModbusTcpClient:
         unit_id (int, optional): 设备地址（slave_id）= 1
 
     Returns:
-        bool: True
+        str: 写入结果；wait_writed 为 False 时返回 Future
     """
 
-    self.__func = "write_single_coils"
-    sock = self.__sockets.get_socket()
-    if self.__wait_writed:
-      return self.__threads.run(self.__write_coils, sock, address, (value,), unit_id)
-    return self.__threads.submit(self.__write_coils, sock, address, (value,), unit_id)
+    return self.__write(self.__write_coils, address, (value,), unit_id, "write_single_coils")
+
+  def read_write_registers(self, read_address, read_quantity: int, write_address, value: list, unit_id=1):
+    """读写多个寄存器（功能码 23），在一次往返中先写入再读取
+
+    Args:
+        read_address : 要读取的起始地址
+        read_quantity (int): 要读取的数量
+        write_address : 要写入的起始地址
+        value (list): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        list: 读取到的对应的寄存器的值
+    """
+
+    return self.__threads.run(
+      self.__read_write, read_address, read_quantity, write_address, value, unit_id, "read_write_registers"
+    )
+
+  def mask_write_register(self, address, and_mask: int, or_mask: int, unit_id=1):
+    """屏蔽写寄存器（功能码 22），由设备完成读-改-写：结果 = (当前值 & and_mask) | (or_mask & ~and_mask)
+
+    Args:
+        address : 要写入的地址
+        and_mask (int): 与掩码，为 1 的位保持不变
+        or_mask (int): 或掩码
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        str: 写入结果；wait_writed 为 False 时返回 Future
+    """
+
+    return self.__write(self.__mask_write, address, and_mask & 0xFFFF, or_mask & 0xFFFF, unit_id, "mask_write_register")
+
+  def write_register_bit(self, address, bit: int, value: bool, unit_id=1):
+    """通过屏蔽写寄存器（功能码 22）设置寄存器中的单个位，不影响其它位
+
+    Args:
+        address : 寄存器地址
+        bit (int): 位序号 0-15，0 为最低位
+        value (bool): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        str: 写入结果；wait_writed 为 False 时返回 Future
+    """
+
+    if not 0 <= bit <= 15:
+      raise ValueError("bit must be in 0-15")
+    return self.mask_write_register(address, ~(1 << bit), (1 << bit) if value else 0, unit_id)
+
+  def write_raw(self, start_address, data: bytes, unit_id=1):
+    """以功能码 16 写入原始数据（大端寄存器字节），不做编码
+
+    Args:
+        start_address : 要写入的起始地址
+        data (bytes): 要写入的字节，长度为偶数
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        str: 写入结果；wait_writed 为 False 时返回 Future
+    """
+
+    if len(data) % 2:
+      raise ValueError("Register data must have an even length")
+    return self.__write(self.__write_raw, start_address, bytes(data), unit_id, "write_raw")
+
+  def flush(self) -> list:
+    """等待 wait_writed 为 False 时提交的写入全部完成
+
+    Returns:
+        list: 各个写入的结果，出错时为异常
+    """
+    return self.__threads.gather_results()
 
   @property
   def wait_writed(self):
@@ -475,3 +632,24 @@ class ModbusTcpClient:
   @wait_writed.setter
   def wait_writed(self, data: bool):
     self.__wait_writed = data
+
+  @property
+  def data_format(self):
+    return self.__data_format
+
+  @property
+  def metrics(self) -> Metrics:
+    return self.__metrics
+
+  @property
+  def cache(self) -> RegisterCache:
+    return self.__cache
+
+  @property
+  def rtt(self) -> RttEstimator:
+    """往返时间估计，未启用自适应超时和对冲请求时为 None"""
+    return self.__rtt
+
+  def pool_stats(self) -> dict:
+    """连接池统计信息"""
+    return self.__sockets.stats()
@@ -0,0 +1,99 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 14:05:12
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 14:05:12
+# @ Description: 请求拆分与合并
+"""
+
+from itertools import chain
+from typing import NamedTuple
+
+# 协议规定的单帧上限
+MAX_READ_REGISTERS = 125
+MAX_READ_COILS = 2000
+MAX_WRITE_REGISTERS = 123
+MAX_WRITE_COILS = 1968
+# 功能码 23 中写入部分的上限
+MAX_READ_WRITE_REGISTERS = 121
+
+
+class Block(NamedTuple):
+  # 起始地址
+  start: int
+  # 寄存器（或线圈）数量
+  count: int
+  # 合并进该帧的原始请求下标
+  members: list
+
+
+def split_range(start_address: int, quantity: int, words: int = 1, limit: int = MAX_READ_REGISTERS) -> list:
+  """将超过单帧上限的读请求拆分为多个帧，单个值不会跨帧
+
+  Args:
+      start_address (int): 起始地址
+      quantity (int): 值的数量
+      words (int, optional): 每个值占用的寄存器数。Defaults to 1.
+      limit (int, optional): 单帧最多的寄存器（线圈）数。Defaults to MAX_READ_REGISTERS.
+
+  Returns:
+      list: [(起始地址, 值的数量), ...]
+  """
+  per_frame = limit // words
+  if per_frame < 1:
+    raise ValueError(f"A single value of {words} registers exceeds the frame limit {limit}")
+  chunks = []
+  address = start_address
+  while quantity > 0:
+    count = min(per_frame, quantity)
+    chunks.append((address, count))
+    address += count * words
+    quantity -= count
+  return chunks
+
+
+def coalesce(ranges: list, max_gap: int = 0, limit: int = MAX_READ_REGISTERS) -> list[Block]:
+  """将相邻（或间隔不超过 max_gap）的读请求合并为尽量少的帧
+
+  Args:
+      ranges (list): [(起始地址, 寄存器数量), ...]
+      max_gap (int, optional): 允许合并时多读的空隙寄存器数。Defaults to 0.
+      limit (int, optional): 单帧最多的寄存器（线圈）数。Defaults to MAX_READ_REGISTERS.
+
+  Returns:
+      list[Block]: 合并后的帧，按地址升序
+  """
+  blocks = []
+  start = end = None
+  members = []
+  for index in sorted(range(len(ranges)), key=lambda i: ranges[i][0]):
+    address, count = ranges[index]
+    if count > limit:
+      raise ValueError(f"Range at {address} with {count} items exceeds the frame limit {limit}")
+    if start is not None and address <= end + max_gap and max(end, address + count) - start <= limit:
+      end = max(end, address + count)
+      members.append(index)
+      continue
+    if start is not None:
+      blocks.append(Block(start, end - start, members))
+    start, end, members = address, address + count, [index]
+  if start is not None:
+    blocks.append(Block(start, end - start, members))
+  return blocks
+
+
+def join_chunks(parts: list):
+  """按顺序拼接拆分后各帧的结果，保持与单帧读取相同的返回类型"""
+  if len(parts) == 1:
+    return parts[0]
+  if isinstance(parts[0], tuple):
+    return tuple(chain.from_iterable(parts))
+  if isinstance(parts[0], list):
+    return list(chain.from_iterable(parts))
+  if isinstance(parts[0], bytes):
+    # 打包的线圈，拆分时除最后一帧外都是 8 的整数倍，可以直接拼接
+    return b"".join(parts)
+  # numpy 数组
+  import numpy as np
+
+  return np.concatenate(parts)
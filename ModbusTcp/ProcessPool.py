@@ -0,0 +1,406 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 22:31:04
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 22:31:04
+# @ Description: 多进程轮询
+"""
+
+import asyncio
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Iterator, NamedTuple
+
+from ModbusTcp.ModbusAsyncio import AsyncModbusTcpClient
+from ModbusTcp.Scheduler import ScanResult, Scheduler
+from ModbusTcp.TagMap import TagMap
+from ModbusTcp.ulitis import LOGGER
+
+# 环形缓冲区头部：写入序号、心跳时间、工作进程 pid
+RING_HEADER = struct.Struct("<Qdq")
+RING_HEADER_SIZE = 64
+# 每条记录的头部：序号（写入完成后为 index + 1）、设备序号、状态、时间戳、耗时、错误类型名
+SLOT_HEADER = struct.Struct("<QIIdd48s")
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+class PoolResult(NamedTuple):
+  # 设备名
+  device: str
+  # 本周期开始时的墙上时间
+  timestamp: float
+  # {点名: 值}，出错时为 None
+  values: dict | None
+  # 出错时为异常类型名
+  error: str | None
+  # 本周期耗时（秒）
+  duration: float
+
+
+class _DeviceSpec(NamedTuple):
+  name: str
+  host: str
+  port: int
+  tag_map: TagMap
+  interval: float
+  client_kwargs: dict
+
+
+def _column_codes(tag_map: TagMap) -> list[str]:
+  """每个值占 8 字节：浮点数为 d，无符号 64 位整数为 Q，其它整数（包括线圈）为 q"""
+  codes = []
+  for tag in tag_map.tags:
+    name = tag.data_format.name
+    if tag.function_code <= 2:
+      code = "q"
+    elif name.startswith(("FLOAT", "DOUBLE")):
+      code = "d"
+    elif name.startswith("UNSIGNED_64"):
+      code = "Q"
+    else:
+      code = "q"
+    codes.extend(code * tag.quantity)
+  return codes
+
+
+class SharedRing:
+  def __init__(self, capacity: int, width: int, name: str = None):
+    """单生产者、单消费者的共享内存环形缓冲区，每条记录为定长的二进制行，不经过 pickle
+
+    生产者最后写入记录的序号，消费者复制记录前后各检查一次序号（seqlock），被覆盖的记录计为丢弃。
+
+    Args:
+        capacity (int): 记录条数
+        width (int): 每条记录的值个数（每个 8 字节）
+        name (str, optional): 已有共享内存的名字，None 时新建。Defaults to None.
+    """
+    self.capacity = capacity
+    self.width = width
+    self.slot_size = SLOT_HEADER.size + 8 * width
+    size = RING_HEADER_SIZE + capacity * self.slot_size
+    self.owner = name is None
+    self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+    self.buf = self.shm.buf
+    self.read_index = self.write_index
+    self.dropped = 0
+
+  @property
+  def name(self) -> str:
+    return self.shm.name
+
+  @property
+  def write_index(self) -> int:
+    return RING_HEADER.unpack_from(self.buf, 0)[0]
+
+  @property
+  def heartbeat(self) -> float:
+    return RING_HEADER.unpack_from(self.buf, 0)[1]
+
+  def beat(self, pid: int):
+    struct.pack_into("<dq", self.buf, 8, time.time(), pid)
+
+  def put(self, device: int, status: int, timestamp: float, duration: float, error: str, values_struct, values):
+    """写入一条记录（仅生产者调用），缓冲区满时覆盖最旧的记录"""
+    index = self.write_index
+    offset = RING_HEADER_SIZE + (index % self.capacity) * self.slot_size
+    # 序号先清零，消费者读到 0 时知道该记录正在写入
+    struct.pack_into("<Q", self.buf, offset, 0)
+    SLOT_HEADER.pack_into(
+      self.buf, offset, 0, device, status, timestamp, duration, error.encode("utf-8", "replace")[:48]
+    )
+    if values is not None:
+      values_struct.pack_into(self.buf, offset + SLOT_HEADER.size, *values)
+    struct.pack_into("<Q", self.buf, offset, index + 1)
+    struct.pack_into("<Q", self.buf, 0, index + 1)
+
+  def get(self) -> tuple | None:
+    """读取下一条记录（仅消费者调用），没有新记录时返回 None
+
+    Returns:
+        tuple: (设备序号, 状态, 时间戳, 耗时, 错误类型名, 值的字节)
+    """
+    while True:
+      write_index = self.write_index
+      if self.read_index >= write_index:
+        return None
+      if write_index - self.read_index > self.capacity:
+        # 消费太慢，最旧的记录已被覆盖
+        self.dropped += write_index - self.capacity - self.read_index
+        self.read_index = write_index - self.capacity
+      offset = RING_HEADER_SIZE + (self.read_index % self.capacity) * self.slot_size
+      slot = bytes(self.buf[offset : offset + self.slot_size])
+      sequence, device, status, timestamp, duration, error = SLOT_HEADER.unpack_from(slot)
+      current = struct.unpack_from("<Q", self.buf, offset)[0]
+      self.read_index += 1
+      if sequence != self.read_index or current != sequence:
+        # 复制期间被生产者覆盖
+        self.dropped += 1
+        continue
+      return device, status, timestamp, duration, error.rstrip(b"\x00").decode("utf-8"), slot[SLOT_HEADER.size :]
+
+  def close(self):
+    self.buf = None
+    self.shm.close()
+    if self.owner:
+      self.shm.unlink()
+
+
+async def _poll_shard(ring: SharedRing, devices: list, stop):
+  scheduler = Scheduler(queue_size=1)
+  clients = []
+  connected = set()
+  for index, spec in devices:
+    client = AsyncModbusTcpClient(spec.host, spec.port, **spec.client_kwargs)
+    clients.append(client)
+    values_struct = struct.Struct("<" + "".join(_column_codes(spec.tag_map)))
+    scheduler.add_group(
+      spec.name,
+      spec.interval,
+      lambda client=client, spec=spec: _scan(client, spec.tag_map, connected),
+      lambda result, index=index, spec=spec, values_struct=values_struct: _publish(
+        ring, index, spec.tag_map, values_struct, result
+      ),
+    )
+  scheduler.start()
+  try:
+    pid = multiprocessing.current_process().pid
+    while not stop.is_set():
+      ring.beat(pid)
+      await asyncio.sleep(0.2)
+  finally:
+    await scheduler.stop()
+    await asyncio.gather(*[client.disconnect() for client in clients], return_exceptions=True)
+
+
+async def _scan(client: AsyncModbusTcpClient, tag_map: TagMap, connected: set) -> dict:
+  # 连接失败时在下一个周期重试
+  if client not in connected:
+    await client.connect()
+    connected.add(client)
+  return await tag_map.scan_async(client)
+
+
+def _publish(ring: SharedRing, index: int, tag_map: TagMap, values_struct: struct.Struct, result: ScanResult):
+  if result.error is not None:
+    ring.put(index, STATUS_ERROR, result.timestamp, result.duration, type(result.error).__name__, None, None)
+    return
+  values = []
+  for tag in tag_map.tags:
+    value = result.value[tag.name]
+    if tag.quantity == 1:
+      values.append(value)
+    else:
+      values.extend(value)
+  ring.put(index, STATUS_OK, result.timestamp, result.duration, "", values_struct, values)
+
+
+def _worker_main(ring_name: str, capacity: int, width: int, devices: list, stop):
+  """工作进程入口：在独立的事件循环中轮询分到的设备，解码后的值写入共享内存"""
+  ring = SharedRing(capacity, width, ring_name)
+  try:
+    asyncio.run(_poll_shard(ring, devices, stop))
+  except KeyboardInterrupt:
+    pass
+  finally:
+    ring.close()
+
+
+class _Worker:
+  __slots__ = ("index", "devices", "ring", "process", "stop", "restarts", "started", "next_start")
+
+  def __init__(self, index, devices, ring):
+    self.index = index
+    self.devices = devices
+    self.ring = ring
+    self.process: multiprocessing.Process = None
+    self.stop = None
+    self.restarts = 0
+    self.started = 0.0
+    self.next_start = 0.0
+
+
+class ProcessPool:
+  def __init__(self, workers: int = None, capacity: int = 4096, **kwargs):
+    """多进程轮询：设备分片到多个工作进程，每个进程运行自己的事件循环并完成解码，绕开 GIL
+
+    解码后的值通过每个进程一个的共享内存环形缓冲区返回父进程；工作进程崩溃或心跳超时时自动重启。
+
+    Args:
+        workers (int, optional): 工作进程数，默认为 CPU 核数。Defaults to None.
+        capacity (int, optional): 每个环形缓冲区的记录条数，父进程读取不及时时覆盖最旧的记录。Defaults to 4096.
+        start_method (str, optional): 进程启动方式 "fork" / "spawn" / "forkserver"，默认使用平台默认值。
+        heartbeat_timeout (float, optional): 超过该时间没有心跳的工作进程被终止并重启（秒）。Defaults to 10.
+        restart_backoff (float, optional): 短时间内反复崩溃时的初始重启间隔（秒），之后逐次翻倍。Defaults to 1.
+        max_backoff (float, optional): 重启间隔上限（秒）。Defaults to 30.
+    """
+    self.workers = workers or multiprocessing.cpu_count()
+    self.capacity = capacity
+    self.heartbeat_timeout = kwargs.get("heartbeat_timeout", 10)
+    self.restart_backoff = kwargs.get("restart_backoff", 1)
+    self.max_backoff = kwargs.get("max_backoff", 30)
+    self.__context = multiprocessing.get_context(kwargs.get("start_method"))
+    self.__devices: list[_DeviceSpec] = []
+    self.__columns: list[tuple] = []
+    self.__workers: list[_Worker] = []
+    self.__next_worker = 0
+    self.__closed = threading.Event()
+    self.__supervisor: threading.Thread = None
+    self.__lock = threading.Lock()
+
+  def __enter__(self):
+    self.start()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.stop()
+    return False
+
+  def add_device(self, name: str, host: str, port: int, tags, interval: float, **client_kwargs):
+    """添加设备，必须在 start 之前调用
+
+    Args:
+        name (str): 设备名
+        host (str): 服务器地址
+        port (int): 服务器端口号
+        tags (TagMap | list[Tag]): 点表
+        interval (float): 轮询周期（秒）
+        client_kwargs: 传给 AsyncModbusTcpClient 的参数（需要能被 pickle），例如 framer、timeout、sockts
+    """
+    if self.__workers:
+      raise RuntimeError("Devices must be added before the pool is started")
+    if any(spec.name == name for spec in self.__devices):
+      raise ValueError(f"Device {name} already exists")
+    tag_map = tags if isinstance(tags, TagMap) else TagMap(tags)
+    codes = _column_codes(tag_map)
+    self.__devices.append(_DeviceSpec(name, host, port, tag_map, interval, client_kwargs))
+    self.__columns.append((tag_map.tags, struct.Struct("<" + "".join(codes)), len(codes)))
+
+  def start(self):
+    """按设备顺序轮流分片到各个工作进程并启动"""
+    shards = [[] for _ in range(min(self.workers, len(self.__devices)))]
+    for index, spec in enumerate(self.__devices):
+      shards[index % len(shards)].append((index, spec))
+    for index, devices in enumerate(shards):
+      width = max(self.__columns[device][2] for device, _ in devices)
+      worker = _Worker(index, devices, SharedRing(self.capacity, width))
+      self.__workers.append(worker)
+      self.__spawn(worker)
+    self.__closed.clear()
+    self.__supervisor = threading.Thread(target=self.__supervise, name="process-pool-supervisor", daemon=True)
+    self.__supervisor.start()
+
+  def __spawn(self, worker: _Worker):
+    worker.stop = self.__context.Event()
+    # 新进程从当前的心跳开始计时
+    worker.ring.beat(0)
+    worker.process = self.__context.Process(
+      target=_worker_main,
+      args=(worker.ring.name, worker.ring.capacity, worker.ring.width, worker.devices, worker.stop),
+      name=f"modbus-poll-{worker.index}",
+      daemon=True,
+    )
+    worker.process.start()
+    worker.started = time.monotonic()
+    LOGGER.info(f"Started poll worker {worker.index} (pid {worker.process.pid}) with {len(worker.devices)} devices")
+
+  def __supervise(self):
+    while not self.__closed.wait(0.5):
+      with self.__lock:
+        for worker in self.__workers:
+          self.__check(worker)
+
+  def __check(self, worker: _Worker):
+    process = worker.process
+    if process.is_alive():
+      if time.time() - worker.ring.heartbeat > self.heartbeat_timeout:
+        LOGGER.error(f"Poll worker {worker.index} (pid {process.pid}) missed its heartbeat, killing")
+        # 卡住（甚至被暂停）的进程可能不响应 SIGTERM
+        process.kill()
+        process.join(1)
+      return
+    now = time.monotonic()
+    if not worker.next_start:
+      LOGGER.error(f"Poll worker {worker.index} (pid {process.pid}) exited with code {process.exitcode}")
+      # 运行不到 backoff 上限就崩溃时逐次加长重启间隔，运行较久后恢复为立即重启
+      if now - worker.started < self.max_backoff and worker.restarts:
+        delay = min(self.max_backoff, self.restart_backoff * 2 ** (worker.restarts - 1))
+      else:
+        delay = 0.0
+      worker.next_start = now + delay
+    if now >= worker.next_start:
+      worker.restarts += 1
+      worker.next_start = 0.0
+      self.__spawn(worker)
+
+  def read(self, max_items: int = None) -> list[PoolResult]:
+    """读取各工作进程已写入的结果，不等待"""
+    results = []
+    for worker in self.__workers:
+      while max_items is None or len(results) < max_items:
+        record = worker.ring.get()
+        if record is None:
+          break
+        results.append(self.__decode(*record))
+    return results
+
+  def __iter__(self) -> Iterator[PoolResult]:
+    """阻塞迭代结果，直到 stop"""
+    while not self.__closed.is_set():
+      results = self.read()
+      if not results:
+        time.sleep(0.005)
+      yield from results
+
+  def __decode(self, device, status, timestamp, duration, error, data) -> PoolResult:
+    spec = self.__devices[device]
+    if status != STATUS_OK:
+      return PoolResult(spec.name, timestamp, None, error, duration)
+    tags, values_struct, _ = self.__columns[device]
+    flat = values_struct.unpack_from(data)
+    values: dict[str, Any] = {}
+    position = 0
+    for tag in tags:
+      if tag.quantity == 1:
+        values[tag.name] = flat[position]
+      else:
+        values[tag.name] = flat[position : position + tag.quantity]
+      position += tag.quantity
+    return PoolResult(spec.name, timestamp, values, None, duration)
+
+  def stats(self) -> list[dict]:
+    """各工作进程的状态"""
+    now = time.time()
+    return [
+      {
+        "worker": worker.index,
+        "pid": worker.process.pid,
+        "alive": worker.process.is_alive(),
+        "devices": [spec.name for _, spec in worker.devices],
+        "restarts": worker.restarts,
+        "written": worker.ring.write_index,
+        "dropped": worker.ring.dropped,
+        "heartbeat_age": now - worker.ring.heartbeat,
+      }
+      for worker in self.__workers
+    ]
+
+  def stop(self, timeout: float = 5):
+    """停止所有工作进程并释放共享内存"""
+    self.__closed.set()
+    if self.__supervisor is not None:
+      self.__supervisor.join()
+    with self.__lock:
+      for worker in self.__workers:
+        worker.stop.set()
+      for worker in self.__workers:
+        worker.process.join(timeout)
+        if worker.process.is_alive():
+          worker.process.kill()
+          worker.process.join()
+        worker.ring.close()
+      self.__workers = []
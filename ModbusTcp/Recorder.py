@@ -0,0 +1,363 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 20:31:09
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 20:31:09
+# @ Description: 时序数据记录（列式、分块压缩）
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+
+from ModbusTcp.Codec import decode_array, get_codec, load_numpy
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.TagMap import ReadBlock, Tag, TagMap
+from ModbusTcp.ulitis import LOGGER
+
+MAGIC = b"MBREC\x00\x01\x00"
+CHUNK_MAGIC = b"CHNK"
+# 块头：标记、行数、第一行和最后一行的时间戳
+CHUNK_HEADER = struct.Struct("<4sIdd")
+TIMESTAMP = struct.Struct("<d")
+
+
+def _shuffle(data: bytes, width: int) -> bytes:
+  """按字节位置重排（所有值的第 0 个字节、第 1 个字节……），缓慢变化的数据压缩率更高"""
+  if width == 1:
+    return bytes(data)
+  return b"".join(data[i::width] for i in range(width))
+
+
+def _unshuffle(data: bytes, width: int) -> bytes:
+  if width == 1:
+    return data
+  rows = len(data) // width
+  out = bytearray(len(data))
+  for i in range(width):
+    out[i::width] = data[i * rows : (i + 1) * rows]
+  return bytes(out)
+
+
+class _Chunk:
+  __slots__ = ("offset", "rows", "first", "last", "sizes")
+
+  def __init__(self, offset, rows, first, last, sizes):
+    self.offset = offset
+    self.rows = rows
+    self.first = first
+    self.last = last
+    self.sizes = sizes
+
+
+def _scan_chunks(buffer, offset: int, columns: int) -> tuple:
+  """从 offset 开始依次解析块头，在不完整的块（写入中途进程退出）处停止
+
+  Args:
+      buffer: 文件内容（mmap）
+      offset (int): 第一个块的偏移
+      columns (int): 点的列数
+
+  Returns:
+      tuple: (完整的块列表, 最后一个完整块的结束偏移, 是否遇到块标记不符的数据)
+  """
+  chunks = []
+  count = columns + 1
+  size = len(buffer)
+  while offset + CHUNK_HEADER.size + 4 * count <= size:
+    magic, rows, first, last = CHUNK_HEADER.unpack_from(buffer, offset)
+    if magic != CHUNK_MAGIC:
+      return chunks, offset, True
+    sizes = struct.unpack_from(f"<{count}I", buffer, offset + CHUNK_HEADER.size)
+    end = offset + CHUNK_HEADER.size + 4 * count + sum(sizes)
+    if end > size:
+      break
+    chunks.append(_Chunk(offset + CHUNK_HEADER.size + 4 * count, rows, first, last, sizes))
+    offset = end
+  return chunks, offset, False
+
+
+class _Column:
+  __slots__ = ("name", "data_format", "bits", "quantity", "width")
+
+  def __init__(self, tag: Tag):
+    self.name = tag.name
+    self.data_format = tag.data_format
+    self.bits = tag.function_code <= 2
+    self.quantity = tag.quantity
+    # 每行占用的字节数：寄存器为报文中的原始字节，线圈每个位一个字节
+    self.width = tag.quantity if self.bits else tag.size * 2
+
+  def value_width(self) -> int:
+    return 1 if self.bits else self.width // self.quantity
+
+  def describe(self) -> dict:
+    return {"name": self.name, "data_format": self.data_format.name, "bits": self.bits, "quantity": self.quantity}
+
+
+class Recorder:
+  def __init__(self, path: str, tags, chunk_rows: int = 4096, level: int = 6):
+    """把点表的扫描结果追加写入列式文件：一列时间戳加每个点一列，按块压缩
+
+    寄存器按报文中的原始字节保存，记录时不需要解码；用 RecordReader 按时间范围读取。
+
+    Args:
+        path (str): 文件路径，文件已存在时追加（点表必须一致），上次未写完的最后一块会被截断
+        tags (TagMap | list[Tag]): 点表
+        chunk_rows (int, optional): 每块的行数，缓冲的行数达到后压缩写入。Defaults to 4096.
+        level (int, optional): zlib 压缩级别。Defaults to 6.
+    """
+    self.tag_map = tags if isinstance(tags, TagMap) else TagMap(tags)
+    self.columns = [_Column(tag) for tag in self.tag_map.tags]
+    self.chunk_rows = chunk_rows
+    self.level = level
+    self.path = path
+    self.__index = {column.name: i for i, column in enumerate(self.columns)}
+    self.__timestamps = bytearray()
+    self.__buffers = [bytearray() for _ in self.columns]
+    self.__rows = 0
+    self.__first = self.__last = 0.0
+    self.rows = 0
+
+    header = json.dumps({"columns": [column.describe() for column in self.columns]}).encode()
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+      with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+          raise ValueError(f"{path} is not a recorder file")
+        (length,) = struct.unpack("<I", f.read(4))
+        if json.loads(f.read(length)) != json.loads(header):
+          raise ValueError(f"Tags of {path} do not match")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+          _, end, corrupted = _scan_chunks(data, len(MAGIC) + 4 + length, len(self.columns))
+          size = len(data)
+      self.__file = open(path, "r+b")
+      if end < size:
+        # 上次写入中途退出留下的不完整块：截断后再追加，否则之后写入的块都无法读取
+        LOGGER.warning(
+          f"Truncate {size - end} bytes of {'corrupted' if corrupted else 'incomplete'} chunk at offset {end} of {path}"
+        )
+        self.__file.truncate(end)
+      self.__file.seek(end)
+    else:
+      self.__file = open(path, "wb")
+      self.__file.write(MAGIC + struct.pack("<I", len(header)) + header)
+      self.__file.flush()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def __append_row(self, timestamp):
+    if self.__rows == 0:
+      self.__first = timestamp
+    self.__last = timestamp
+    self.__timestamps += TIMESTAMP.pack(timestamp)
+    self.__rows += 1
+    self.rows += 1
+    if self.__rows >= self.chunk_rows:
+      self.flush()
+
+  def record(self, values: dict, timestamp: float = None):
+    """记录一行解码后的值，例如 TagMap.scan 或 Scheduler 的结果
+
+    Args:
+        values (dict): {点名: 值}，必须包含所有点
+        timestamp (float, optional): 时间戳（秒），默认当前时间；同一文件中应单调不减
+    """
+    for column, buffer in zip(self.columns, self.__buffers, strict=True):
+      value = values[column.name]
+      items = (value,) if column.quantity == 1 else value
+      if column.bits:
+        buffer += bytes(1 if item else 0 for item in items)
+      else:
+        buffer += get_codec(column.data_format, column.quantity).encode(items)
+    self.__append_row(time.time() if timestamp is None else timestamp)
+
+  def record_frames(self, payloads: list, timestamp: float = None):
+    """记录一行原始响应数据，不做解码
+
+    Args:
+        payloads (list): 与 tag_map.plan 一一对应的各帧响应数据部分（read_raw 的返回值）
+        timestamp (float, optional): 时间戳（秒），默认当前时间
+    """
+    for block, payload in zip(self.tag_map.plan, payloads, strict=True):
+      self.__record_block(block, payload)
+    self.__append_row(time.time() if timestamp is None else timestamp)
+
+  def __record_block(self, block: ReadBlock, payload):
+    for tag in block.tags:
+      buffer = self.__buffers[self.__index[tag.name]]
+      offset = tag.address - block.start
+      if block.function_code <= 2:
+        buffer += bytes((payload[(offset + i) // 8] >> ((offset + i) % 8)) & 1 for i in range(tag.quantity))
+      else:
+        buffer += payload[offset * 2 : (offset + tag.size) * 2]
+
+  def scan(self, client, timestamp: float = None):
+    """使用 ModbusTcpClient 扫描点表并记录原始数据"""
+    timestamp = time.time() if timestamp is None else timestamp
+    payloads = [
+      client.read_raw(block.start, block.count, block.unit_id, block.function_code) for block in self.tag_map.plan
+    ]
+    self.record_frames(payloads, timestamp)
+
+  async def scan_async(self, client, timestamp: float = None):
+    """使用 AsyncModbusTcpClient 扫描点表并记录原始数据，各帧并发读取"""
+    timestamp = time.time() if timestamp is None else timestamp
+    payloads = await asyncio.gather(
+      *[client.read_raw(block.start, block.count, block.unit_id, block.function_code) for block in self.tag_map.plan]
+    )
+    self.record_frames(payloads, timestamp)
+
+  def flush(self):
+    """压缩缓冲的行并写入一个块"""
+    if not self.__rows:
+      return
+    blobs = [zlib.compress(_shuffle(self.__timestamps, TIMESTAMP.size), self.level)]
+    for column, buffer in zip(self.columns, self.__buffers, strict=True):
+      blobs.append(zlib.compress(_shuffle(buffer, column.value_width()), self.level))
+    chunk = CHUNK_HEADER.pack(CHUNK_MAGIC, self.__rows, self.__first, self.__last)
+    chunk += struct.pack(f"<{len(blobs)}I", *[len(blob) for blob in blobs])
+    # 整块一次写入，进程中途退出时读取方忽略不完整的最后一块
+    self.__file.write(chunk + b"".join(blobs))
+    self.__file.flush()
+    self.__timestamps = bytearray()
+    self.__buffers = [bytearray() for _ in self.columns]
+    self.__rows = 0
+
+  def close(self):
+    if self.__file.closed:
+      return
+    self.flush()
+    self.__file.close()
+
+
+class RecordReader:
+  def __init__(self, path: str):
+    """按时间范围读取 Recorder 写入的文件
+
+    文件以内存映射打开，打开时只读取各块的块头建立索引，读取时只解压与时间范围重叠的块和需要的列。
+
+    Args:
+        path (str): 文件路径
+    """
+    self.path = path
+    self.__file = open(path, "rb")
+    self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+    if self.__mmap[: len(MAGIC)] != MAGIC:
+      raise ValueError(f"{path} is not a recorder file")
+    (length,) = struct.unpack_from("<I", self.__mmap, len(MAGIC))
+    self.__data_offset = len(MAGIC) + 4 + length
+    self.columns = json.loads(self.__mmap[len(MAGIC) + 4 : self.__data_offset])["columns"]
+    for column in self.columns:
+      column["data_format"] = DataFormat[column["data_format"]]
+    self.__index = {column["name"]: i for i, column in enumerate(self.columns)}
+    self.chunks = self.__build_index(self.__data_offset)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def __build_index(self, offset) -> list[_Chunk]:
+    chunks, end, corrupted = _scan_chunks(self.__mmap, offset, len(self.columns))
+    if corrupted:
+      raise ValueError(f"Corrupted chunk at offset {end} of {self.path}")
+    return chunks
+
+  def refresh(self):
+    """重新映射文件，读取打开之后追加的块"""
+    self.__mmap.close()
+    self.__mmap = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+    self.chunks = self.__build_index(self.__data_offset)
+
+  @property
+  def rows(self) -> int:
+    return sum(chunk.rows for chunk in self.chunks)
+
+  @property
+  def time_range(self) -> tuple:
+    """(第一行时间戳, 最后一行时间戳)"""
+    if not self.chunks:
+      return None
+    return self.chunks[0].first, self.chunks[-1].last
+
+  def __blob(self, chunk: _Chunk, index: int) -> bytes:
+    start = chunk.offset + sum(chunk.sizes[:index])
+    return zlib.decompress(self.__mmap[start : start + chunk.sizes[index]])
+
+  def __decode(self, column: dict, data: bytes, rows: int, as_array: bool):
+    quantity = column["quantity"]
+    if column["bits"]:
+      if as_array:
+        values = load_numpy().frombuffer(data, dtype="u1")
+        return values if quantity == 1 else values.reshape(rows, quantity)
+      values = list(data)
+    elif as_array:
+      values = decode_array(column["data_format"], data)
+      return values if quantity == 1 else values.reshape(rows, quantity)
+    else:
+      values = get_codec(column["data_format"], rows * quantity).decode(data)
+    if quantity == 1:
+      return list(values)
+    return [tuple(values[i : i + quantity]) for i in range(0, len(values), quantity)]
+
+  def read(self, start: float = None, end: float = None, columns: list = None, numpy: bool = False) -> dict:
+    """读取时间范围 [start, end] 内的行
+
+    Args:
+        start (float, optional): 起始时间戳，None 表示从头开始
+        end (float, optional): 结束时间戳（含），None 表示到最后
+        columns (list, optional): 要读取的点名，默认全部
+        numpy (bool, optional): 以 numpy 数组返回。Defaults to False.
+
+    Returns:
+        dict: {"timestamp": [...], 点名: [...]}
+    """
+    np = load_numpy() if numpy else None
+    names = [column["name"] for column in self.columns] if columns is None else list(columns)
+    indexes = [self.__index[name] for name in names]
+    parts = {name: [] for name in ("timestamp", *names)}
+    for chunk in self.chunks:
+      if (start is not None and chunk.last < start) or (end is not None and chunk.first > end):
+        continue
+      timestamps = _unshuffle(self.__blob(chunk, 0), TIMESTAMP.size)
+      stamps = struct.unpack(f"<{chunk.rows}d", timestamps)
+      low = 0 if start is None else bisect_left(stamps, start)
+      high = chunk.rows if end is None else bisect_right(stamps, end)
+      if low >= high:
+        continue
+      rows = high - low
+      parts["timestamp"].append(
+        np.frombuffer(timestamps[low * 8 : high * 8], dtype="<f8") if numpy else list(stamps[low:high])
+      )
+      for name, index in zip(names, indexes, strict=True):
+        column = self.columns[index]
+        width = (
+          column["quantity"] if column["bits"] else get_codec(column["data_format"], column["quantity"]).byte_count
+        )
+        value_width = width // column["quantity"]
+        data = _unshuffle(self.__blob(chunk, index + 1), value_width)
+        parts[name].append(self.__decode(column, data[low * width : high * width], rows, numpy))
+
+    result = {}
+    for name, chunks in parts.items():
+      if numpy:
+        result[name] = np.concatenate(chunks) if chunks else np.empty(0)
+      else:
+        result[name] = [value for part in chunks for value in part]
+    return result
+
+  def close(self):
+    self.__mmap.close()
+    self.__file.close()
@@ -0,0 +1,90 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 21:05:52
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 21:05:52
+# @ Description: 往返时间估计与自适应超时
+"""
+
+from collections import deque
+from threading import Lock
+
+
+class RttEstimator:
+  def __init__(self, initial: float = 1.0, min_timeout: float = 0.2, max_timeout: float = 10.0, window: int = 256):
+    """按 TCP 的方法（RFC 6298）估计设备的往返时间并计算超时时间
+
+    timeout = SRTT + max(G, 4 * RTTVAR)，限制在 [min_timeout, max_timeout] 内；超时后翻倍，直到下一次成功。
+
+    Args:
+        initial (float, optional): 没有样本时的超时时间（秒）。Defaults to 1.0.
+        min_timeout (float, optional): 超时时间下限（秒）。Defaults to 0.2.
+        max_timeout (float, optional): 超时时间上限（秒）。Defaults to 10.0.
+        window (int, optional): 计算分位数时保留的最近样本数。Defaults to 256.
+    """
+    self.min_timeout = min_timeout
+    self.max_timeout = max_timeout
+    self.srtt: float = None
+    self.rttvar: float = None
+    self.rto = min(max(initial, min_timeout), max_timeout)
+    self.__samples = deque(maxlen=window)
+    self.__sorted: list = None
+    # 样本总数，窗口满了之后 len(samples) 不再变化，按它判断何时重新排序
+    self.__observed = 0
+    self.__lock = Lock()
+    # 统计
+    self.timeouts = 0
+    self.hedges = 0
+    self.hedge_wins = 0
+
+  @property
+  def timeout(self) -> float:
+    return self.rto
+
+  def observe(self, rtt: float):
+    """记录一次成功请求的往返时间（秒）"""
+    with self.__lock:
+      if self.srtt is None:
+        self.srtt = rtt
+        self.rttvar = rtt / 2
+      else:
+        self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+        self.srtt = 0.875 * self.srtt + 0.125 * rtt
+      # G 取 1ms：本地网络上 RTTVAR 可能接近 0
+      self.rto = min(max(self.srtt + max(0.001, 4 * self.rttvar), self.min_timeout), self.max_timeout)
+      self.__samples.append(rtt)
+      self.__observed += 1
+      # 分位数按需重新排序，每 16 个样本最多一次
+      if self.__observed % 16 == 0:
+        self.__sorted = None
+
+  def backoff(self):
+    """请求超时：超时时间翻倍"""
+    with self.__lock:
+      self.timeouts += 1
+      self.rto = min(self.rto * 2, self.max_timeout)
+
+  def percentile(self, q: float) -> float | None:
+    """最近样本的分位数，样本不足 16 个时返回 None"""
+    with self.__lock:
+      if len(self.__samples) < 16:
+        return None
+      if self.__sorted is None:
+        self.__sorted = sorted(self.__samples)
+      samples = self.__sorted
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+  def hedge_delay(self, q: float) -> float | None:
+    """对冲请求的等待时间：往返时间的 q 分位数，不超过当前超时时间的一半"""
+    delay = self.percentile(q)
+    return None if delay is None else min(delay, self.rto / 2)
+
+  def stats(self) -> dict:
+    return {
+      "srtt": self.srtt,
+      "rttvar": self.rttvar,
+      "timeout": self.rto,
+      "timeouts": self.timeouts,
+      "hedges": self.hedges,
+      "hedge_wins": self.hedge_wins,
+    }
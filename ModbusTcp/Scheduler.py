@@ -0,0 +1,182 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 15:20:06
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 15:20:06
+# @ Description: 周期轮询调度
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from ModbusTcp.ulitis import LOGGER
+
+
+class ScanResult(NamedTuple):
+  # 轮询组名
+  group: str
+  # 本周期开始时的墙上时间
+  timestamp: float
+  # 读取结果，出错时为 None
+  value: Any
+  # 本周期的异常
+  error: Exception | None
+  # 本周期耗时（秒）
+  duration: float
+
+
+class PollGroup:
+  def __init__(
+    self,
+    name: str,
+    interval: float,
+    job: Callable[[], Awaitable] | Callable[[], Any],
+    callback: Callable = None,
+    offset=0.0,
+    blocking: bool = False,
+  ):
+    """轮询组
+
+    Args:
+        name (str): 组名
+        interval (float): 轮询周期（秒）
+        job (Callable): 每个周期执行的协程函数，例如 lambda: client.read_holding_registers(0, 10)；
+            blocking 为 True 时为普通函数
+        callback (Callable, optional): 每个周期结束后以 ScanResult 调用。Defaults to None.
+        offset (float, optional): 首次执行的延迟，用于错开各组的请求。Defaults to 0.0.
+        blocking (bool, optional): job 是阻塞的普通函数（例如使用 ModbusTcpClient），在默认线程池中执行，
+            不阻塞事件循环；停止调度器时正在执行的 job 会运行到结束。Defaults to False.
+    """
+    if interval <= 0:
+      raise ValueError("interval must be positive")
+    self.name = name
+    self.interval = interval
+    self.job = job
+    self.callback = callback
+    self.offset = offset
+    self.blocking = blocking
+    # 统计
+    self.cycles = 0
+    self.errors = 0
+    self.overruns = 0
+    self.last_duration = 0.0
+    self.max_duration = 0.0
+
+
+class Scheduler:
+  def __init__(self, on_overrun: Callable = None, queue_size: int = 1000):
+    """基于单调时钟的轮询调度器，各组按各自周期独立运行，不会累积漂移
+
+    结果可通过各组的 callback 获取，也可以 `async for result in scheduler` 迭代。
+    调度器运行在事件循环上；同步的 ModbusTcpClient 通过 blocking=True 的轮询组（或 add_tags）在线程中执行。
+
+    Args:
+        on_overrun (Callable, optional): 周期超时时以 (PollGroup, 本周期耗时) 调用。Defaults to None.
+        queue_size (int, optional): 迭代结果队列的长度，队列满时丢弃最旧的结果。Defaults to 1000.
+    """
+    self.groups: dict[str, PollGroup] = {}
+    self.__on_overrun = on_overrun
+    self.__results: asyncio.Queue = asyncio.Queue(queue_size)
+    self.__tasks: list[asyncio.Task] = []
+
+  async def __aenter__(self):
+    self.start()
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    await self.stop()
+    return False
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self) -> ScanResult:
+    return await self.__results.get()
+
+  def add_group(
+    self, name: str, interval: float, job: Callable, callback=None, offset=0.0, blocking: bool = False
+  ) -> PollGroup:
+    """添加轮询组，参数见 PollGroup"""
+    if name in self.groups:
+      raise ValueError(f"Poll group {name} already exists")
+    group = PollGroup(name, interval, job, callback, offset, blocking)
+    self.groups[name] = group
+    if self.__tasks:
+      self.__tasks.append(asyncio.get_running_loop().create_task(self.__run_group(group)))
+    return group
+
+  def add_tags(self, name: str, interval: float, tag_map, client, callback=None, offset=0.0) -> PollGroup:
+    """以点表作为轮询组，每个周期执行一次 TagMap.scan_async；client 为 ModbusTcpClient 时在线程中执行 TagMap.scan"""
+    if asyncio.iscoroutinefunction(client.read_raw):
+      return self.add_group(name, interval, lambda: tag_map.scan_async(client), callback, offset)
+    return self.add_group(name, interval, lambda: tag_map.scan(client), callback, offset, blocking=True)
+
+  def start(self):
+    loop = asyncio.get_running_loop()
+    self.__tasks = [loop.create_task(self.__run_group(group)) for group in self.groups.values()]
+
+  async def stop(self):
+    for task in self.__tasks:
+      task.cancel()
+    await asyncio.gather(*self.__tasks, return_exceptions=True)
+    self.__tasks = []
+
+  async def run(self, duration: float = None):
+    """运行调度器，duration 为 None 时一直运行"""
+    self.start()
+    try:
+      if duration is None:
+        await asyncio.gather(*self.__tasks)
+      else:
+        await asyncio.sleep(duration)
+    finally:
+      await self.stop()
+
+  async def __deliver(self, group: PollGroup, result: ScanResult):
+    if group.callback is not None:
+      try:
+        res = group.callback(result)
+        if asyncio.iscoroutine(res):
+          await res
+      except Exception as e:
+        LOGGER.error(f"Error in callback of poll group {group.name}: {e}")
+    if self.__results.full():
+      self.__results.get_nowait()
+    self.__results.put_nowait(result)
+
+  async def __run_group(self, group: PollGroup):
+    loop = asyncio.get_running_loop()
+    # 所有截止时间都由起点和周期计算，避免 sleep 误差累积
+    start = loop.time() + group.offset
+    tick = 0
+    while True:
+      delay = start + tick * group.interval - loop.time()
+      if delay > 0:
+        await asyncio.sleep(delay)
+
+      began = loop.time()
+      timestamp = time.time()
+      value, error = None, None
+      try:
+        value = await asyncio.to_thread(group.job) if group.blocking else await group.job()
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        error = e
+        group.errors += 1
+      duration = loop.time() - began
+      group.cycles += 1
+      group.last_duration = duration
+      group.max_duration = max(group.max_duration, duration)
+      await self.__deliver(group, ScanResult(group.name, timestamp, value, error, duration))
+
+      tick += 1
+      lateness = loop.time() - (start + tick * group.interval)
+      if lateness > 0:
+        # 本周期超时，跳过已错过的周期，从下一个未到的周期继续
+        group.overruns += 1
+        tick += int(lateness // group.interval) + 1
+        LOGGER.warning(f"Poll group {group.name} overrun: cycle took {duration:.3f}s, period {group.interval}s")
+        if self.__on_overrun is not None:
+          self.__on_overrun(group, duration)
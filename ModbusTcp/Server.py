@@ -0,0 +1,290 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 17:35:54
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 17:35:54
+# @ Description: ModbusTcp 服务端（模拟器）
+"""
+
+import asyncio
+import random
+import struct
+import threading
+
+from ModbusTcp.Codec import get_codec, pack_bits, unpack_bits
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.Exceptions import ModbusError
+from ModbusTcp.Framer import Framer, get_framer
+from ModbusTcp.Planner import (
+  MAX_READ_COILS,
+  MAX_READ_REGISTERS,
+  MAX_READ_WRITE_REGISTERS,
+  MAX_WRITE_COILS,
+  MAX_WRITE_REGISTERS,
+)
+from ModbusTcp.ulitis import LOGGER
+
+
+class DataBank:
+  def __init__(self, size: int = 65536):
+    """内存中的数据区，寄存器按报文中的大端字节保存，读请求直接返回对应切片
+
+    Args:
+        size (int, optional): 每个数据区的地址数量。Defaults to 65536.
+    """
+    self.size = size
+    self.coils = bytearray(size)
+    self.discrete_inputs = bytearray(size)
+    self.holding_registers = bytearray(size * 2)
+    self.input_registers = bytearray(size * 2)
+    self.lock = threading.Lock()
+
+  def set_registers(self, address, values, data_format: DataFormat = DataFormat.SIGNED_16_INT_BIG, holding=True):
+    """按数据格式写入保持（或输入）寄存器"""
+    data = get_codec(data_format, len(values)).encode(values)
+    area = self.holding_registers if holding else self.input_registers
+    area[address * 2 : address * 2 + len(data)] = data
+
+  def get_registers(self, address, quantity, data_format: DataFormat = DataFormat.SIGNED_16_INT_BIG, holding=True):
+    """按数据格式读取保持（或输入）寄存器"""
+    codec = get_codec(data_format, quantity)
+    area = self.holding_registers if holding else self.input_registers
+    return codec.decode(area[address * 2 : address * 2 + codec.byte_count])
+
+  def set_bits(self, address, values, coils=True):
+    """写入线圈（或离散输入）"""
+    area = self.coils if coils else self.discrete_inputs
+    area[address : address + len(values)] = bytes(1 if value else 0 for value in values)
+
+  def get_bits(self, address, quantity, coils=True) -> list:
+    """读取线圈（或离散输入）"""
+    area = self.coils if coils else self.discrete_inputs
+    return list(area[address : address + quantity])
+
+
+class ModbusTcpServer:
+  def __init__(self, host: str = "127.0.0.1", port: int = 502, bank: DataBank = None, **kwargs):
+    """基于 asyncio 的 ModbusTcp 服务端，支持功能码 1/2/3/4/5/6/15/16/22/23，可用于压测、CI 和设备模拟
+
+    Args:
+        host (str, optional): 监听地址。Defaults to "127.0.0.1".
+        port (int, optional): 监听端口，0 表示随机端口。Defaults to 502.
+        bank (DataBank, optional): 数据区，默认新建。
+        unit_ids (set, optional): 响应的设备地址，None 表示全部响应。Defaults to None.
+        latency (float, optional): 每个请求的附加延迟（秒）。Defaults to 0.
+        jitter (float, optional): 附加延迟的随机抖动上限（秒）。Defaults to 0.
+        exception_rate (float, optional): 随机返回异常响应的概率。Defaults to 0.
+        exception_code (ModbusError, optional): 随机异常响应的异常码。Defaults to ModbusError.SLAVE_DEVICE_BUSY.
+        framer (str | Framer, optional): 帧格式，"rtu" 时模拟透明串口网关（RTU over TCP）。Defaults to "mbap".
+    """
+    self.host = host
+    self.port = port
+    self.bank = bank or DataBank()
+    self.unit_ids = kwargs.get("unit_ids")
+    self.latency = kwargs.get("latency", 0.0)
+    self.jitter = kwargs.get("jitter", 0.0)
+    self.exception_rate = kwargs.get("exception_rate", 0.0)
+    self.exception_code = kwargs.get("exception_code", ModbusError.SLAVE_DEVICE_BUSY)
+    self.framer: Framer = get_framer(kwargs.get("framer", "mbap"))
+    # 功能码 -> 异常码，命中的请求固定返回该异常
+    self.injected: dict[int, ModbusError] = {}
+    self.requests = 0
+    self.clients = 0
+    self.__server: asyncio.AbstractServer = None
+    self.__loop: asyncio.AbstractEventLoop = None
+    self.__handlers = {
+      1: self.__read_bits,
+      2: self.__read_bits,
+      3: self.__read_registers,
+      4: self.__read_registers,
+      5: self.__write_single_coil,
+      6: self.__write_single_register,
+      15: self.__write_coils,
+      16: self.__write_registers,
+      22: self.__mask_write_register,
+      23: self.__read_write_registers,
+    }
+
+  async def __aenter__(self):
+    await self.start()
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    await self.stop()
+    return False
+
+  def inject_exception(self, function_code: int, exception_code: ModbusError = None):
+    """指定功能码的请求固定返回异常，exception_code 为 None 时取消"""
+    if exception_code is None:
+      self.injected.pop(function_code, None)
+    else:
+      self.injected[function_code] = exception_code
+
+  async def start(self):
+    self.__loop = asyncio.get_running_loop()
+    self.__server = await asyncio.start_server(self.__handle_client, self.host, self.port, backlog=4096)
+    self.port = self.__server.sockets[0].getsockname()[1]
+    LOGGER.info(f"Modbus server listening on {self.host}:{self.port}")
+
+  async def stop(self):
+    if self.__server is not None:
+      self.__server.close()
+      await self.__server.wait_closed()
+      self.__server = None
+
+  async def serve_forever(self):
+    if self.__server is None:
+      await self.start()
+    await self.__server.serve_forever()
+
+  def start_in_thread(self) -> threading.Thread:
+    """在后台线程的事件循环中运行服务端，返回时已开始监听，供同步代码（测试、压测）使用"""
+    started = threading.Event()
+
+    async def main():
+      await self.start()
+      started.set()
+      try:
+        await self.__server.serve_forever()
+      except asyncio.CancelledError:
+        pass
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),), name=f"modbus-server-{self.port}", daemon=True)
+    thread.start()
+    started.wait()
+    return thread
+
+  def stop_in_thread(self):
+    """停止 start_in_thread 启动的服务端"""
+    if self.__loop is not None and self.__server is not None:
+      self.__loop.call_soon_threadsafe(self.__server.close)
+
+  async def __handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    self.clients += 1
+    tasks = set()
+    try:
+      while True:
+        transaction_id, unit_id, pdu = self.framer.parse_request(await self.framer.read_request(reader))
+        self.requests += 1
+        if self.unit_ids is not None and unit_id not in self.unit_ids:
+          continue
+        if self.latency or self.jitter:
+          # 有延迟时每个请求单独处理，响应可能乱序返回，便于测试按事务号分发
+          task = asyncio.ensure_future(self.__respond(writer, transaction_id, unit_id, pdu))
+          tasks.add(task)
+          task.add_done_callback(tasks.discard)
+        else:
+          writer.write(self.framer.build(transaction_id, unit_id, self.process(pdu)))
+          await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+      pass
+    finally:
+      self.clients -= 1
+      for task in tasks:
+        task.cancel()
+      writer.close()
+
+  async def __respond(self, writer, transaction_id, unit_id, pdu):
+    await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+    writer.write(self.framer.build(transaction_id, unit_id, self.process(pdu)))
+    await writer.drain()
+
+  def process(self, pdu: bytes) -> bytes:
+    """处理一个请求 PDU，返回响应 PDU"""
+    function_code = pdu[0]
+    handler = self.__handlers.get(function_code)
+    if handler is None:
+      return bytes((function_code | 0x80, ModbusError.ILLEGAL_FUNCTION.value))
+    if function_code in self.injected:
+      return bytes((function_code | 0x80, self.injected[function_code].value))
+    if self.exception_rate and random.random() < self.exception_rate:
+      return bytes((function_code | 0x80, self.exception_code.value))
+    try:
+      with self.bank.lock:
+        return handler(function_code, pdu)
+    except _ModbusReply as e:
+      return bytes((function_code | 0x80, e.code.value))
+    except (struct.error, IndexError):
+      return bytes((function_code | 0x80, ModbusError.ILLEGAL_DATA_VALUE.value))
+
+  def __check(self, address, quantity, limit):
+    if not 1 <= quantity <= limit:
+      raise _ModbusReply(ModbusError.ILLEGAL_DATA_VALUE)
+    if address + quantity > self.bank.size:
+      raise _ModbusReply(ModbusError.ILLEGAL_DATA_ADDRESS)
+
+  def __read_bits(self, function_code, pdu):
+    address, quantity = struct.unpack_from(">HH", pdu, 1)
+    self.__check(address, quantity, MAX_READ_COILS)
+    area = self.bank.coils if function_code == 1 else self.bank.discrete_inputs
+    data = pack_bits(area[address : address + quantity])
+    return bytes((function_code, len(data))) + data
+
+  def __read_registers(self, function_code, pdu):
+    address, quantity = struct.unpack_from(">HH", pdu, 1)
+    self.__check(address, quantity, MAX_READ_REGISTERS)
+    area = self.bank.holding_registers if function_code == 3 else self.bank.input_registers
+    return bytes((function_code, quantity * 2)) + area[address * 2 : (address + quantity) * 2]
+
+  def __write_single_coil(self, function_code, pdu):
+    address, value = struct.unpack_from(">HH", pdu, 1)
+    if value not in (0x0000, 0xFF00):
+      raise _ModbusReply(ModbusError.ILLEGAL_DATA_VALUE)
+    self.__check(address, 1, 1)
+    self.bank.coils[address] = 1 if value else 0
+    return bytes(pdu[:5])
+
+  def __write_single_register(self, function_code, pdu):
+    (address,) = struct.unpack_from(">H", pdu, 1)
+    self.__check(address, 1, 1)
+    self.bank.holding_registers[address * 2 : address * 2 + 2] = pdu[3:5]
+    return bytes(pdu[:5])
+
+  def __write_coils(self, function_code, pdu):
+    address, quantity, byte_count = struct.unpack_from(">HHB", pdu, 1)
+    self.__check(address, quantity, MAX_WRITE_COILS)
+    if byte_count != (quantity + 7) // 8 or len(pdu) < 6 + byte_count:
+      raise _ModbusReply(ModbusError.ILLEGAL_DATA_VALUE)
+    self.bank.coils[address : address + quantity] = bytes(unpack_bits(pdu[6 : 6 + byte_count], quantity))
+    return bytes(pdu[:5])
+
+  def __write_registers(self, function_code, pdu):
+    address, quantity, byte_count = struct.unpack_from(">HHB", pdu, 1)
+    self.__check(address, quantity, MAX_WRITE_REGISTERS)
+    if byte_count != quantity * 2 or len(pdu) < 6 + byte_count:
+      raise _ModbusReply(ModbusError.ILLEGAL_DATA_VALUE)
+    self.bank.holding_registers[address * 2 : (address + quantity) * 2] = pdu[6 : 6 + byte_count]
+    return bytes(pdu[:5])
+
+  def __mask_write_register(self, function_code, pdu):
+    address, and_mask, or_mask = struct.unpack_from(">HHH", pdu, 1)
+    self.__check(address, 1, 1)
+    registers = self.bank.holding_registers
+    (current,) = struct.unpack_from(">H", registers, address * 2)
+    struct.pack_into(">H", registers, address * 2, (current & and_mask) | (or_mask & ~and_mask & 0xFFFF))
+    return bytes(pdu[:7])
+
+  def __read_write_registers(self, function_code, pdu):
+    read_address, read_quantity, write_address, write_quantity, byte_count = struct.unpack_from(">HHHHB", pdu, 1)
+    self.__check(read_address, read_quantity, MAX_READ_REGISTERS)
+    self.__check(write_address, write_quantity, MAX_READ_WRITE_REGISTERS)
+    if byte_count != write_quantity * 2 or len(pdu) < 10 + byte_count:
+      raise _ModbusReply(ModbusError.ILLEGAL_DATA_VALUE)
+    # 先写后读
+    registers = self.bank.holding_registers
+    registers[write_address * 2 : (write_address + write_quantity) * 2] = pdu[10 : 10 + byte_count]
+    return bytes((function_code, read_quantity * 2)) + registers[read_address * 2 : (read_address + read_quantity) * 2]
+
+
+class _ModbusReply(Exception):
+  """处理请求时返回异常响应"""
+
+  def __init__(self, code: ModbusError):
+    self.code = code
+    super().__init__(code.name)
+
+
+# 示例使用
+if __name__ == "__main__":
+  server = ModbusTcpServer("0.0.0.0", 5020)
+  asyncio.run(server.serve_forever())
@@ -0,0 +1,157 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 14:48:30
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 14:48:30
+# @ Description: 点表与读取计划
+"""
+
+import csv
+import json
+from typing import NamedTuple
+
+from ModbusTcp.Codec import get_codec
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.Planner import MAX_READ_COILS, MAX_READ_REGISTERS, coalesce
+
+# 数据区对应的读功能码
+AREAS = {"coil": 1, "discrete": 2, "holding": 3, "input": 4}
+
+
+class Tag(NamedTuple):
+  # 点名
+  name: str
+  # 起始地址
+  address: int
+  # 数据格式（线圈、离散输入忽略）
+  data_format: DataFormat = DataFormat.SIGNED_16_INT_BIG
+  # 设备地址（slave_id）
+  unit_id: int = 1
+  # 数据区：coil / discrete / holding / input
+  area: str = "holding"
+  # 值的数量，大于 1 时返回元组
+  quantity: int = 1
+
+  @property
+  def function_code(self) -> int:
+    return AREAS[self.area]
+
+  @property
+  def size(self) -> int:
+    """占用的寄存器（线圈）数"""
+    if self.function_code <= 2:
+      return self.quantity
+    return get_codec(self.data_format, self.quantity).registers
+
+
+class ReadBlock(NamedTuple):
+  unit_id: int
+  function_code: int
+  start: int
+  count: int
+  # 该帧包含的点
+  tags: list
+
+
+def _parse_tag(row: dict) -> Tag:
+  data_format = row.get("data_format") or DataFormat.SIGNED_16_INT_BIG.name
+  return Tag(
+    name=row["name"],
+    address=int(row["address"]),
+    data_format=data_format if isinstance(data_format, DataFormat) else DataFormat[data_format],
+    unit_id=int(row.get("unit_id") or 1),
+    area=row.get("area") or "holding",
+    quantity=int(row.get("quantity") or 1),
+  )
+
+
+def build_plan(tags: list, max_gap: int = 0) -> list[ReadBlock]:
+  """按设备和数据区分组，把地址相近的点合并为尽量少的读帧
+
+  Args:
+      tags (list[Tag]): 点表
+      max_gap (int, optional): 合并时允许多读的空隙寄存器（线圈）数。Defaults to 0.
+
+  Returns:
+      list[ReadBlock]: 读取计划
+  """
+  groups: dict[tuple, list] = {}
+  for tag in tags:
+    if tag.area not in AREAS:
+      raise ValueError(f"Unknown area {tag.area!r} of tag {tag.name}")
+    groups.setdefault((tag.unit_id, tag.function_code), []).append(tag)
+
+  plan = []
+  for (unit_id, function_code), group in sorted(groups.items()):
+    limit = MAX_READ_COILS if function_code <= 2 else MAX_READ_REGISTERS
+    for block in coalesce([(tag.address, tag.size) for tag in group], max_gap, limit):
+      plan.append(ReadBlock(unit_id, function_code, block.start, block.count, [group[i] for i in block.members]))
+  return plan
+
+
+class TagMap:
+  def __init__(self, tags: list, max_gap: int = 0):
+    """点表，读取计划在创建时计算一次，每个扫描周期复用
+
+    Args:
+        tags (list[Tag]): 点表
+        max_gap (int, optional): 合并时允许多读的空隙寄存器（线圈）数。Defaults to 0.
+    """
+    names = [tag.name for tag in tags]
+    if len(names) != len(set(names)):
+      raise ValueError("Duplicate tag names")
+    self.tags = list(tags)
+    self.plan = build_plan(self.tags, max_gap)
+
+  @classmethod
+  def from_csv(cls, path: str, max_gap: int = 0) -> "TagMap":
+    """从 CSV 文件加载点表，表头：name,address,data_format,unit_id,area,quantity"""
+    with open(path, newline="", encoding="utf-8") as f:
+      return cls([_parse_tag(row) for row in csv.DictReader(f)], max_gap)
+
+  @classmethod
+  def from_json(cls, path: str, max_gap: int = 0) -> "TagMap":
+    """从 JSON 文件加载点表，内容为与 CSV 表头同名字段的对象列表"""
+    with open(path, encoding="utf-8") as f:
+      return cls([_parse_tag(row) for row in json.load(f)], max_gap)
+
+  def decode(self, block: ReadBlock, payload) -> dict:
+    """将一帧的原始数据按点解码"""
+    values = {}
+    for tag in block.tags:
+      offset = tag.address - block.start
+      if block.function_code <= 2:
+        bits = [(payload[(offset + i) // 8] >> ((offset + i) % 8)) & 1 for i in range(tag.quantity)]
+        values[tag.name] = bits[0] if tag.quantity == 1 else tuple(bits)
+        continue
+      codec = get_codec(tag.data_format, tag.quantity)
+      data = codec.decode(payload[offset * 2 : offset * 2 + codec.byte_count])
+      values[tag.name] = data[0] if tag.quantity == 1 else data
+    return values
+
+  def scan(self, client) -> dict:
+    """使用 ModbusTcpClient 执行一次扫描
+
+    Returns:
+        dict: {点名: 值}
+    """
+    values = {}
+    for block in self.plan:
+      values.update(self.decode(block, client.read_raw(block.start, block.count, block.unit_id, block.function_code)))
+    return values
+
+  async def scan_async(self, client) -> dict:
+    """使用 AsyncModbusTcpClient 执行一次扫描，各帧并发读取
+
+    Returns:
+        dict: {点名: 值}
+    """
+    import asyncio
+
+    payloads = await asyncio.gather(
+      *[client.read_raw(block.start, block.count, block.unit_id, block.function_code) for block in self.plan]
+    )
+    values = {}
+    for block, payload in zip(self.plan, payloads, strict=True):
+      values.update(self.decode(block, payload))
+    return values
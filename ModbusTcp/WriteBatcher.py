@@ -0,0 +1,216 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 19:20:44
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 19:20:44
+# @ Description: 合并写入
+"""
+
+from concurrent.futures import Future, wait
+from threading import Event, Lock, Thread
+
+from ModbusTcp.Codec import get_codec
+from ModbusTcp.ModbusThreading import ModbusTcpClient
+from ModbusTcp.Planner import MAX_WRITE_COILS, MAX_WRITE_REGISTERS, coalesce
+from ModbusTcp.ulitis import LOGGER, execute
+
+REGISTERS = "registers"
+COILS = "coils"
+
+
+class _PendingWrite:
+  __slots__ = ("kind", "unit_id", "start", "end", "future")
+
+  def __init__(self, kind, unit_id, start, end):
+    self.kind = kind
+    self.unit_id = unit_id
+    self.start = start
+    self.end = end
+    self.future = Future()
+
+
+class WriteBatcher:
+  def __init__(self, client: ModbusTcpClient, max_pending: int = 4096, interval: float = None, workers: int = 4):
+    """合并写入：排队中的相邻或重叠的写入合并为尽量少的 16 / 15 功能码帧，重叠部分以最后一次写入为准
+
+    每次写入立即返回 Future，在包含该写入的帧全部确认后完成。
+
+    Args:
+        client (ModbusTcpClient): 客户端，寄存器按其数据格式编码
+        max_pending (int, optional): 排队的寄存器和线圈总数上限，超过时写入方同步执行一次 flush。Defaults to 4096.
+        interval (float, optional): 后台自动 flush 的周期（秒），None 表示只在手动 flush 或达到上限时发送。Defaults to None.
+        workers (int, optional): 同时发送的帧数。Defaults to 4.
+    """
+    self.client = client
+    self.max_pending = max_pending
+    # (kind, unit_id) -> {起始地址: 一个值编码后的字节（占 1~4 个寄存器）或线圈值}，一个值不会被拆到两帧
+    self.__values: dict[tuple, dict] = {}
+    # 排队中最宽的值占用的寄存器数，查找重叠的值时使用
+    self.__widest = 1
+    self.__writes: list[_PendingWrite] = []
+    self.__pending = 0
+    self.__lock = Lock()
+    # 保证各次 flush 按顺序发送，重叠地址的写入不会被之前的 flush 覆盖
+    self.__flushing = Lock()
+    self.__threads = execute(workers)
+    self.__closed = Event()
+    self.__thread: Thread = None
+    if interval is not None:
+      self.__thread = Thread(target=self.__run, args=(interval,), name="write-batcher", daemon=True)
+      self.__thread.start()
+    # 统计
+    self.writes = 0
+    self.frames = 0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    return False
+
+  def __run(self, interval):
+    while not self.__closed.wait(interval):
+      try:
+        self.flush()
+      except Exception as e:
+        LOGGER.error(f"Background flush failed: {e}")
+
+  def __queue(self, kind, unit_id, start_address, items: list, width: int = 1) -> Future:
+    """排队一次写入
+
+    Args:
+        items (list): 各个值，寄存器为每个值编码后的字节，线圈为 0 / 1
+        width (int, optional): 每个值占用的寄存器（线圈）数。Defaults to 1.
+    """
+    size = len(items) * width
+    write = _PendingWrite(kind, unit_id, start_address, start_address + size)
+    while True:
+      with self.__lock:
+        if self.__closed.is_set():
+          raise RuntimeError("WriteBatcher is closed")
+        # 检查和计数在同一把锁内，并发写入不会超过上限；单次写入超过上限时直接排队
+        if self.__pending + size <= self.max_pending or not self.__writes:
+          values = self.__values.setdefault((kind, unit_id), {})
+          for index, item in enumerate(items):
+            self.__put(values, start_address + index * width, width, item)
+          self.__widest = max(self.__widest, width)
+          self.__writes.append(write)
+          self.writes += 1
+          return write.future
+      # 背压：排队的数据达到上限时由写入方先发送已排队的写入
+      self.flush()
+
+  def __put(self, values: dict, address: int, width: int, item):
+    """放入一个值，覆盖与之重叠的旧值；旧值未被覆盖的寄存器逐个保留"""
+    for start in range(address - self.__widest + 1, address + width):
+      old = values.get(start)
+      if old is None:
+        continue
+      old_width = len(old) // 2 if isinstance(old, bytes) else 1
+      if start + old_width <= address:
+        continue
+      del values[start]
+      self.__pending -= old_width
+      for offset in range(old_width):
+        if not address <= start + offset < address + width:
+          values[start + offset] = old[offset * 2 : offset * 2 + 2]
+          self.__pending += 1
+    values[address] = item
+    self.__pending += width
+
+  def write_registers(self, start_address, values: list, unit_id=1) -> Future:
+    """排队写多个寄存器，按客户端的数据格式编码
+
+    Args:
+        start_address : 要写入的起始地址
+        values (list): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        Future: 写入确认后完成
+    """
+    data = get_codec(self.client.data_format, len(values)).encode(values)
+    width = get_codec(self.client.data_format, 1).registers
+    items = [bytes(data[i : i + width * 2]) for i in range(0, len(data), width * 2)]
+    return self.__queue(REGISTERS, unit_id, start_address, items, width)
+
+  def write_coils(self, start_address, values: list, unit_id=1) -> Future:
+    """排队写多个线圈
+
+    Args:
+        start_address : 要写入的起始地址
+        values (list): 要写入的值
+        unit_id (int, optional): 设备地址（slave_id）= 1
+
+    Returns:
+        Future: 写入确认后完成
+    """
+    return self.__queue(COILS, unit_id, start_address, [1 if value else 0 for value in values])
+
+  def __send(self, kind, unit_id, start, items):
+    if kind == REGISTERS:
+      result = self.client.write_raw(start, b"".join(items), unit_id)
+    else:
+      result = self.client.write_multiple_coils(start, items, unit_id)
+    # 客户端不等待写入结果时返回 Future
+    return result.result() if isinstance(result, Future) else result
+
+  def flush(self, timeout: float = None) -> int:
+    """发送所有排队的写入并等待确认，各写入的结果通过其 Future 获取
+
+    Args:
+        timeout (float, optional): 最长等待时间（秒）。Defaults to None.
+
+    Returns:
+        int: 发送的帧数
+    """
+    with self.__flushing:
+      with self.__lock:
+        values, writes = self.__values, self.__writes
+        self.__values, self.__writes, self.__pending = {}, [], 0
+      if not writes:
+        return 0
+
+      frames = []
+      for (kind, unit_id), items in values.items():
+        addresses = sorted(items)
+        limit = MAX_WRITE_REGISTERS if kind == REGISTERS else MAX_WRITE_COILS
+        widths = [len(items[address]) // 2 if kind == REGISTERS else 1 for address in addresses]
+        # 每个值作为一个整体合并，帧只在值之间拆分
+        for block in coalesce(list(zip(addresses, widths, strict=True)), 0, limit):
+          data = [items[addresses[index]] for index in block.members]
+          future = self.__threads.submit(self.__send, kind, unit_id, block.start, data)
+          frames.append((kind, unit_id, block.start, block.start + block.count, future))
+      self.frames += len(frames)
+      wait([frame[-1] for frame in frames], timeout)
+
+      for write in writes:
+        error = None
+        for kind, unit_id, start, end, future in frames:
+          if kind != write.kind or unit_id != write.unit_id or end <= write.start or start >= write.end:
+            continue
+          if not future.done():
+            error = TimeoutError(f"Write to {write.start} not acknowledged in {timeout}s")
+          elif future.exception() is not None:
+            error = future.exception()
+          if error is not None:
+            break
+        if error is None:
+          write.future.set_result(True)
+        else:
+          write.future.set_exception(error)
+      return len(frames)
+
+  @property
+  def pending(self) -> int:
+    """排队中的寄存器和线圈数"""
+    return self.__pending
+
+  def close(self):
+    """发送剩余的写入并停止后台线程"""
+    self.__closed.set()
+    if self.__thread is not None:
+      self.__thread.join()
+    self.flush()
+    self.__threads.shutdown()
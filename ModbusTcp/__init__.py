@@ -6,13 +6,115 @@
 # @ Description:
 """
 
-from ModbusTcp.DataFormat import DataFormat
-from ModbusTcp.ModbusThreading import ModbusTcpClient
-from ModbusTcp.ulitis import LOGGER
+import importlib
+import sys
+import types
+
+# 等同于 typing.TYPE_CHECKING，避免导入包时导入 typing
+TYPE_CHECKING = False
+
+# 按需导入：导入包时不加载各个子模块（以及 asyncio、multiprocessing 等），第一次访问对应名字时才导入
+_EXPORTS = {
+  "RegisterCache": "Cache",
+  "ChangeDetector": "ChangeDetector",
+  "DataFormat": "DataFormat",
+  "DeviceManager": "DeviceManager",
+  "DeviceResult": "DeviceManager",
+  "MbapFramer": "Framer",
+  "RtuFramer": "Framer",
+  "SerialTransport": "Framer",
+  "Metrics": "Metrics",
+  "RequestTiming": "Metrics",
+  "AsyncModbusTcpClient": "ModbusAsyncio",
+  "ModbusTcpClient": "ModbusThreading",
+  "PoolResult": "ProcessPool",
+  "ProcessPool": "ProcessPool",
+  "DataBank": "Server",
+  "ModbusTcpServer": "Server",
+  "RecordReader": "Recorder",
+  "Recorder": "Recorder",
+  "RttEstimator": "Rtt",
+  "PollGroup": "Scheduler",
+  "ScanResult": "Scheduler",
+  "Scheduler": "Scheduler",
+  "Tag": "TagMap",
+  "TagMap": "TagMap",
+  "WriteBatcher": "WriteBatcher",
+  "LOGGER": "ulitis",
+}
+
+if TYPE_CHECKING:
+  from ModbusTcp import Exceptions
+  from ModbusTcp.Cache import RegisterCache
+  from ModbusTcp.ChangeDetector import ChangeDetector
+  from ModbusTcp.DataFormat import DataFormat
+  from ModbusTcp.DeviceManager import DeviceManager, DeviceResult
+  from ModbusTcp.Framer import MbapFramer, RtuFramer, SerialTransport
+  from ModbusTcp.Metrics import Metrics, RequestTiming
+  from ModbusTcp.ModbusAsyncio import AsyncModbusTcpClient
+  from ModbusTcp.ModbusThreading import ModbusTcpClient
+  from ModbusTcp.ProcessPool import PoolResult, ProcessPool
+  from ModbusTcp.Recorder import RecordReader, Recorder
+  from ModbusTcp.Rtt import RttEstimator
+  from ModbusTcp.Scheduler import PollGroup, ScanResult, Scheduler
+  from ModbusTcp.Server import DataBank, ModbusTcpServer
+  from ModbusTcp.TagMap import Tag, TagMap
+  from ModbusTcp.WriteBatcher import WriteBatcher
+  from ModbusTcp.ulitis import LOGGER
+
+
+def __getattr__(name: str):
+  if name == "Exceptions":
+    return importlib.import_module("ModbusTcp.Exceptions")
+  module = _EXPORTS.get(name)
+  if module is None:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  value = getattr(importlib.import_module(f"ModbusTcp.{module}"), name)
+  globals()[name] = value
+  return value
+
+
+def __dir__():
+  return sorted(__all__)
+
+
+class _Package(types.ModuleType):
+  def __setattr__(self, name, value):
+    # 第一次导入子模块时，子模块会被设置为包的同名属性（例如 ModbusTcp.DataFormat），覆盖按需导入的同名类
+    if isinstance(value, types.ModuleType) and _EXPORTS.get(name) == name:
+      return
+    super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
+
 
 __all__ = [
   "LOGGER",
   "Exceptions",
   "DataFormat",
   "ModbusTcpClient",
+  "AsyncModbusTcpClient",
+  "Tag",
+  "TagMap",
+  "Scheduler",
+  "PollGroup",
+  "ScanResult",
+  "ChangeDetector",
+  "DeviceManager",
+  "DeviceResult",
+  "ModbusTcpServer",
+  "DataBank",
+  "Metrics",
+  "RequestTiming",
+  "WriteBatcher",
+  "RegisterCache",
+  "Recorder",
+  "RecordReader",
+  "RttEstimator",
+  "MbapFramer",
+  "RtuFramer",
+  "SerialTransport",
+  "ProcessPool",
+  "PoolResult",
 ]
@@ -0,0 +1,362 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 23:05:41
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 23:05:41
+# @ Description: 命令行：周期轮询与压力测试
+
+    python -m ModbusTcp poll 192.168.1.10 --range holding:0:10 --range coil:0:16 --interval 1 --format csv
+    python -m ModbusTcp poll 192.168.1.10 --tags tags.csv --interval 0.5 --count 100 --output scan.jsonl
+    python -m ModbusTcp load 192.168.1.10 --concurrency 16 --rate 500 --duration 30 \\
+        --mix read_holding_registers=8,write_multiple_registers=2
+"""
+
+import argparse
+import csv
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from ModbusTcp.Codec import get_codec
+from ModbusTcp.DataFormat import DataFormat
+from ModbusTcp.ModbusThreading import ModbusTcpClient
+from ModbusTcp.Planner import MAX_READ_REGISTERS
+from ModbusTcp.TagMap import TagMap
+from ModbusTcp.ulitis import formatter, percentile
+
+# 数据区对应的读方法
+READ_METHODS = {
+  "holding": "read_holding_registers",
+  "input": "read_input_registers",
+  "coil": "read_coils",
+  "discrete": "read_input_coils",
+}
+# 压测支持的请求
+LOAD_FUNCTIONS = [
+  "read_holding_registers",
+  "read_input_registers",
+  "read_coils",
+  "read_input_coils",
+  "write_multiple_registers",
+  "write_single_registers",
+  "write_multiple_coils",
+  "write_single_coils",
+]
+PERCENTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def parse_range(spec: str) -> tuple:
+  """解析 AREA:START:COUNT[:DATA_FORMAT]，COUNT 为值的数量（线圈为位数）
+
+  Returns:
+      tuple: (数据区, 起始地址, 数量, 数据格式)
+  """
+  parts = spec.split(":")
+  if len(parts) not in (3, 4) or parts[0] not in READ_METHODS:
+    raise argparse.ArgumentTypeError(f"invalid range {spec!r}, expected AREA:START:COUNT[:DATA_FORMAT]")
+  try:
+    data_format = DataFormat[parts[3]] if len(parts) == 4 else None
+    return parts[0], int(parts[1], 0), int(parts[2], 0), data_format
+  except (KeyError, ValueError):
+    raise argparse.ArgumentTypeError(f"invalid range {spec!r}") from None
+
+
+def parse_mix(spec: str) -> list:
+  """解析 FUNCTION=WEIGHT,...，例如 read_holding_registers=8,write_multiple_registers=2
+
+  Returns:
+      list: [(方法名, 权重)]
+  """
+  mix = []
+  for item in spec.split(","):
+    function, _, weight = item.strip().partition("=")
+    if function not in LOAD_FUNCTIONS:
+      raise argparse.ArgumentTypeError(f"unknown function {function!r}, expected one of {', '.join(LOAD_FUNCTIONS)}")
+    try:
+      mix.append((function, int(weight or 1)))
+    except ValueError:
+      raise argparse.ArgumentTypeError(f"invalid weight in {item!r}") from None
+  if not any(weight > 0 for _, weight in mix):
+    raise argparse.ArgumentTypeError("request mix needs at least one positive weight")
+  return mix
+
+
+def connect(args) -> ModbusTcpClient:
+  return ModbusTcpClient(
+    args.host,
+    args.port,
+    DataFormat[args.data_format],
+    sockts=args.sockts,
+    threads=args.sockts,
+    framer=args.framer,
+    lazy=True,
+  )
+
+
+def _read_range(client: ModbusTcpClient, area: str, start: int, count: int, data_format, unit_id: int) -> dict:
+  """读取一段地址，按地址展开为 {"AREA:地址": 值}；指定数据格式的范围在一帧内读取并按该格式解码"""
+  if data_format is not None and area in ("holding", "input"):
+    codec = get_codec(data_format, count)
+    values = codec.decode(client.read_raw(start, codec.registers, unit_id, 3 if area == "holding" else 4))
+  else:
+    values = getattr(client, READ_METHODS[area])(start, count, unit_id)
+  step = 1 if area in ("coil", "discrete") else get_codec(data_format or client.data_format, 1).registers
+  return {f"{area}:{start + i * step}": value for i, value in enumerate(values)}
+
+
+class _Writer:
+  def __init__(self, stream, fmt: str):
+    """按行输出扫描结果：CSV（第一行为表头）或 JSON lines"""
+    self.stream = stream
+    self.fmt = fmt
+    self.__csv: csv.DictWriter = None
+
+  def write(self, row: dict):
+    if self.fmt == "json":
+      self.stream.write(json.dumps(row, default=list) + "\n")
+    else:
+      if self.__csv is None:
+        self.__csv = csv.DictWriter(self.stream, fieldnames=list(row), extrasaction="ignore")
+        self.__csv.writeheader()
+      # 多个值的点以空格分隔写在同一列
+      self.__csv.writerow({k: " ".join(map(str, v)) if isinstance(v, tuple | list) else v for k, v in row.items()})
+    # 输出可能被管道实时读取
+    self.stream.flush()
+
+
+def poll(args) -> int:
+  """按固定周期扫描，每个周期输出一行；周期超时时跳过错过的周期"""
+  tag_map = None
+  if args.tags:
+    loader = TagMap.from_json if args.tags.endswith(".json") else TagMap.from_csv
+    tag_map = loader(args.tags, args.max_gap)
+  stream = open(args.output, "a" if args.append else "w", newline="", encoding="utf-8") if args.output else sys.stdout
+  writer = _Writer(stream, args.format)
+  client = connect(args)
+  scans = errors = overruns = 0
+  deadline = time.monotonic()
+  try:
+    while not args.count or scans < args.count:
+      row = {"time": datetime.now().isoformat(timespec="milliseconds")}
+      try:
+        for area, start, count, data_format in args.range:
+          row.update(_read_range(client, area, start, count, data_format, args.unit))
+        if tag_map is not None:
+          row.update(tag_map.scan(client))
+        writer.write(row)
+      except Exception as e:
+        errors += 1
+        print(f"{row['time']} scan failed: {type(e).__name__}: {e}", file=sys.stderr)
+      scans += 1
+      if args.count and scans >= args.count:
+        break
+      deadline += args.interval
+      delay = deadline - time.monotonic()
+      if delay < 0:
+        overruns += 1
+        deadline = time.monotonic()
+      else:
+        time.sleep(delay)
+  except KeyboardInterrupt:
+    pass
+  finally:
+    client.disconnect()
+    if stream is not sys.stdout:
+      stream.close()
+  print(f"scans={scans} errors={errors} overruns={overruns}", file=sys.stderr)
+  return 1 if errors and errors == scans else 0
+
+
+def _build_calls(client: ModbusTcpClient, args) -> dict:
+  """每种请求一个无参调用，读写 --address 开始的 --size 个值"""
+  calls = {}
+  size, address, unit_id = args.size, args.address, args.unit
+  for function, _ in args.mix:
+    method = getattr(client, function)
+    if function.startswith("read"):
+      calls[function] = lambda method=method: method(address, size, unit_id)
+    elif function.startswith("write_single"):
+      calls[function] = lambda method=method: method(address, 1, unit_id)
+    else:
+      values = [i % 2 for i in range(size)] if function.endswith("coils") else [i % 100 for i in range(size)]
+      calls[function] = lambda method=method, values=values: method(address, values, unit_id)
+  return calls
+
+
+def _summary(latencies: list) -> dict:
+  latencies = sorted(latencies)
+  summary = {"count": len(latencies)}
+  for q in PERCENTILES:
+    summary[f"p{q * 100:g}_ms"] = round(percentile(latencies, q) * 1000, 3)
+  summary["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else 0.0
+  return summary
+
+
+def load(args) -> int:
+  """压力测试：concurrency 个线程按请求组合发送请求，rate 不为 0 时按固定速率开环调度
+
+  开环调度时延迟从计划发送的时间开始计算，设备变慢导致请求积压时，排队时间也计入延迟。
+  """
+  client = connect(args)
+  calls = _build_calls(client, args)
+  # 按权重展开并打乱，每个请求按序号取出，组合比例在任意时间段内都接近设定值
+  sequence = [function for function, weight in args.mix for _ in range(weight)]
+  random.Random(args.seed).shuffle(sequence)
+  # 预热：建立连接，出错的请求在压测中统计
+  for call in calls.values():
+    try:
+      call()
+    except Exception:
+      pass
+
+  lock = threading.Lock()
+  tickets = iter(range(args.requests or sys.maxsize))
+  latencies: dict[str, list] = {function: [] for function in calls}
+  service: list = []
+  errors = Counter()
+  stop = threading.Event()
+  began = time.perf_counter()
+  end = began + args.duration if args.duration else None
+
+  def worker():
+    while not stop.is_set():
+      with lock:
+        ticket = next(tickets, None)
+      if ticket is None:
+        return
+      scheduled = began + ticket / args.rate if args.rate else time.perf_counter()
+      if end is not None and scheduled >= end:
+        return
+      delay = scheduled - time.perf_counter()
+      if delay > 0:
+        time.sleep(delay)
+      function = sequence[ticket % len(sequence)]
+      sent = time.perf_counter()
+      try:
+        calls[function]()
+      except Exception as e:
+        with lock:
+          errors[f"{function}: {type(e).__name__}"] += 1
+        continue
+      done = time.perf_counter()
+      latencies[function].append(done - scheduled)
+      service.append(done - sent)
+
+  threads = [threading.Thread(target=worker, name=f"load-{i}", daemon=True) for i in range(args.concurrency)]
+  for thread in threads:
+    thread.start()
+  try:
+    for thread in threads:
+      while thread.is_alive():
+        thread.join(0.2)
+  except KeyboardInterrupt:
+    stop.set()
+    for thread in threads:
+      thread.join()
+  elapsed = time.perf_counter() - began
+  client.disconnect()
+
+  completed = sum(len(values) for values in latencies.values())
+  report = {
+    "host": f"{args.host}:{args.port}",
+    "concurrency": args.concurrency,
+    "target_rate": args.rate,
+    "duration_s": round(elapsed, 3),
+    "requests": completed + sum(errors.values()),
+    "errors": dict(errors),
+    "throughput": round(completed / elapsed, 1) if elapsed else 0.0,
+    "latency": _summary([value for values in latencies.values() for value in values]),
+    "service_time": _summary(service),
+    "functions": {function: _summary(values) for function, values in latencies.items()},
+  }
+  latency = report["latency"]
+  print(
+    f"{report['requests']} requests in {report['duration_s']}s, {report['throughput']} req/s"
+    f"{f' (target {args.rate})' if args.rate else ''}, errors={sum(errors.values())}  "
+    f"p50={latency['p50_ms']}ms p90={latency['p90_ms']}ms p99={latency['p99_ms']}ms max={latency['max_ms']}ms",
+    file=sys.stderr,
+  )
+  json.dump(report, sys.stdout, indent=2)
+  sys.stdout.write("\n")
+  return 1 if errors else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+  parser = argparse.ArgumentParser(prog="python -m ModbusTcp", description="Modbus TCP poller and load generator")
+  parser.add_argument("-v", "--verbose", action="count", default=0, help="log INFO (-v) or DEBUG (-vv) messages")
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  common = argparse.ArgumentParser(add_help=False)
+  common.add_argument("host", help="device address")
+  common.add_argument("--port", type=int, default=502)
+  common.add_argument("--unit", type=int, default=1, help="unit id (slave id)")
+  common.add_argument(
+    "--data-format", default=DataFormat.SIGNED_16_INT_BIG.name, choices=[f.name for f in DataFormat], metavar="FORMAT"
+  )
+  common.add_argument("--framer", default="mbap", choices=["mbap", "rtu"], help="rtu for RTU-over-TCP gateways")
+  common.add_argument("--sockts", type=int, default=None, help="connection pool size")
+
+  poller = commands.add_parser("poll", parents=[common], help="poll ranges or a tag file at a fixed interval")
+  poller.add_argument(
+    "--range",
+    type=parse_range,
+    action="append",
+    default=[],
+    help="AREA:START:COUNT[:DATA_FORMAT], AREA is holding, input, coil or discrete; repeatable",
+  )
+  poller.add_argument("--tags", help="tag file (.csv or .json)")
+  poller.add_argument("--max-gap", type=int, default=0, help="registers allowed to over-read when merging tags")
+  poller.add_argument("--interval", type=float, default=1.0, help="seconds between scans")
+  poller.add_argument("--count", type=int, default=0, help="number of scans, 0 runs until interrupted")
+  poller.add_argument("--format", choices=["csv", "json"], default="json", help="CSV or JSON lines")
+  poller.add_argument("--output", help="write to this file instead of stdout")
+  poller.add_argument("--append", action="store_true", help="append to --output instead of truncating")
+  poller.set_defaults(handler=poll, sockts_default=1)
+
+  loader = commands.add_parser("load", parents=[common], help="generate load and report throughput and latency")
+  loader.add_argument("--concurrency", type=int, default=10, help="caller threads")
+  loader.add_argument(
+    "--mix",
+    type=parse_mix,
+    default=parse_mix("read_holding_registers"),
+    help="FUNCTION=WEIGHT,... (default read_holding_registers)",
+  )
+  loader.add_argument("--rate", type=float, default=0, help="target requests per second, 0 sends as fast as possible")
+  loader.add_argument("--duration", type=float, default=None, help="seconds to run (default 10 unless --requests)")
+  loader.add_argument("--requests", type=int, default=0, help="total requests to send")
+  loader.add_argument("--address", type=int, default=0, help="start address of every request")
+  loader.add_argument("--size", type=int, default=10, help="values (or coils) per request")
+  loader.add_argument("--seed", type=int, default=0, help="seed for the request order")
+  loader.set_defaults(handler=load, sockts_default=None)
+  return parser
+
+
+def main(argv: list = None) -> int:
+  parser = build_parser()
+  args = parser.parse_args(argv)
+  level = {0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG)
+  logging.basicConfig(format=formatter, level=level)
+  if args.command == "poll":
+    if not args.range and not args.tags:
+      parser.error("poll needs at least one --range or --tags")
+    for area, _, count, data_format in args.range:
+      if data_format is not None and area in ("holding", "input"):
+        if get_codec(data_format, count).registers > MAX_READ_REGISTERS:
+          parser.error(f"a range with a data format must fit in one frame ({MAX_READ_REGISTERS} registers)")
+  if args.command == "load":
+    if args.concurrency < 1:
+      parser.error("--concurrency must be at least 1")
+    if args.duration is None and not args.requests:
+      args.duration = 10.0
+  if args.sockts is None:
+    args.sockts = args.sockts_default or args.concurrency
+  return args.handler(args)
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -8,88 +8,380 @@
 
 import logging
 import socket
+import time
 from concurrent.futures import Future, ThreadPoolExecutor, as_completed
-from threading import Lock
+from threading import Condition, Lock, Semaphore, Thread
 from typing import Any, Callable
 
-from ModbusTcp import Exceptions
 
 formatter = "%(asctime)s - %(name)s - %(levelname)-8s - %(filename)s:%(lineno)d - %(message)s"
 
-logging.basicConfig(format=formatter, level=logging.INFO)
+# 作为库使用时不修改日志配置，由应用自行配置（例如 logging.basicConfig(format=formatter, level=logging.INFO)）
 LOGGER = logging.getLogger(__name__)
+LOGGER.addHandler(logging.NullHandler())
+
+
+# MBAP 报文最大长度：7 字节报文头 + 253 字节 PDU
+MAX_ADU_SIZE = 260
+
+
+def percentile(values: list, q: float) -> float:
+  """已排序样本的 q 分位数（最近秩），没有样本时返回 0"""
+  if not values:
+    return 0.0
+  return values[min(len(values) - 1, int(q * (len(values) - 1) + 0.5))]
+
+
+def recv_exactly(sock: socket.socket, view: memoryview):
+  """用 recv_into 填满 view，处理分多次到达的数据"""
+  while view:
+    received = sock.recv_into(view)
+    if not received:
+      raise ConnectionError("Connection closed by peer")
+    view = view[received:]
+
+
+class Connection:
+  """连接池中单个连接的接收缓冲区与统计信息"""
+
+  __slots__ = ("created", "last_used", "requests", "errors", "buffer", "view")
+
+  def __init__(self):
+    self.created = time.monotonic()
+    self.last_used = self.created
+    self.requests = 0
+    self.errors = 0
+    # 每个连接预分配一个接收缓冲区，所有响应复用
+    self.buffer = bytearray(MAX_ADU_SIZE)
+    self.view = memoryview(self.buffer)
 
 
 class SocketManager:
-  def __init__(self, max_sockets: int):
+  def __init__(self, max_sockets: int, acquire_timeout: float = None, idle_timeout: float = 60, **kwargs):
+    """有上限的连接池
+
+    Args:
+        max_sockets (int): 连接数上限
+        acquire_timeout (float, optional): 获取连接的最长等待时间，None 表示一直等待。Defaults to None.
+        idle_timeout (float, optional): 空闲超过该时间的连接在取出时重新检查。Defaults to 60.
+        backoff (float, optional): 重连失败后的初始退避时间（秒）。Defaults to 0.5.
+        max_backoff (float, optional): 重连退避时间上限（秒）。Defaults to 30.
+        lazy (bool, optional): 初始化时不建立连接，第一次使用时再建立，按并发需要增加到上限。Defaults to False.
+    """
     self.max_sockets = max_sockets
+    self.lazy = kwargs.get("lazy", False)
+    self.acquire_timeout = acquire_timeout
+    self.idle_timeout = idle_timeout
+    self.backoff = kwargs.get("backoff", 0.5)
+    self.max_backoff = kwargs.get("max_backoff", 30)
+    self.timeout = 5
     self.available_sockets = []
+    self.connections: dict[socket.socket, Connection] = {}
     self._lock = Lock()
-    # self._initialize_sockets()
+    self._available = Condition(self._lock)
+    self._opening = 0
+    self._closed = True
+    self._retry_delay = 0.0
+    self._next_attempt = 0.0
+    self._reconnect_thread: Thread = None
+    # 连接池统计
+    self.reconnects = 0
+    self.failures = 0
+    self.exhausted = 0
 
   def _initialize_sockets(self, host, port, timeout=5):
     self.host = host
     self.port = port
     self.timeout = timeout
-    for _ in range(self.max_sockets):
-      sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
-      # sock.setblocking(0)
-      # LOGGER.debug("create_connection")
-      self.available_sockets.append(sock)
+    with self._lock:
+      self._closed = False
+      self._retry_delay = 0.0
+      self._next_attempt = 0.0
+    if self.lazy:
+      return
+    for _ in range(self.max_sockets - len(self.connections)):
+      sock = self._create_socket()
+      with self._lock:
+        self.connections[sock] = Connection()
+        self.available_sockets.append(sock)
+
+  def _create_socket(self):
+    sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # 尽快发现对端掉线的半开连接（仅 Linux 支持）
+    if hasattr(socket, "TCP_KEEPIDLE"):
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 10)
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 5)
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+    return sock
+
+  def _open_socket(self):
+    """在锁外新建一个连接，失败时进入退避并交给后台线程重连"""
+    try:
+      sock = self._create_socket()
+    except OSError as e:
+      with self._lock:
+        self._opening -= 1
+        self.failures += 1
+        self._retry_delay = min(self.max_backoff, self._retry_delay * 2 or self.backoff)
+        self._next_attempt = time.monotonic() + self._retry_delay
+        self._start_reconnect()
+        self._available.notify_all()
+      LOGGER.error(f"Connect to {self.host}:{self.port} failed, retry in {self._retry_delay}s: {e}")
+      raise e
+    with self._lock:
+      self._opening -= 1
+      self._retry_delay = 0.0
+      self.connections[sock] = Connection()
+    return sock
 
-  def get_socket(self):
+  def get_socket(self, timeout: float = None):
+    """取出一个可用连接，连接数已达上限时等待其它连接归还
+
+    Args:
+        timeout (float, optional): 最长等待时间，默认使用 acquire_timeout
+
+    Raises:
+        TimeoutError: 等待超时
+    """
     LOGGER.debug("get_socket")
+    timeout = self.acquire_timeout if timeout is None else timeout
+    deadline = None if timeout is None else time.monotonic() + timeout
+    waited = False
+    with self._available:
+      while True:
+        if self._closed:
+          raise ConnectionError(f"Socket pool of {self.host}:{self.port} is shut down")
+        while self.available_sockets:
+          sock = self.available_sockets.pop()
+          if self.is_socket_available(sock):
+            return sock
+          LOGGER.debug("Drop broken socket")
+          self._drop_socket(sock)
+        if len(self.connections) + self._opening < self.max_sockets:
+          if not self._retry_delay:
+            self._opening += 1
+            break
+          # 处于重连退避中：由后台线程负责重连，没有可用连接时直接失败，避免请求堆积
+          if not self.connections:
+            raise ConnectionError(f"{self.host}:{self.port} is unreachable, reconnecting in background")
+        if not waited:
+          waited = True
+          self.exhausted += 1
+        now = time.monotonic()
+        if deadline is not None and deadline <= now:
+          raise TimeoutError(f"No socket of {self.host}:{self.port} available in {timeout}s")
+        self._available.wait(None if deadline is None else deadline - now)
+    return self._open_socket()
+
+  def try_get_socket(self):
+    """取出一个空闲连接，没有空闲连接时返回 None，不等待也不新建连接"""
     with self._lock:
-      if not self.available_sockets:
-        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
-        # LOGGER.debug("create_connection")
-        return sock
-      sock = self.available_sockets.pop()
-      if self.is_socket_available(sock):
-        return sock
-      return socket.create_connection((self.host, self.port), timeout=self.timeout)
+      while self.available_sockets and not self._closed:
+        sock = self.available_sockets.pop()
+        if self.is_socket_available(sock):
+          return sock
+        self._drop_socket(sock)
+    return None
+
+  def recv_frame(self, sock, framer) -> memoryview:
+    """按帧格式读取一帧完整的响应到连接的接收缓冲区，见 Framer.recv_frame"""
+    return framer.recv_frame(sock, self.connections[sock].view)
 
   def is_socket_available(self, sock):
+    stats = self.connections.get(sock)
+    if stats is None:
+      return False
     try:
-      err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
-      if err == 0:
+      if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+        return False
+      if time.monotonic() - stats.last_used < self.idle_timeout:
         return True
-      else:
-        self.available_sockets.remove(sock)
-    except Exception:
+      # 空闲较久的连接用非阻塞 peek 检查：对端关闭时读到 b""，残留的旧响应同样视为不可用
+      sock.setblocking(False)
+      try:
+        sock.recv(1, socket.MSG_PEEK)
+        return False
+      except BlockingIOError:
+        return True
+      finally:
+        sock.settimeout(self.timeout)
+    except OSError:
       return False
 
   def release_socket(self, sock):
     with self._lock:
+      stats = self.connections.get(sock)
+      if stats is None:
+        return
+      stats.requests += 1
+      stats.last_used = time.monotonic()
+      if self._closed:
+        self._drop_socket(sock)
+        return
       self.available_sockets.append(sock)
+      self._available.notify()
       # LOGGER.info("release_socket")
 
+  def discard_socket(self, sock):
+    """关闭出错的连接，并在后台补充新的连接，不影响池中其它连接"""
+    with self._lock:
+      stats = self.connections.get(sock)
+      if stats is not None:
+        stats.errors += 1
+      self._drop_socket(sock)
+      if not self._closed:
+        self._start_reconnect()
+
+  def _drop_socket(self, sock):
+    self.connections.pop(sock, None)
+    try:
+      sock.close()
+    except OSError:
+      pass
+    self._available.notify_all()
+
+  def _start_reconnect(self):
+    if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+      return
+    self._reconnect_thread = Thread(target=self._reconnect, name=f"reconnect-{self.host}:{self.port}", daemon=True)
+    self._reconnect_thread.start()
+
+  def _reconnect(self):
+    """后台把连接补充到上限（lazy 时只补充一个，其余按需建立），失败时指数退避"""
+    target = 1 if self.lazy else self.max_sockets
+    while True:
+      with self._lock:
+        if self._closed or len(self.connections) + self._opening >= target:
+          return
+        delay = self._next_attempt - time.monotonic()
+        self._opening += 1
+      if delay > 0:
+        time.sleep(delay)
+      try:
+        sock = self._open_socket()
+      except OSError:
+        continue
+      with self._lock:
+        self.reconnects += 1
+        if self._closed:
+          self._drop_socket(sock)
+          return
+        self.available_sockets.append(sock)
+        self._available.notify()
+      LOGGER.info(f"Reconnected to {self.host}:{self.port}")
+
+  def stats(self) -> dict:
+    """连接池与各连接的统计信息"""
+    with self._lock:
+      now = time.monotonic()
+      return {
+        "size": len(self.connections),
+        "available": len(self.available_sockets),
+        "in_use": len(self.connections) - len(self.available_sockets),
+        "reconnects": self.reconnects,
+        "failures": self.failures,
+        "exhausted": self.exhausted,
+        "connections": [
+          {"age": now - s.created, "idle": now - s.last_used, "requests": s.requests, "errors": s.errors}
+          for s in self.connections.values()
+        ],
+      }
+
   def shutdown(self):
     with self._lock:
-      for sock in self.available_sockets:
-        sock.close()
+      self._closed = True
+      for sock in list(self.connections):
+        self._drop_socket(sock)
       self.available_sockets = []
 
 
 class execute:
-  def __init__(self, max_workers: int):
-    self.executor = ThreadPoolExecutor(max_workers=max_workers)
-    self.futures = []
+  def __init__(
+    self, max_workers: int, on_start: Callable[[float], None] = None, max_pending: int = None, inline: bool = False
+  ):
+    """线程池，第一次提交并发任务时才创建
+
+    Args:
+        max_workers (int): 线程数
+        on_start (Callable[[float], None], optional): 任务开始执行时在工作线程中以排队时间（秒）调用。Defaults to None.
+        max_pending (int, optional): submit 提交的未完成任务数上限，达到上限时 submit 阻塞。Defaults to None.
+        inline (bool, optional): run 直接在调用线程中执行，不经过线程池。Defaults to False.
+    """
+    self.max_workers = max_workers
+    self.inline = inline
+    self.__executor: ThreadPoolExecutor = None
+    # submit 提交且尚未完成的任务，完成后自动移除
+    self.futures: set[Future] = set()
+    self.on_start = on_start
+    self.__lock = Lock()
+    self.__pending = Semaphore(max_pending) if max_pending else None
+
+  def __wrap(self, func: Callable) -> Callable:
+    if self.on_start is None:
+      return func
+    submitted = time.perf_counter()
+
+    def run(*args, **kwargs):
+      self.on_start(time.perf_counter() - submitted)
+      return func(*args, **kwargs)
+
+    return run
+
+  @property
+  def executor(self) -> ThreadPoolExecutor:
+    if self.__executor is None:
+      with self.__lock:
+        if self.__executor is None:
+          self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+    return self.__executor
 
   def run(self, func: Callable, *args, **kwargs) -> Any:
+    if self.inline:
+      return self.__wrap(func)(*args, **kwargs)
     try:
-      future: Future = self.executor.submit(func, *args, **kwargs)
+      future: Future = self.executor.submit(self.__wrap(func), *args, **kwargs)
       return future.result()
     except Exception as e:
       raise e
 
-  def submit(self, func: Callable, *args, **kwargs) -> Any:
-    future = self.executor.submit(func, *args, **kwargs)
-    self.futures.append(future)
+  def run_all(self, func: Callable, calls: list) -> list:
+    """并发执行多次调用，按提交顺序返回结果"""
+    futures = [self.executor.submit(self.__wrap(func), *args) for args in calls]
+    return [future.result() for future in futures]
+
+  def submit(self, func: Callable, *args, **kwargs) -> Future:
+    """提交任务，不等待结果
+
+    Returns:
+        Future: 任务的结果
+    """
+    if self.__pending is not None:
+      self.__pending.acquire()
+    try:
+      future = self.executor.submit(self.__wrap(func), *args, **kwargs)
+    except Exception as e:
+      if self.__pending is not None:
+        self.__pending.release()
+      raise e
+    with self.__lock:
+      self.futures.add(future)
+    future.add_done_callback(self.__done)
+    return future
+
+  def __done(self, future: Future):
+    with self.__lock:
+      self.futures.discard(future)
+    if self.__pending is not None:
+      self.__pending.release()
 
   def gather_results(self):
+    """等待所有未完成的 submit 任务，返回其结果（出错时为异常）"""
+    with self.__lock:
+      futures = list(self.futures)
     results = []
-    for future in as_completed(self.futures):
+    for future in as_completed(futures):
       try:
         results.append(future.result())
       except Exception as e:
@@ -100,4 +392,7 @@ class execute:
     """
     关闭线程池。
     """
-    self.executor.shutdown()
+    with self.__lock:
+      executor, self.__executor = self.__executor, None
+    if executor is not None:
+      executor.shutdown()
@@ -0,0 +1,197 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 18:10:37
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 18:10:37
+# @ Description: 客户端吞吐与延迟压测
+
+在本机回环地址上启动 ModbusTcpServer，测量 ModbusTcpClient 在不同功能码、帧大小、数据格式、
+连接数（sockts）和线程数（threads）下的吞吐（请求/秒）和 p50/p99 延迟，结果以 JSON 输出。
+
+默认每次只改变一个维度（其余取基准值）；--full 时运行所有组合。
+
+    python benchmarks/bench_client.py --out bench.json
+    python benchmarks/bench_client.py --baseline bench.json  # 与上次结果比较，吞吐下降超过阈值时返回 1
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ModbusTcp import DataFormat, ModbusTcpClient, ModbusTcpServer  # noqa: E402
+from ModbusTcp.Codec import get_codec  # noqa: E402
+from ModbusTcp.ulitis import percentile  # noqa: E402
+
+FUNCTIONS = [
+  "read_holding_registers",
+  "read_input_registers",
+  "read_coils",
+  "read_input_coils",
+  "write_multiple_registers",
+  "write_multiple_coils",
+]
+# 帧大小：寄存器数（线圈按 16 倍计算，125 对应 2000 个线圈）
+SIZES = [1, 16, 64, 120]
+FORMATS = [
+  DataFormat.SIGNED_16_INT_BIG,
+  DataFormat.UNSIGNED_32_INT_LITTLE_BYTE_SWAP,
+  DataFormat.FLOAT_32_BIG,
+  DataFormat.DOUBLE_64_LITTLE_BYTE_SWAP,
+]
+POOL_SIZES = [1, 4, 10, 32]
+
+BASELINE = {
+  "function": "read_holding_registers",
+  "size": 16,
+  "data_format": DataFormat.SIGNED_16_INT_BIG,
+  "sockts": 10,
+  "threads": 10,
+  "wait_writed": True,
+}
+
+
+def build_call(client: ModbusTcpClient, function: str, size: int, data_format: DataFormat):
+  words = get_codec(data_format, 1).registers
+  if function.endswith("coils"):
+    quantity = min(size * 16, 1968 if function.startswith("write") else 2000)
+  else:
+    quantity = max(1, size // words)
+  method = getattr(client, function)
+  if function.startswith("read"):
+    return lambda: method(0, quantity)
+  values = [i % 2 for i in range(quantity)] if function.endswith("coils") else [i % 100 for i in range(quantity)]
+  return lambda: method(0, values)
+
+
+def run_case(server: ModbusTcpServer, case: dict, requests: int, concurrency: int) -> dict:
+  client = ModbusTcpClient(
+    "127.0.0.1", server.port, case["data_format"], sockts=case["sockts"], threads=case["threads"]
+  )
+  call = build_call(client, case["function"], case["size"], case["data_format"])
+  for _ in range(min(50, requests)):
+    call()
+  client.wait_writed = case["wait_writed"]
+
+  received = server.requests
+  latencies = []
+
+  def worker(count):
+    for _ in range(count):
+      began = time.perf_counter()
+      call()
+      latencies.append(time.perf_counter() - began)
+
+  per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+  began = time.perf_counter()
+  with ThreadPoolExecutor(concurrency) as executor:
+    list(executor.map(worker, per_worker))
+  if not case["wait_writed"]:
+    # 不等待写入结果时，以服务端收到全部请求为结束
+    while server.requests - received < requests:
+      time.sleep(0.001)
+  elapsed = time.perf_counter() - began
+  client.disconnect()
+
+  latencies.sort()
+  return {
+    **case,
+    "data_format": case["data_format"].name,
+    "requests": requests,
+    "concurrency": concurrency,
+    "seconds": round(elapsed, 4),
+    "rps": round(requests / elapsed, 1),
+    "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+    "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+  }
+
+
+def build_cases(full: bool) -> list:
+  if full:
+    cases = [
+      dict(zip(("function", "size", "data_format", "sockts", "threads"), values, strict=True), wait_writed=True)
+      for values in itertools.product(FUNCTIONS, SIZES, FORMATS, POOL_SIZES, POOL_SIZES)
+    ]
+  else:
+    cases = [dict(BASELINE, function=value) for value in FUNCTIONS]
+    cases += [dict(BASELINE, size=value) for value in SIZES if value != BASELINE["size"]]
+    cases += [dict(BASELINE, data_format=value) for value in FORMATS if value != BASELINE["data_format"]]
+    cases += [dict(BASELINE, sockts=value) for value in POOL_SIZES if value != BASELINE["sockts"]]
+    cases += [dict(BASELINE, threads=value) for value in POOL_SIZES if value != BASELINE["threads"]]
+  # 不等待写入结果（fire-and-forget）
+  cases += [dict(BASELINE, function=value, wait_writed=False) for value in FUNCTIONS if value.startswith("write")]
+  return cases
+
+
+def case_key(result: dict) -> tuple:
+  return tuple(result[key] for key in ("function", "size", "data_format", "sockts", "threads", "wait_writed"))
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> int:
+  """与基准结果比较，返回吞吐下降超过阈值的用例数"""
+  with open(baseline_path, encoding="utf-8") as f:
+    baseline = {case_key(result): result for result in json.load(f)["results"]}
+  regressions = 0
+  for result in results:
+    old = baseline.get(case_key(result))
+    if old is None:
+      continue
+    change = result["rps"] / old["rps"] - 1
+    if change < -threshold:
+      regressions += 1
+      print(f"REGRESSION {case_key(result)}: {old['rps']} -> {result['rps']} req/s ({change:+.1%})", file=sys.stderr)
+  return regressions
+
+
+def main():
+  parser = argparse.ArgumentParser(description="ModbusTcpClient throughput / latency benchmark")
+  parser.add_argument("--requests", type=int, default=2000, help="requests per case")
+  parser.add_argument("--concurrency", type=int, default=10, help="caller threads per case")
+  parser.add_argument("--full", action="store_true", help="run the full cartesian matrix")
+  parser.add_argument("--out", help="write results to this JSON file (default: stdout)")
+  parser.add_argument("--baseline", help="compare against a previous JSON result")
+  parser.add_argument("--threshold", type=float, default=0.1, help="allowed throughput drop for --baseline")
+  args = parser.parse_args()
+
+  logging.getLogger("ModbusTcp").setLevel(logging.WARNING)
+  server = ModbusTcpServer("127.0.0.1", 0)
+  server.start_in_thread()
+
+  results = []
+  for case in build_cases(args.full):
+    result = run_case(server, case, args.requests, args.concurrency)
+    results.append(result)
+    print(
+      f"{result['function']:<26} size={result['size']:<4} {result['data_format']:<34} "
+      f"sockts={result['sockts']:<3} threads={result['threads']:<3} wait={result['wait_writed']!s:<5} "
+      f"{result['rps']:>10} req/s  p50={result['p50_ms']:.3f}ms  p99={result['p99_ms']:.3f}ms",
+      file=sys.stderr,
+    )
+  server.stop_in_thread()
+
+  report = {
+    "timestamp": time.time(),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "requests": args.requests,
+    "concurrency": args.concurrency,
+    "results": results,
+  }
+  if args.out:
+    with open(args.out, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+  else:
+    json.dump(report, sys.stdout, indent=2)
+  if args.baseline and compare(results, args.baseline, args.threshold):
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,105 @@
+"""
+# @ Author: Liaco
+# @ Create Time: 2026-10-18 22:40:12
+# @ Modified by: Liaco
+# @ Modified time: 2026-10-18 22:40:12
+# @ Description: 启动耗时压测
+
+命令行、边缘设备上的短时任务每次都要重新导入库、建立连接，启动耗时往往比单次请求更长。
+每次在新的解释器进程中测量：导入包、导入客户端、创建客户端（eager 建立全部连接 / lazy 不建立连接）、
+第一次读取的耗时，以及整个进程的耗时，取多次运行的中位数，结果以 JSON 输出。
+
+    python benchmarks/bench_startup.py --runs 20 --sockts 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ModbusTcp import ModbusTcpServer  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中运行，各阶段耗时以 JSON 输出到 stdout
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import ModbusTcp
+t1 = time.perf_counter()
+from ModbusTcp import ModbusTcpClient
+t2 = time.perf_counter()
+client = ModbusTcpClient("127.0.0.1", {port}, sockts={sockts}, lazy={lazy})
+t3 = time.perf_counter()
+client.read_holding_registers(0, 10)
+t4 = time.perf_counter()
+client.disconnect()
+json.dump({{"import_package": t1 - t0, "import_client": t2 - t1, "connect": t3 - t2, "first_read": t4 - t3,
+  "total": t4 - t0, "modules": len(sys.modules)}}, sys.stdout)
+"""
+
+
+def run_once(port: int, sockts: int, lazy: bool) -> dict:
+  code = CHILD.format(port=port, sockts=sockts, lazy=lazy)
+  env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+  start = time.perf_counter()
+  output = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+  result = json.loads(output)
+  result["process"] = time.perf_counter() - start
+  return result
+
+
+def run_case(port: int, sockts: int, lazy: bool, runs: int) -> dict:
+  samples = [run_once(port, sockts, lazy) for _ in range(runs)]
+  result = {"mode": "lazy" if lazy else "eager", "sockts": sockts, "modules": samples[-1]["modules"]}
+  for key in ("import_package", "import_client", "connect", "first_read", "total", "process"):
+    result[f"{key}_ms"] = round(statistics.median(sample[key] for sample in samples) * 1000, 3)
+  return result
+
+
+def main():
+  parser = argparse.ArgumentParser(description="ModbusTcp cold-start benchmark")
+  parser.add_argument("--runs", type=int, default=20, help="fresh interpreter runs per case")
+  parser.add_argument("--sockts", type=int, default=10, help="connection pool size")
+  parser.add_argument("--out", help="write results to this JSON file (default: stdout)")
+  args = parser.parse_args()
+
+  logging.getLogger("ModbusTcp").setLevel(logging.WARNING)
+  server = ModbusTcpServer("127.0.0.1", 0)
+  server.start_in_thread()
+
+  results = []
+  for lazy in (False, True):
+    result = run_case(server.port, args.sockts, lazy, args.runs)
+    results.append(result)
+    print(
+      f"{result['mode']:<6} import={result['import_package_ms'] + result['import_client_ms']:.1f}ms "
+      f"connect={result['connect_ms']:.1f}ms first_read={result['first_read_ms']:.1f}ms "
+      f"total={result['total_ms']:.1f}ms process={result['process_ms']:.1f}ms modules={result['modules']}",
+      file=sys.stderr,
+    )
+  server.stop_in_thread()
+
+  report = {
+    "timestamp": time.time(),
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "runs": args.runs,
+    "results": results,
+  }
+  if args.out:
+    with open(args.out, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+  else:
+    json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+  main()
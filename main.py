@@ -1,6 +1,10 @@
+import logging
+
 from ModbusTcp import LOGGER, DataFormat, ModbusTcpClient
+from ModbusTcp.ulitis import formatter
 
 if __name__ == "__main__":
+  logging.basicConfig(format=formatter, level=logging.INFO)
   modbus_tcp = ModbusTcpClient("127.0.0.1", 502, DataFormat.SIGNED_32_INT_LITTLE_BYTE_SWAP)
   modbus_tcp.wait_writed = False
   modbus_tcp.write_multiple_registers(0, [20, 30, -99999999])